@@ -0,0 +1,198 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from models import AnalysisCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(text, model_name, rules_version):
+    """Hash the text together with the model and rule versions.
+
+    The text is hashed exactly as it is analyzed: the lexicon and the window
+    splitter both depend on whitespace, so normalized variants of a text can
+    score differently and must not share a result.
+    """
+    digest = hashlib.sha256()
+    digest.update(f'{model_name}\x00{rules_version}\x00'.encode('utf-8'))
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with size and TTL eviction"""
+
+    def __init__(self, maxsize=1024, ttl_seconds=3600):
+        self.maxsize = int(maxsize)
+        self.ttl = float(ttl_seconds)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class MongoResultCache:
+    """Shared cache tier stored in the analysis_cache collection.
+
+    Documents carry their own ``expires_at`` and are removed by a TTL index,
+    so every worker sees the same hits. Database errors are logged and
+    treated as misses; the cache must never fail an analysis.
+    """
+
+    def __init__(self, ttl_seconds=86400):
+        self.ttl = float(ttl_seconds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key):
+        try:
+            entry = AnalysisCacheEntry.objects(key=key, expires_at__gt=datetime.utcnow()).first()
+        except Exception as e:
+            logger.warning(f"Mongo analysis cache lookup failed: {str(e)}")
+            self._count('errors')
+            return None
+
+        if entry is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return entry.response
+
+    def set(self, key, value):
+        try:
+            AnalysisCacheEntry(
+                key=key,
+                response=value,
+                expires_at=datetime.utcnow() + timedelta(seconds=self.ttl)
+            ).save()
+            self._count('writes')
+        except Exception as e:
+            logger.warning(f"Mongo analysis cache write failed: {str(e)}")
+            self._count('errors')
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'errors': self.errors,
+            }
+
+
+class AnalysisCache:
+    """Two-tier cache of final mood analysis responses.
+
+    The first tier is a per-process LRU; the optional second tier is the
+    shared Mongo collection. A second-tier hit is promoted into the first.
+    ``encode`` and ``decode`` convert values to and from the plain dicts
+    stored in Mongo; the first tier keeps the values themselves.
+    """
+
+    def __init__(self, model_name, rules_version, maxsize=1024, ttl_seconds=3600,
+                 mongo_enabled=False, mongo_ttl_seconds=86400, encode=None, decode=None):
+        self.model_name = model_name
+        self.rules_version = rules_version
+        self.encode = encode
+        self.decode = decode
+        self.local = LRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+        self.shared = MongoResultCache(ttl_seconds=mongo_ttl_seconds) if mongo_enabled else None
+
+    def key_for(self, text):
+        if not isinstance(text, str):
+            return None
+        return cache_key(text, self.model_name, self.rules_version)
+
+    def get(self, text):
+        key = self.key_for(text)
+        if key is None:
+            return None
+
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+
+        value = self.shared.get(key)
+        if value is not None and self.decode is not None:
+            try:
+                value = self.decode(value)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Discarding unreadable shared analysis cache entry: {str(e)}")
+                return None
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    def set(self, text, value):
+        key = self.key_for(text)
+        if key is None:
+            return
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, self.encode(value) if self.encode is not None else value)
+
+    def stats(self):
+        return {
+            'model': self.model_name,
+            'rules_version': self.rules_version,
+            'local': self.local.stats(),
+            'shared': self.shared.stats() if self.shared is not None else None,
+        }
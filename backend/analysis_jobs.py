@@ -0,0 +1,181 @@
+"""Durable queue that fills in journal entry moods in the background.
+
+Entries saved without mood get an ``AnalysisJob`` document. Workers claim jobs
+with an atomic find-and-modify, so any number of threads or processes can
+share the queue, and a job whose worker died is reclaimed once its lock
+expires. Finished jobs are removed by a TTL index ``ttl_seconds`` after they
+finish. Run standalone workers with ``python analysis_jobs.py``.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from mongoengine.queryset.visitor import Q
+
+from models import AnalysisJob, JournalEntry
+from rollups import record_entry_mood
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_analysis(entry):
+    """Queue mood analysis for a saved entry whose mood_status is 'pending'"""
+    return AnalysisJob(entry=entry).save()
+
+
+def claim_next_job(worker_id, lock_seconds=120):
+    """Atomically claim the oldest runnable job, or return None"""
+    now = datetime.utcnow()
+    runnable = (
+        Q(status='queued', available_at__lte=now) |
+        # A running job whose lock expired belongs to a worker that died
+        Q(status='running', locked_until__lt=now)
+    )
+    return AnalysisJob.objects(runnable).order_by('available_at').modify(
+        set__status='running',
+        set__worker_id=worker_id,
+        set__locked_until=now + timedelta(seconds=lock_seconds),
+        set__updated_at=now,
+        inc__attempts=1,
+        new=True
+    )
+
+
+def _update_owned(job, **updates):
+    """Apply ``updates`` only while ``job`` is still running under the worker
+    that claimed it; returns whether it was applied.
+
+    A job whose lock expired may have been reclaimed by another worker, and
+    that worker's outcome wins.
+    """
+    updated = AnalysisJob.objects(id=job.id, worker_id=job.worker_id, status='running').modify(
+        set__updated_at=datetime.utcnow(),
+        **updates
+    )
+    if updated is None:
+        logger.warning(f"Mood analysis job {job.id} was reclaimed by another worker; dropping this outcome")
+    return updated is not None
+
+
+def _expires_at(ttl_seconds):
+    return datetime.utcnow() + timedelta(seconds=ttl_seconds)
+
+
+def process_job(job, analyze, ttl_seconds=86400):
+    """Analyze the job's entry and store the mood; returns True on success"""
+    entry = JournalEntry.objects(id=job.entry.id).first() if job.entry else None
+    if entry is None:
+        _update_owned(
+            job,
+            set__status='failed',
+            set__error='Journal entry no longer exists',
+            set__expires_at=_expires_at(ttl_seconds)
+        )
+        return False
+
+    try:
+        entry.set_mood(analyze(entry.content))
+    except Exception as e:
+        logger.error(f"Mood analysis job {job.id} failed (attempt {job.attempts}): {str(e)}")
+        now = datetime.utcnow()
+        if job.attempts >= job.max_attempts:
+            if _update_owned(job, set__status='failed', set__error=str(e), set__expires_at=_expires_at(ttl_seconds)):
+                JournalEntry.objects(id=entry.id, mood_status='pending').update_one(
+                    set__mood_status='failed', set__updated_at=now
+                )
+        else:
+            # Retry with exponential backoff
+            _update_owned(
+                job,
+                set__status='queued',
+                set__error=str(e),
+                set__available_at=now + timedelta(seconds=2 ** job.attempts)
+            )
+        return False
+
+    # Only the write that moves the entry out of 'pending' counts its mood in
+    # the rollups, so a reclaimed job or a retry after a crash between these
+    # writes cannot count it twice
+    stored = JournalEntry.objects(id=entry.id, mood_status='pending').update_one(
+        set__mood_data=entry.mood_data, set__mood_status='done', set__updated_at=datetime.utcnow()
+    )
+    if stored:
+        record_entry_mood(entry)
+    return _update_owned(job, set__status='done', unset__error=True, set__expires_at=_expires_at(ttl_seconds))
+
+
+class AnalysisWorker(threading.Thread):
+    """Worker thread that claims and runs analysis jobs until stopped"""
+
+    def __init__(self, analyze, poll_interval=1.0, lock_seconds=120, ttl_seconds=86400, name=None):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        super().__init__(name=name or f'analysis-worker-{worker_id}', daemon=True)
+        self.worker_id = worker_id
+        self.analyze = analyze
+        self.poll_interval = poll_interval
+        self.lock_seconds = lock_seconds
+        self.ttl_seconds = ttl_seconds
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run_once(self):
+        """Process one job if there is one; returns whether a job was found"""
+        job = claim_next_job(self.worker_id, self.lock_seconds)
+        if job is None:
+            return False
+        process_job(job, self.analyze, self.ttl_seconds)
+        return True
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                logger.error(f"Analysis worker error: {str(e)}")
+            self._stop_event.wait(self.poll_interval)
+
+
+def start_workers(analyze, count, poll_interval=1.0, lock_seconds=120, ttl_seconds=86400):
+    workers = [AnalysisWorker(analyze, poll_interval, lock_seconds, ttl_seconds) for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def queue_stats():
+    try:
+        return {
+            status: AnalysisJob.objects(status=status).count()
+            for status in ('queued', 'running', 'done', 'failed')
+        }
+    except Exception as e:
+        return {'error': str(e)}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from app import analyze_mood_data, app
+
+    parser = argparse.ArgumentParser(description='Run mood analysis queue workers')
+    parser.add_argument('--workers', type=int, default=app.config['ANALYSIS_WORKERS'] or 1)
+    parser.add_argument('--poll-interval', type=float, default=app.config['ANALYSIS_POLL_INTERVAL_SECONDS'])
+    args = parser.parse_args()
+
+    workers = start_workers(
+        analyze_mood_data, args.workers, args.poll_interval, ttl_seconds=app.config['ANALYSIS_JOB_TTL_SECONDS']
+    )
+    logger.info(f"Started {len(workers)} analysis workers")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.stop()
@@ -2,23 +2,38 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from datetime import datetime
 from config import Config
-from models import db, User, JournalEntry, MusicFeedback
-from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer
+from models import db, User, JournalEntry, MusicFeedback, ExportJob, utc_isoformat
+from batching import MicroBatcher
+from analysis_cache import AnalysisCache, LRUCache
+from lexicon import LEXICON_VERSION, score_text
+from mood_analyzer import DETAIL_LEVELS, EmotionModel, MoodResult, build_mood_results
+from inference_server import InferenceClient
+from analysis_jobs import enqueue_analysis, start_workers, queue_stats
+from pagination import parse_page_args, paginate
+from conditional import add_validators, feedback_validator, is_not_modified, journal_validator, make_etag, not_modified
+from journal_import import ImportRowError, build_entry, insert_entries
+from journal_export import ExportCache, export_cache_key, iter_file_chunks, render_export
+from export_jobs import artifact_path, create_export_job, job_payload, submit_export_job
+from mood_analytics import data_version, mood_analytics
+from rollups import record_entries, record_entry, record_feedback, rollup_analytics, uses_rollups
+from responses import api_response, compress_response, negotiated_mimetype
+from request_logging import configure_logging, init_request_logging, logging_stats, parse_sample_rates
+from metrics import METRICS_CONTENT_TYPE, REGISTRY, init_request_metrics, span
+from profiling import has_profile_token, init_profiling, is_profile_name, list_profiles
+from chunking import Window, fits_without_tokenizing, split_into_windows, combine_window_scores
 import os
+import time
 from dotenv import load_dotenv
 import json
 import logging
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from io import BytesIO
 from dateutil import parser
+from mongoengine.connection import get_db
+from mongoengine.errors import ValidationError
 
 # Load environment variables
 load_dotenv()
@@ -30,393 +45,198 @@ jwt = JWTManager(app)
 db.init_app(app)
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
+configure_logging(app.config['LOG_LEVEL'], app.config['LOG_FORMAT'], app.config['LOG_QUEUE_SIZE'])
+init_request_logging(app, app.config['LOG_SAMPLE_RATE'], parse_sample_rates(app.config['LOG_SAMPLE_RATES']))
 logger = logging.getLogger(__name__)
 
-# Updated Emotion categories mapping with emojis
-EMOTION_CATEGORIES = {
-    'Happy 😊': ['joy', 'happiness', 'delight', 'pleasure', 'cheerfulness'],
-    'Sad 😢': ['sadness', 'grief', 'sorrow', 'disappointment', 'loneliness'],
-    'Angry 😠': ['anger', 'annoyance', 'irritation', 'frustration', 'rage'],
-    'Fearful 😰': ['fear', 'anxiety', 'worry', 'nervousness', 'stress'],
-    'Surprised 😲': ['surprise', 'amazement', 'awe', 'wonder', 'shock'],
-    'Disgusted 🤢': ['disgust', 'revulsion', 'aversion', 'contempt'],
-    'Calm 😌': ['calm', 'relaxed', 'peaceful', 'serene', 'tranquil'],
-    'Excited ⚡': ['excitement', 'enthusiasm', 'eager', 'thrill', 'anticipation'],
-    'Loving 💝': ['love', 'affection', 'caring', 'tenderness', 'fondness', 'adoration'],
-    'Heartbroken 💔': ['heartbreak', 'heartbroken', 'broken heart', 'heart ache', 'emotional pain'],
-    'Motivated 💪': [
-        'determination', 'motivation', 'drive', 'ambition', 'passion', 'inspiration',
-        'purpose', 'focus', 'dedication', 'commitment', 'perseverance', 'resilience',
-        'achievement', 'success', 'progress', 'growth', 'improvement', 'development',
-        'goals', 'aspirations', 'dreams', 'vision', 'mission', 'purpose',
-        'empowerment', 'strength', 'courage', 'confidence', 'belief', 'hope',
-        'optimism', 'positivity', 'enthusiasm', 'energy', 'vitality', 'vigor',
-        'determined', 'motivated', 'driven', 'ambitious', 'passionate', 'inspired',
-        'focused', 'dedicated', 'committed', 'persevering', 'resilient',
-        'achieving', 'succeeding', 'progressing', 'growing', 'improving', 'developing',
-        'empowered', 'strong', 'courageous', 'confident', 'hopeful',
-        'optimistic', 'positive', 'energetic', 'vital', 'vigorous'
-    ],
-    'Neutral 😐': ['neutral', 'indifferent', 'unemotional'],
-    'Nostalgic 🎭': [
-        'nostalgia', 'reminiscence', 'memories', 'recollection', 'remembrance',
-        'sentimental', 'yearning', 'longing', 'homesick', 'melancholy',
-        'wistful', 'reflective', 'contemplative', 'reminiscent', 'retrospective',
-        'old times', 'good old days', 'childhood memories', 'past times',
-        'throwback', 'blast from the past', 'memory lane', 'flashback',
-        'vintage', 'classic', 'traditional', 'old school', 'retro'
-    ],
-    'Low Energy 😴': [
-        'tired', 'exhausted', 'fatigued', 'drained', 'weary', 'sleepy',
-        'lethargic', 'sluggish', 'low energy', 'no energy', 'lack of energy',
-        'burned out', 'worn out', 'spent', 'depleted', 'drowsy', 'groggy',
-        'listless', 'apathetic', 'unmotivated', 'uninspired', 'unenergetic',
-        'low battery', 'running on empty', 'out of steam', 'out of gas',
-        'need rest', 'need sleep', 'need break', 'need recharge'
-    ]
-}
-
-# Emotion emoji mapping for individual emotions
-EMOTION_EMOJIS = {
-    'joy': '😊',
-    'happiness': '😄',
-    'delight': '🥰',
-    'pleasure': '😋',
-    'cheerfulness': '😃',
-    'sadness': '😢',
-    'grief': '😭',
-    'sorrow': '💔',
-    'disappointment': '😔',
-    'loneliness': '😞',
-    'anger': '😠',
-    'annoyance': '😤',
-    'irritation': '😒',
-    'frustration': '😫',
-    'rage': '😡',
-    'fear': '😰',
-    'anxiety': '😨',
-    'worry': '😟',
-    'nervousness': '😬',
-    'stress': '😓',
-    'surprise': '😲',
-    'amazement': '😮',
-    'awe': '🤩',
-    'wonder': '✨',
-    'shock': '😱',
-    'disgust': '🤢',
-    'revulsion': '🤮',
-    'aversion': '😖',
-    'contempt': '😏',
-    'calm': '😌',
-    'relaxed': '😌',
-    'peaceful': '🕊️',
-    'serene': '🌊',
-    'tranquil': '🌿',
-    'excitement': '⚡',
-    'enthusiasm': '🎉',
-    'eager': '✨',
-    'thrill': '🎢',
-    'anticipation': '🎯',
-    'love': '💝',
-    'affection': '💖',
-    'caring': '💗',
-    'tenderness': '💓',
-    'fondness': '💕',
-    'adoration': '💘',
-    'determination': '💪',
-    'motivation': '🔥',
-    'drive': '🚀',
-    'ambition': '⭐',
-    'passion': '❤️',
-    'inspiration': '💫',
-    'purpose': '🎯',
-    'focus': '🎯',
-    'dedication': '🎯',
-    'commitment': '🎯',
-    'perseverance': '💪',
-    'resilience': '💪',
-    'achievement': '🏆',
-    'success': '🏆',
-    'progress': '📈',
-    'growth': '🌱',
-    'improvement': '📈',
-    'development': '🌱',
-    'goals': '🎯',
-    'aspirations': '✨',
-    'dreams': '✨',
-    'vision': '👁️',
-    'mission': '🎯',
-    'empowerment': '💪',
-    'strength': '🦁',
-    'courage': '🦁',
-    'confidence': '💪',
-    'belief': '🙏',
-    'hope': '✨',
-    'optimism': '😊',
-    'positivity': '😊',
-    'energy': '⚡',
-    'vitality': '💫',
-    'vigor': '💪',
-    'neutral': '😐',
-    'indifferent': '😶',
-    'unemotional': '😑',
-    'heartbreak': '💔',
-    'heartbroken': '💔',
-    'broken heart': '💔',
-    'heart ache': '💔',
-    'emotional pain': '💔',
-    'nostalgia': '🎭',
-    'reminiscence': '🎭',
-    'memories': '🎭',
-    'recollection': '🎭',
-    'remembrance': '🎭',
-    'sentimental': '🎭',
-    'yearning': '🎭',
-    'longing': '🎭',
-    'homesick': '🎭',
-    'melancholy': '🎭',
-    'wistful': '🎭',
-    'reflective': '🎭',
-    'contemplative': '🎭',
-    'reminiscent': '🎭',
-    'retrospective': '🎭',
-    'old times': '🎭',
-    'good old days': '🎭',
-    'childhood memories': '🎭',
-    'past times': '🎭',
-    'throwback': '🎭',
-    'blast from the past': '🎭',
-    'memory lane': '🎭',
-    'flashback': '🎭',
-    'vintage': '🎭',
-    'classic': '🎭',
-    'traditional': '🎭',
-    'old school': '🎭',
-    'retro': '🎭'
-}
-
-# Initialize the sentiment analysis pipeline with SamLowe model
-logger.info("Initializing emotion analyzer...")
-model_name = "SamLowe/roberta-base-go_emotions"
-
-try:
-    # Initialize tokenizer and model separately for better error handling
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSequenceClassification.from_pretrained(model_name)
-    
-    emotion_analyzer = pipeline(
-        "text-classification",
-        model=model,
-        tokenizer=tokenizer,
-        return_all_scores=True,
-        device=-1  # Use CPU by default
+if app.config['METRICS_ENABLED']:
+    init_request_metrics(app)
+
+if app.config['PROFILE_TOKEN'] or app.config['PROFILE_SAMPLE_RATE'] > 0:
+    init_profiling(
+        app,
+        app.config['PROFILE_DIR'],
+        token=app.config['PROFILE_TOKEN'],
+        sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+        endpoints=app.config['PROFILE_ENDPOINTS'],
+        max_files=app.config['PROFILE_MAX_FILES']
     )
-    logger.info("Emotion analyzer initialized successfully")
-except Exception as e:
-    logger.error(f"Error initializing emotion analyzer: {str(e)}")
-    raise
-
-def map_emotion_to_category(emotion):
-    """Map the model's output emotions to our desired categories"""
-    emotion_mapping = {
-        'joy': 'Happy 😊',
-        'happiness': 'Happy 😊',
-        'delight': 'Happy 😊',
-        'pleasure': 'Happy 😊',
-        'cheerfulness': 'Happy 😊',
-        'sadness': 'Sad 😢',
-        'grief': 'Sad 😢',
-        'sorrow': 'Sad 😢',
-        'disappointment': 'Sad 😢',
-        'loneliness': 'Sad 😢',
-        'heartbreak': 'Heartbroken 💔',
-        'heartbroken': 'Heartbroken 💔',
-        'broken heart': 'Heartbroken 💔',
-        'heart ache': 'Heartbroken 💔',
-        'emotional pain': 'Heartbroken 💔',
-        'anger': 'Angry 😠',
-        'annoyance': 'Angry 😠',
-        'irritation': 'Angry 😠',
-        'frustration': 'Angry 😠',
-        'rage': 'Angry 😠',
-        'fear': 'Fearful 😰',
-        'anxiety': 'Fearful 😰',
-        'worry': 'Fearful 😰',
-        'nervousness': 'Fearful 😰',
-        'stress': 'Fearful 😰',
-        'surprise': 'Surprised 😲',
-        'amazement': 'Surprised 😲',
-        'awe': 'Surprised 😲',
-        'wonder': 'Surprised 😲',
-        'shock': 'Surprised 😲',
-        'disgust': 'Disgusted 🤢',
-        'revulsion': 'Disgusted 🤢',
-        'aversion': 'Disgusted 🤢',
-        'contempt': 'Disgusted 🤢',
-        'calm': 'Calm 😌',
-        'relaxed': 'Calm 😌',
-        'peaceful': 'Calm 😌',
-        'serene': 'Calm 😌',
-        'tranquil': 'Calm 😌',
-        'excitement': 'Excited ⚡',
-        'enthusiasm': 'Excited ⚡',
-        'eager': 'Excited ⚡',
-        'thrill': 'Excited ⚡',
-        'anticipation': 'Excited ⚡',
-        'love': 'Loving 💝',
-        'affection': 'Loving 💝',
-        'caring': 'Loving 💝',
-        'tenderness': 'Loving 💝',
-        'fondness': 'Loving 💝',
-        'adoration': 'Loving 💝',
-        'determination': 'Motivated 💪',
-        'motivation': 'Motivated 💪',
-        'drive': 'Motivated 💪',
-        'ambition': 'Motivated 💪',
-        'passion': 'Motivated 💪',
-        'inspiration': 'Motivated 💪',
-        'purpose': 'Motivated 💪',
-        'focus': 'Motivated 💪',
-        'dedication': 'Motivated 💪',
-        'commitment': 'Motivated 💪',
-        'perseverance': 'Motivated 💪',
-        'resilience': 'Motivated 💪',
-        'achievement': 'Motivated 💪',
-        'success': 'Motivated 💪',
-        'progress': 'Motivated 💪',
-        'growth': 'Motivated 💪',
-        'improvement': 'Motivated 💪',
-        'development': 'Motivated 💪',
-        'goals': 'Motivated 💪',
-        'aspirations': 'Motivated 💪',
-        'dreams': 'Motivated 💪',
-        'vision': 'Motivated 💪',
-        'mission': 'Motivated 💪',
-        'empowerment': 'Motivated 💪',
-        'strength': 'Motivated 💪',
-        'courage': 'Motivated 💪',
-        'confidence': 'Motivated 💪',
-        'belief': 'Motivated 💪',
-        'hope': 'Motivated 💪',
-        'optimism': 'Motivated 💪',
-        'positivity': 'Motivated 💪',
-        'energy': 'Motivated 💪',
-        'vitality': 'Motivated 💪',
-        'vigor': 'Motivated 💪',
-        'neutral': 'Neutral 😐',
-        'indifferent': 'Neutral 😐',
-        'unemotional': 'Neutral 😐',
-        'nostalgia': 'Nostalgic 🎭',
-        'reminiscence': 'Nostalgic 🎭',
-        'memories': 'Nostalgic 🎭',
-        'recollection': 'Nostalgic 🎭',
-        'remembrance': 'Nostalgic 🎭',
-        'sentimental': 'Nostalgic 🎭',
-        'yearning': 'Nostalgic 🎭',
-        'longing': 'Nostalgic 🎭',
-        'homesick': 'Nostalgic 🎭',
-        'melancholy': 'Nostalgic 🎭',
-        'wistful': 'Nostalgic 🎭',
-        'reflective': 'Nostalgic 🎭',
-        'contemplative': 'Nostalgic 🎭',
-        'reminiscent': 'Nostalgic 🎭',
-        'retrospective': 'Nostalgic 🎭'
-    }
-    return emotion_mapping.get(emotion, 'Neutral 😐')
-
-def preprocess_text(text):
-    """Preprocess text to better detect motivation-related phrases"""
-    motivation_phrases = {
-        'determined to': 'determination',
-        'motivated to': 'motivation',
-        'driven to': 'drive',
-        'committed to': 'commitment',
-        'focused on': 'focus',
-        'passionate about': 'passion',
-        'dedicated to': 'dedication',
-        'inspired to': 'inspiration',
-        'eager to': 'eagerness',
-        'excited to': 'excitement',
-        'looking forward to': 'anticipation',
-        'can\'t wait to': 'anticipation',
-        'ready to': 'determination',
-        'willing to': 'determination',
-        'going to': 'determination',
-        'plan to': 'determination',
-        'aim to': 'determination',
-        'striving to': 'determination',
-        'working to': 'determination',
-        'trying to': 'determination'
-    }
-    
-    # Convert to lowercase for matching
-    text_lower = text.lower()
-    
-    # Check for motivation phrases
-    for phrase, emotion in motivation_phrases.items():
-        if phrase in text_lower:
-            # Add the emotion explicitly to the text
-            text = f"{text} {emotion}"
-    
-    return text
 
-def group_emotions(emotions_with_scores):
-    """Group emotions into categories and calculate category scores"""
-    category_scores = {category: 0.0 for category in EMOTION_CATEGORIES.keys()}
-    category_emotions = {category: [] for category in EMOTION_CATEGORIES.keys()}
-    
-    # First pass: collect all emotions and their scores
-    for emotion in emotions_with_scores:
-        label = emotion['label']
-        score = emotion['score']
-        
-        # Map the emotion to our category
-        category = map_emotion_to_category(label)
-        
-        # Boost motivation-related emotions
-        if category == 'Motivated 💪':
-            score *= 1.5  # Increase the weight of motivation-related emotions
-        
-        # Add to category scores and emotions
-        category_scores[category] += score
-        category_emotions[category].append({
-            'emotion': label,
-            'emoji': EMOTION_EMOJIS.get(label, ''),
-            'score': round(score * 100, 2)
-        })
-    
-    # Second pass: normalize scores and filter low confidence emotions
-    min_confidence = 0.1  # Minimum confidence threshold
-    filtered_categories = {}
-    
-    for category, score in category_scores.items():
-        if score > min_confidence:
-            # Normalize the score
-            normalized_score = score / len(category_emotions[category]) if category_emotions[category] else score
-            filtered_categories[category] = normalized_score
-    
-    # Sort categories by score
-    sorted_categories = sorted(
-        [(category, score) for category, score in filtered_categories.items()],
-        key=lambda x: x[1],
-        reverse=True
+model_batches = REGISTRY.counter('model_batches_total', 'Forward passes run by the emotion model')
+model_texts = REGISTRY.counter('model_texts_total', 'Texts (or long-entry windows) scored by the emotion model')
+
+# The SamLowe emotion model is built lazily (or warmed in the background once
+# the app starts serving) so importing this module stays cheap.
+model_name = app.config['EMOTION_MODEL_NAME']
+if app.config['INFERENCE_SOCKET']:
+    # A shared inference sidecar (inference_server.py) owns the model
+    emotion_model = InferenceClient(
+        app.config['INFERENCE_SOCKET'],
+        pool_size=app.config['INFERENCE_POOL_SIZE'],
+        timeout=app.config['INFERENCE_TIMEOUT_SECONDS']
     )
-    
-    # Format the response
-    grouped_emotions = {
-        'primary_category': sorted_categories[0][0] if sorted_categories else 'Neutral 😐',
-        'categories': [
-            {
-                'name': category,
-                'score': round(score * 100, 2),
-                'emotions': sorted(category_emotions[category], key=lambda x: x['score'], reverse=True)
-            }
-            for category, score in sorted_categories
-        ]
-    }
-    
-    return grouped_emotions
+else:
+    emotion_model = EmotionModel(
+        model_name,
+        backend=app.config['INFERENCE_BACKEND'],
+        num_threads=app.config['INFERENCE_THREADS']
+    )
+
+def analyze_emotion_batch(texts):
+    """Run one padded forward pass over a batch of texts"""
+    model_batches.inc()
+    model_texts.inc(amount=len(texts))
+    with span('inference', 'forward'):
+        return emotion_model.predict(texts)
+
+# Concurrent /api/analyze-mood requests share forward passes through this
+# batcher. With INFERENCE_SOCKET set it is bypassed; the sidecar batches.
+emotion_batcher = MicroBatcher(
+    analyze_emotion_batch,
+    max_batch_size=app.config['INFERENCE_MAX_BATCH_SIZE'],
+    max_wait_ms=app.config['INFERENCE_MAX_WAIT_MS'],
+    name='emotion-batcher'
+)
+
+def split_for_model(text):
+    """Windows the model should score for one text.
+
+    Entries longer than the model's window are split into sentence-aligned
+    windows whose scores are later merged weighted by window length.
+    """
+    max_tokens = app.config['LONG_ENTRY_WINDOW_TOKENS']
+    if not app.config['LONG_ENTRY_MODE'] or fits_without_tokenizing(text, max_tokens):
+        return [Window(text, 1)]
+
+    windows = split_into_windows(text, emotion_model.token_offsets(text), max_tokens)
+    if len(windows) <= 1:
+        return [Window(text, 1)]
+    logger.info(f"Scoring long entry as {len(windows)} windows")
+    return windows
+
+def infer_emotions_many(texts):
+    """Per-label model scores for several texts.
+
+    Every window of every text is submitted to the batcher before waiting on
+    any of them, so they are scored together in as few batches as possible.
+    With a sidecar, all windows go out in one call instead: the sidecar
+    batches across workers, and the local batcher's single thread would
+    only serialize this worker's calls and add a second wait.
+    """
+    plans = [split_for_model(text) for text in texts]
+    if app.config['INFERENCE_SOCKET']:
+        scored = iter(analyze_emotion_batch([window.text for windows in plans for window in windows]))
+        window_results = [[next(scored) for _ in windows] for windows in plans]
+    else:
+        timeout = app.config['INFERENCE_TIMEOUT_SECONDS']
+        pending = [[emotion_batcher.submit(window.text) for window in windows] for windows in plans]
+        window_results = [[future.result(timeout=timeout) for future in futures] for futures in pending]
+
+    return [
+        combine_window_scores(results, [window.tokens for window in windows])
+        for windows, results in zip(plans, window_results)
+    ]
+
+def infer_emotions(text):
+    """Per-label model scores for one text"""
+    return infer_emotions_many([text])[0]
+
+def run_analysis(text):
+    """``MoodResult`` for one text, served from the cache when possible"""
+    with span('analysis', 'cache_lookup'):
+        cached_result = analysis_cache.get(text)
+    if cached_result is not None:
+        logger.debug("Serving cached analysis result")
+        return cached_result
+
+    # Score every pattern-based detector in a single pass over the text
+    with span('analysis', 'lexicon'):
+        lexicon_scores = score_text(text)
+
+    # Get emotion analysis from the model
+    with span('analysis', 'model'):
+        results = infer_emotions(text)
+
+    # Group emotions into categories and apply the lexicon overrides
+    with span('analysis', 'group_emotions'):
+        result = build_mood_results([results], [lexicon_scores], emotion_model.matrix)[0]
+
+    logger.debug("Analyzed text", extra={'text_length': len(text)})
+    if app.config['LOG_PAYLOADS']:
+        logger.info("Analysis payload", extra={
+            'lexicon_scores': lexicon_scores._asdict(),
+            'model_results': results,
+            'response': result.render('full')
+        })
+    with span('analysis', 'cache_store'):
+        analysis_cache.set(text, result)
+    return result
+
+def analyze_mood_data(text):
+    """The mood stored on a journal entry, which needs no category tree"""
+    return run_analysis(text).render('minimal')
+
+def requested_detail():
+    """The ``?detail=`` level of an analysis request, or None if it is not one of ``DETAIL_LEVELS``"""
+    detail = request.args.get('detail', app.config['ANALYSIS_DEFAULT_DETAIL'])
+    return detail if detail in DETAIL_LEVELS else None
+
+# Bump whenever response building, the cache key or the cached MoodResult format changes
+# (lexicon tables carry their own LEXICON_VERSION), so cached analyses from
+# the old rules are no longer served.
+ANALYSIS_RULES_VERSION = '4'
+
+if app.config['ANALYSIS_DEFAULT_DETAIL'] not in DETAIL_LEVELS:
+    raise ValueError(f"ANALYSIS_DEFAULT_DETAIL must be one of {', '.join(DETAIL_LEVELS)}")
+
+# Keyed by the user's data version, so a write is visible on the next request
+analytics_cache = LRUCache(
+    maxsize=app.config['ANALYTICS_CACHE_SIZE'],
+    ttl_seconds=app.config['ANALYTICS_CACHE_TTL_SECONDS']
+)
+
+export_cache = ExportCache(
+    app.config['EXPORT_CACHE_DIR'],
+    ttl_seconds=app.config['EXPORT_CACHE_TTL_SECONDS']
+) if app.config['EXPORT_CACHE_DIR'] else None
+
+analysis_cache = AnalysisCache(
+    model_name,
+    f'{LEXICON_VERSION}.{ANALYSIS_RULES_VERSION}',
+    maxsize=app.config['ANALYSIS_CACHE_SIZE'],
+    ttl_seconds=app.config['ANALYSIS_CACHE_TTL_SECONDS'],
+    mongo_enabled=app.config['ANALYSIS_CACHE_MONGO'],
+    mongo_ttl_seconds=app.config['ANALYSIS_CACHE_MONGO_TTL_SECONDS'],
+    encode=MoodResult.to_document,
+    decode=MoodResult.from_document
+)
+
+def analysis_cache_counts():
+    stats = analysis_cache.stats()
+    counts = {('local', result): stats['local'][result] for result in ('hits', 'misses')}
+    if stats['shared'] is not None:
+        counts.update({('shared', result): stats['shared'][result] for result in ('hits', 'misses')})
+    return counts
+
+# Read from the components that already track them, at scrape time
+REGISTRY.collected(
+    'analysis_cache_lookups_total', 'Analysis cache lookups by tier and result',
+    analysis_cache_counts, kind='counter', labelnames=('tier', 'result')
+)
+REGISTRY.collected(
+    'analysis_cache_evictions_total', 'Entries evicted from the in-process analysis cache',
+    lambda: analysis_cache.local.stats()['evictions'], kind='counter'
+)
+REGISTRY.collected(
+    'model_batch_errors_total', 'Emotion model batches that raised',
+    lambda: emotion_batcher.stats()['total_errors'], kind='counter'
+)
+REGISTRY.collected('inference_queue_depth', 'Texts waiting for the emotion model batcher', emotion_batcher.pending)
+REGISTRY.collected('log_queue_depth', 'Log records waiting to be written', lambda: logging_stats()['queued'])
+REGISTRY.collected(
+    'log_records_dropped_total', 'Log records dropped because the log queue was full',
+    lambda: logging_stats()['dropped'], kind='counter'
+)
 
 @app.route('/api/auth/register', methods=['POST'])
 def register():
@@ -453,19 +273,10 @@ def login():
 @app.route('/api/journal', methods=['POST'])
 @jwt_required()
 def create_journal_entry():    
-    print("\n=== Starting journal entry creation ===")
-    print("\nRequest Details:")
-    print(f"Method: {request.method}")
-    print(f"URL: {request.url}")
-    print(f"Headers: {dict(request.headers)}")
-    print(f"Content-Type: {request.content_type}")
-    
     try:
         current_user_id = get_jwt_identity()
-        print(f"\nUser ID from token: {current_user_id}")
         
         if not current_user_id:
-            print("Error: Invalid or expired token")
             return jsonify({
                 'success': False, 
                 'error': 'Invalid or expired token',
@@ -473,9 +284,10 @@ def create_journal_entry():
             }), 401
         
         # Verify user exists in database
-        user = User.objects(id=current_user_id).first()
+        with span('journal_create', 'user_lookup'):
+            user = User.objects(id=current_user_id).first()
         if not user:
-            print(f"Error: User {current_user_id} not found in database")
+            logger.warning("Journal entry for unknown user", extra={'user_id': current_user_id})
             return jsonify({
                 'success': False,
                 'error': 'User not found',
@@ -484,9 +296,8 @@ def create_journal_entry():
         
         try:
             data = request.get_json()
-            print("\nReceived data:", data)
         except Exception as e:
-            print(f"\nError parsing JSON: {str(e)}")
+            logger.warning(f"Invalid journal entry JSON: {str(e)}")
             return jsonify({
                 'success': False,
                 'error': 'Invalid JSON data',
@@ -495,7 +306,6 @@ def create_journal_entry():
             }), 400
         
         if not data:
-            print("Error: Empty request data")
             return jsonify({
                 'success': False,
                 'error': 'Empty request data',
@@ -503,7 +313,6 @@ def create_journal_entry():
             }), 400
         
         if 'content' not in data:
-            print("Error: Missing content field")
             return jsonify({
                 'success': False, 
                 'error': 'Content is required',
@@ -512,11 +321,10 @@ def create_journal_entry():
             }), 422
             
         content = str(data.get('content', '')).strip()
-        print(f"\nContent length: {len(content)}")
-        print(f"Content: {content}")
+        if app.config['LOG_PAYLOADS']:
+            logger.info("Journal entry payload", extra={'content': content, 'mood': data.get('mood')})
         
         if not content:
-            print("Error: Empty content")
             return jsonify({
                 'success': False, 
                 'error': 'Content cannot be empty',
@@ -533,32 +341,48 @@ def create_journal_entry():
             # Handle mood data if provided
             mood_data = data.get('mood')
             if mood_data:
-                print("\nProcessing mood data:", mood_data)
                 try:
                     entry.set_mood(mood_data)
                 except ValueError as ve:
-                    print(f"Mood validation error: {str(ve)}")
                     return jsonify({
                         'success': False,
                         'error': str(ve),
                         'validation_stage': 'mood_validation'
                     }), 422
+            elif app.config['ASYNC_MOOD_ANALYSIS']:
+                # Analyze in the background instead of on the save path
+                entry.mood_status = 'pending'
             
             # Save the entry
-            print("\nSaving entry to database...")
-            entry.save()
-            print("Entry saved successfully")
+            with span('journal_create', 'save'):
+                entry.save()
+            
+            with span('journal_create', 'rollup'):
+                record_entry(entry)
+            if entry.mood_status == 'pending':
+                with span('journal_create', 'enqueue_analysis'):
+                    try:
+                        enqueue_analysis(entry)
+                    except Exception as e:
+                        # The entry is stored; without a job it would stay pending forever
+                        logger.error(f"Failed to queue mood analysis for entry {entry.id}: {str(e)}")
+                        try:
+                            entry.update(set__mood_status='failed', set__updated_at=datetime.utcnow())
+                        except Exception as update_error:
+                            logger.error(f"Failed to mark entry {entry.id} as failed: {str(update_error)}")
             
             # Verify the save was successful
-            saved_entry = JournalEntry.objects(id=entry.id).first()
+            with span('journal_create', 'read_back'):
+                saved_entry = JournalEntry.objects(id=entry.id).first()
             if not saved_entry:
                 raise Exception("Entry was not saved properly")
             
             saved_mood = saved_entry.get_mood()
-            print("\nSaved entry details:")
-            print(f"ID: {saved_entry.id}")
-            print(f"Content: {saved_entry.content}")
-            print(f"Mood: {saved_mood}")
+            logger.info("Journal entry saved", extra={
+                'entry_id': str(saved_entry.id),
+                'content_length': len(content),
+                'mood_status': saved_entry.mood_status
+            })
             
             return jsonify({
                 'success': True,
@@ -566,17 +390,13 @@ def create_journal_entry():
                     'id': str(saved_entry.id),
                     'content': saved_entry.content,
                     'mood': saved_mood,
-                    'created_at': saved_entry.created_at.isoformat()
+                    'mood_status': saved_entry.mood_status,
+                    'created_at': utc_isoformat(saved_entry.created_at)
                 }
             }), 201
             
         except Exception as e:
-            print("\nError saving entry:")
-            print(f"Error type: {type(e).__name__}")
-            print(f"Error message: {str(e)}")
-            import traceback
-            print("Traceback:")
-            traceback.print_exc()
+            logger.exception("Failed to save journal entry")
             return jsonify({
                 'success': False,
                 'error': 'Failed to save journal entry',
@@ -586,12 +406,7 @@ def create_journal_entry():
             }), 500
             
     except Exception as e:
-        print("\nUnexpected error:")
-        print(f"Error type: {type(e).__name__}")
-        print(f"Error message: {str(e)}")
-        import traceback
-        print("Traceback:")
-        traceback.print_exc()
+        logger.exception("Unexpected error creating journal entry")
         return jsonify({
             'success': False,
             'error': 'An unexpected error occurred',
@@ -600,6 +415,92 @@ def create_journal_entry():
             'validation_stage': 'unexpected'
         }), 500
 
+def analyze_import_entries(entries):
+    """Fill in the mood of imported entries in model-sized batches"""
+    chunk_size = app.config['ANALYZE_BATCH_CHUNK_SIZE']
+    for start in range(0, len(entries), chunk_size):
+        chunk = entries[start:start + chunk_size]
+        lines = analyze_batch_chunk([(index, entry.content) for index, entry in enumerate(chunk)], detail='minimal')
+        for entry, line in zip(chunk, lines):
+            try:
+                if 'error' in line:
+                    raise ValueError(line.get('details', line['error']))
+                entry.set_mood(line['result'])
+                entry.mood_status = 'done'
+            except ValueError as ve:
+                logger.error(f"Mood analysis of an imported entry failed: {str(ve)}")
+                entry.mood_status = 'failed'
+
+@app.route('/api/journal/import', methods=['POST'])
+@jwt_required()
+def import_journal_entries():
+    """Import many entries at once, keeping their original timestamps"""
+    current_user_id = get_jwt_identity()
+    user = User.objects(id=current_user_id).only('id').first()
+    if not user:
+        return jsonify({
+            'success': False,
+            'error': 'User not found',
+            'validation_stage': 'user_verification'
+        }), 404
+
+    data = request.get_json(silent=True)
+    rows = data.get('entries') if isinstance(data, dict) else None
+    if not isinstance(rows, list) or not rows:
+        return jsonify({
+            'success': False,
+            'error': 'entries must be a non-empty array',
+            'validation_stage': 'data_validation'
+        }), 400
+
+    max_entries = app.config['JOURNAL_IMPORT_MAX_ENTRIES']
+    if len(rows) > max_entries:
+        return jsonify({
+            'success': False,
+            'error': f'At most {max_entries} entries can be imported per request',
+            'validation_stage': 'data_validation'
+        }), 413
+
+    results = [None] * len(rows)
+    entries = []
+    positions = []
+    for index, row in enumerate(rows):
+        try:
+            entries.append(build_entry(row, user))
+            positions.append(index)
+        except ImportRowError as e:
+            results[index] = {'index': index, 'error': str(e), 'validation_stage': e.stage}
+
+    if data.get('analyze'):
+        analyze_import_entries([entry for entry in entries if not entry.mood_data])
+
+    try:
+        outcomes = insert_entries(entries, app.config['JOURNAL_IMPORT_CHUNK_SIZE'])
+    except Exception as e:
+        logger.error(f"Journal import failed: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to import journal entries',
+            'details': str(e),
+            'validation_stage': 'database_save'
+        }), 500
+
+    for index, entry, (entry_id, error) in zip(positions, entries, outcomes):
+        if error:
+            results[index] = {'index': index, 'error': error, 'validation_stage': 'database_save'}
+        else:
+            results[index] = {'index': index, 'id': str(entry_id), 'mood_status': entry.mood_status}
+    record_entries([entry for entry, (entry_id, _) in zip(entries, outcomes) if entry_id is not None])
+
+    imported = sum(1 for result in results if 'id' in result)
+    logger.info(f"Imported {imported} of {len(rows)} journal entries for user {current_user_id}")
+    return api_response({
+        'success': True,
+        'imported': imported,
+        'failed': len(rows) - imported,
+        'results': results
+    }, 200)
+
 @app.route('/api/journal', methods=['GET'])
 @jwt_required()
 def get_journal_entries():
@@ -612,35 +513,63 @@ def get_journal_entries():
                 'details': 'Authentication required'
             }), 401
 
-        print(f"Fetching entries for user {current_user_id}")
+        # Answer revalidations from the indexes alone, before loading entries
+        with span('journal_list', 'validator'):
+            validator = journal_validator(current_user_id)
+        # JSON and MessagePack bodies must not share a tag
+        etag = make_etag(validator, request.full_path, negotiated_mimetype())
+        if is_not_modified(request, etag, validator):
+            return not_modified(etag, validator)
+        
+        # Without limit/cursor the full history is returned, as before
+        paginated = 'limit' in request.args or 'cursor' in request.args
+        if paginated:
+            try:
+                limit, position = parse_page_args(
+                    request.args, app.config['PAGE_DEFAULT_LIMIT'], app.config['PAGE_MAX_LIMIT']
+                )
+            except ValueError as ve:
+                return jsonify({
+                    'success': False,
+                    'error': str(ve)
+                }), 400
         
         try:
-            entries = JournalEntry.objects(user_id=current_user_id).order_by('-created_at')
-            print(f"Found {len(entries)} entries")
+            with span('journal_list', 'fetch'):
+                entries = JournalEntry.objects(user_id=current_user_id)
+                if paginated:
+                    entries, next_cursor = paginate(entries, position, limit)
+                else:
+                    entries = entries.order_by('-created_at', '-id')
             
-            response_entries = []
-            for entry in entries:
-                try:
-                    mood_data = entry.get_mood()
-                    entry_data = {
-                        'id': str(entry.id),
-                        'content': entry.content,
-                        'created_at': entry.created_at.isoformat(),
-                        'mood': mood_data
-                    }
-                    response_entries.append(entry_data)
-                except Exception as entry_error:
-                    print(f"Error processing entry {entry.id}: {str(entry_error)}")
-                    # Skip problematic entries but continue processing others
-                    continue
+                response_entries = []
+                for entry in entries:
+                    try:
+                        mood_data = entry.get_mood()
+                        entry_data = {
+                            'id': str(entry.id),
+                            'content': entry.content,
+                            'created_at': utc_isoformat(entry.created_at),
+                            'mood': mood_data,
+                            'mood_status': entry.mood_status
+                        }
+                        response_entries.append(entry_data)
+                    except Exception as entry_error:
+                        logger.error(f"Error processing entry {entry.id}: {str(entry_error)}")
+                        # Skip problematic entries but continue processing others
+                        continue
             
-            return jsonify({
+            response = {
                 'success': True,
                 'entries': response_entries
-            }), 200
+            }
+            if paginated:
+                response['next_cursor'] = next_cursor
+            with span('journal_list', 'encode'):
+                return add_validators(api_response(response, 200), etag, validator)
             
         except Exception as db_error:
-            print(f"Database error: {str(db_error)}")
+            logger.error(f"Database error fetching journal entries: {str(db_error)}")
             return jsonify({
                 'success': False,
                 'error': 'Failed to fetch entries from database',
@@ -648,17 +577,88 @@ def get_journal_entries():
             }), 500
             
     except Exception as e:
-        print(f"Unexpected error in get_journal_entries: {str(e)}")
+        logger.exception("Unexpected error in get_journal_entries")
         return jsonify({
             'success': False,
             'error': 'An unexpected error occurred',
             'details': str(e)
         }), 500
 
+@app.after_request
+def compress_body(response):
+    if app.config['RESPONSE_COMPRESSION']:
+        return compress_response(
+            response,
+            app.config['COMPRESS_MIN_BYTES'],
+            gzip_level=app.config['COMPRESS_GZIP_LEVEL'],
+            brotli_quality=app.config['COMPRESS_BROTLI_QUALITY']
+        )
+    return response
+
+@app.before_first_request
+def start_model_warmup():
+    if app.config['EMOTION_MODEL_WARMUP']:
+        emotion_model.start_warmup()
+
+@app.before_first_request
+def start_analysis_workers():
+    if app.config['ASYNC_MOOD_ANALYSIS'] and app.config['ANALYSIS_WORKERS']:
+        start_workers(
+            analyze_mood_data,
+            app.config['ANALYSIS_WORKERS'],
+            poll_interval=app.config['ANALYSIS_POLL_INTERVAL_SECONDS'],
+            ttl_seconds=app.config['ANALYSIS_JOB_TTL_SECONDS']
+        )
+
+@app.route('/api/journal/<entry_id>/mood', methods=['GET'])
+@jwt_required()
+def get_journal_entry_mood(entry_id):
+    """Poll the mood of an entry whose analysis runs in the background"""
+    try:
+        current_user_id = get_jwt_identity()
+        entry = JournalEntry.objects(id=entry_id, user_id=current_user_id).only('mood_data', 'mood_status').first()
+        if not entry:
+            return jsonify({
+                'success': False,
+                'error': 'Journal entry not found'
+            }), 404
+
+        return jsonify({
+            'success': True,
+            'entry_id': entry_id,
+            'mood_status': entry.mood_status,
+            'mood': entry.get_mood()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy", "message": "API is running"})
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness (as opposed to liveness): model warm and database reachable"""
+    database = {'connected': False, 'latency_ms': None, 'error': None}
+    started = time.perf_counter()
+    try:
+        get_db().command('ping')
+        database['connected'] = True
+        database['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    except Exception as e:
+        database['error'] = str(e)
+
+    model_status = emotion_model.status()
+    ready = model_status['ready'] and database['connected']
+    return jsonify({
+        'ready': ready,
+        'model': model_status,
+        'database': database
+    }), 200 if ready else 503
+
 @app.route('/', methods=['GET'])
 def root():
     return jsonify({"message": "Welcome to the Flask API!"})
@@ -675,250 +675,64 @@ def get_mood_history(user_id):
         current_user_id = get_jwt_identity()
         if current_user_id != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
+        
+        validator = journal_validator(user_id)
+        etag = make_etag(validator, request.full_path, negotiated_mimetype())
+        if is_not_modified(request, etag, validator):
+            return not_modified(etag, validator)
             
-        entries = JournalEntry.objects(user_id=user_id).order_by('-created_at')
-        history = [{'created_at': entry.created_at.isoformat()} for entry in entries]
-        return jsonify(history)
+        entries = JournalEntry.objects(user_id=user_id).order_by('-created_at').only('created_at')
+        history = [{'created_at': utc_isoformat(entry.created_at)} for entry in entries]
+        return add_validators(api_response(history), etag, validator)
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-def detect_motivation(text):
-    """Directly detect motivation using pattern matching"""
-    # Convert to lowercase for matching
-    text_lower = text.lower()
-    
-    # Define motivation patterns with weighted scores
-    motivation_patterns = [
-        # Direct motivation words (weight: 0.4)
-        (r'\b(motivated|motivation|inspire|inspired|inspiration|determined|determination)\b', 0.4),
-        (r'\b(driven|ambitious|passionate|focused|dedicated|committed)\b', 0.4),
-        
-        # Action-oriented phrases (weight: 0.3)
-        (r'\b(going to|plan to|aim to|striving to|working to|trying to)\b', 0.3),
-        (r'\b(achieve|accomplish|reach|attain|succeed|succeeding)\b', 0.3),
-        
-        # Goal-related terms (weight: 0.3)
-        (r'\b(goal|target|objective|mission|purpose|vision)\b', 0.3),
-        (r'\b(dream|aspiration|ambition|drive|push|progress)\b', 0.3),
-        
-        # Growth and improvement (weight: 0.2)
-        (r'\b(improve|grow|develop|progress|advance|better)\b', 0.2),
-        (r'\b(learning|growing|developing|improving|advancing)\b', 0.2),
-        
-        # Positive mindset (weight: 0.2)
-        (r'\b(never give up|keep going|push through|stay strong)\b', 0.2),
-        (r'\b(believe|confidence|strength|courage|power)\b', 0.2)
-    ]
-    
-    import re
-    
-    # Check each pattern and calculate motivation score with weighted matches
-    motivation_score = 0
-    for pattern, weight in motivation_patterns:
-        matches = re.findall(pattern, text_lower)
-        if matches:
-            motivation_score += len(matches) * weight
-    
-    # Boost the score if multiple motivation indicators are present
-    if motivation_score > 0:
-        motivation_score *= 1.5
-    
-    return motivation_score
-
-def detect_love(text):
-    """Directly detect love and relationship-related emotions"""
-    # Convert to lowercase for matching
-    text_lower = text.lower()
-    
-    # Define love and relationship patterns
-    love_patterns = [
-        # Relationship words
-        r'\b(relationship|love|romance|dating|partner|boyfriend|girlfriend|spouse|husband|wife)\b',
-        r'\b(couple|marriage|wedding|engagement|proposal|anniversary)\b',
-        r'\b(crush|infatuation|attraction|chemistry|connection|bond)\b',
-        
-        # Love feelings
-        r'\b(love|adore|cherish|care|date|affection|fondness|tenderness)\b',
-        r'\b(passion|desire|longing|yearning|devotion|commitment)\b',
-        r'\b(heart|soul|feelings|emotions|sentiment|attachment)\b',
-        
-        # Relationship actions
-        r'\b(together|dating|seeing|meeting|talking|chatting|connecting)\b',
-        r'\b(share|care|support|trust|understand|respect|appreciate)\b',
-        r'\b(kiss|hug|hold|touch|embrace|caress|comfort)\b',
-        
-        # Relationship states
-        r'\b(single|taken|committed|exclusive|serious|casual|complicated)\b',
-        r'\b(breakup|divorce|separation|reconciliation|reunion)\b',
-        
-        # Love expressions
-        r'\b(miss you|love you|care about|think about|dream about)\b',
-        r'\b(special|important|meaningful|precious|valuable)\b',
-        r'\b(forever|always|never|forever|eternal|endless)\b'
-    ]
-    
-    import re
-    
-    # Check each pattern and calculate love score
-    love_score = 0
-    for pattern in love_patterns:
-        matches = re.findall(pattern, text_lower)
-        if matches:
-            love_score += len(matches) * 0.2
-    
-    return love_score
-
-def detect_heartbreak(text):
-    """Directly detect heartbreak and emotional pain related emotions"""
-    # Convert to lowercase for matching
-    text_lower = text.lower()
-    
-    # Define heartbreak patterns with increased weight for direct heartbreak terms
-    heartbreak_patterns = [
-        # Direct heartbreak words (weight: 0.4)
-        (r'\b(heartbreak|heartbroken|heartbreaking|broken heart|heart ache|emotional pain)\b', 0.4),
-        (r'\b(heart hurts|heart aching|heart pain|heart sore)\b', 0.4),
-        
-        # Breakup related (weight: 0.3)
-        (r'\b(breakup|break up|broke up|breaking up|broken up)\b', 0.3),
-        (r'\b(separated|divorced|split|parted|ended)\b', 0.3),
-        
-        # Emotional pain (weight: 0.2)
-        (r'\b(hurt|pain|ache|suffer|cry|tears|weep)\b', 0.2),
-        (r'\b(miss|longing|yearning|empty|void|alone)\b', 0.2),
-        
-        # Rejection (weight: 0.3)
-        (r'\b(rejected|dumped|left|abandoned|betrayed)\b', 0.3),
-        (r'\b(unwanted|unloved|unappreciated|taken for granted)\b', 0.3),
-        
-        # Healing (weight: 0.2)
-        (r'\b(moving on|getting over|healing|recovering|letting go)\b', 0.2),
-        (r'\b(accept|forgive|forget|move forward|start over)\b', 0.2)
-    ]
-    
-    import re
-    
-    # Check each pattern and calculate heartbreak score with weighted matches
-    heartbreak_score = 0
-    for pattern, weight in heartbreak_patterns:
-        matches = re.findall(pattern, text_lower)
-        if matches:
-            heartbreak_score += len(matches) * weight
-    
-    # Boost the score if multiple heartbreak indicators are present
-    if heartbreak_score > 0:
-        heartbreak_score *= 1.5
-    
-    return heartbreak_score
+@app.route('/api/mood-analytics', methods=['GET'])
+@jwt_required()
+def get_mood_analytics():
+    """Per-day and per-week mood buckets, distribution and trend for the dashboard"""
+    current_user_id = get_jwt_identity()
+    try:
+        days = int(request.args.get('days', app.config['ANALYTICS_DEFAULT_DAYS']))
+    except ValueError:
+        days = 0
+    if not 1 <= days <= app.config['ANALYTICS_MAX_DAYS']:
+        return jsonify({
+            'success': False,
+            'error': f"days must be an integer between 1 and {app.config['ANALYTICS_MAX_DAYS']}"
+        }), 400
+    timezone_name = request.args.get('tz', 'UTC')
 
-def detect_calm(text):
-    """Directly detect calm and relaxed states"""
-    # Convert to lowercase for matching
-    text_lower = text.lower()
-    
-    # Define calm patterns with weighted scores
-    calm_patterns = [
-        # Direct calm words (weight: 0.4)
-        (r'\b(calm|relaxed|peaceful|serene|tranquil|zen)\b', 0.4),
-        (r'\b(peace|quiet|still|gentle|soft|mellow)\b', 0.4),
-        
-        # Relaxation activities (weight: 0.3)
-        (r'\b(meditate|meditation|yoga|breathing|breath|mindful)\b', 0.3),
-        (r'\b(rest|resting|relax|relaxing|unwind|unwinding)\b', 0.3),
-        
-        # Nature-related calm (weight: 0.3)
-        (r'\b(nature|forest|ocean|waves|breeze|wind)\b', 0.3),
-        (r'\b(sunset|sunrise|stars|moon|night|dawn)\b', 0.3),
-        
-        # Physical relaxation (weight: 0.2)
-        (r'\b(sleep|sleeping|nap|napping|rest|resting)\b', 0.2),
-        (r'\b(comfort|comfortable|cozy|warm|soft|gentle)\b', 0.2),
-        
-        # Mental state (weight: 0.3)
-        (r'\b(clear|clear mind|focused|centered|balanced)\b', 0.3),
-        (r'\b(relief|relieved|ease|eased|soothe|soothed)\b', 0.3),
-        
-        # Time-related calm (weight: 0.2)
-        (r'\b(morning|evening|night|dawn|dusk|twilight)\b', 0.2),
-        (r'\b(weekend|holiday|vacation|break|pause|moment)\b', 0.2)
-    ]
-    
-    import re
-    
-    # Check each pattern and calculate calm score with weighted matches
-    calm_score = 0
-    for pattern, weight in calm_patterns:
-        matches = re.findall(pattern, text_lower)
-        if matches:
-            calm_score += len(matches) * weight
-    
-    # Boost the score if multiple calm indicators are present
-    if calm_score > 0:
-        calm_score *= 1.5
-    
-    return calm_score
+    try:
+        if uses_rollups(timezone_name):
+            # O(days) read of the daily rollups; cheaper than the cache's version check
+            analytics = rollup_analytics(current_user_id, days)
+        else:
+            key = (current_user_id, days, timezone_name, data_version(current_user_id))
+            analytics = analytics_cache.get(key)
+            if analytics is None:
+                analytics = mood_analytics(current_user_id, days, timezone_name)
+                analytics_cache.set(key, analytics)
+    except ValueError as ve:
+        return jsonify({
+            'success': False,
+            'error': str(ve)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error computing mood analytics: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to compute mood analytics',
+            'details': str(e)
+        }), 500
 
-def detect_low_energy(text):
-    """Directly detect low energy and fatigue-related states"""
-    # Convert to lowercase for matching
-    text_lower = text.lower()
-    
-    # Define low energy patterns with weighted scores
-    low_energy_patterns = [
-        # Direct low energy words (weight: 0.4)
-        (r'\b(tired|exhausted|fatigued|drained|weary|sleepy)\b', 0.4),
-        (r'\b(lethargic|sluggish|low energy|no energy|lack of energy)\b', 0.4),
-        
-        # Feeling low expressions (weight: 0.4)
-        (r'\b(feeling low|feeling down|feeling drained|feeling exhausted)\b', 0.4),
-        (r'\b(feel low|feel down|feel drained|feel exhausted)\b', 0.4),
-        (r'\b(am low|am down|am drained|am exhausted)\b', 0.4),
-        (r'\b(is low|is down|is drained|is exhausted)\b', 0.4),
-        
-        # Burnout related (weight: 0.3)
-        (r'\b(burned out|worn out|spent|depleted|drowsy|groggy)\b', 0.3),
-        (r'\b(listless|apathetic|unmotivated|uninspired|unenergetic)\b', 0.3),
-        
-        # Energy depletion (weight: 0.3)
-        (r'\b(low battery|running on empty|out of steam|out of gas)\b', 0.3),
-        (r'\b(need rest|need sleep|need break|need recharge)\b', 0.3),
-        
-        # Physical exhaustion (weight: 0.2)
-        (r'\b(heavy|weighed down|slow|slowing down|can\'t move)\b', 0.2),
-        (r'\b(weak|weakness|powerless|helpless|overwhelmed)\b', 0.2),
-        
-        # Mental exhaustion (weight: 0.2)
-        (r'\b(mentally tired|brain fog|can\'t think|mind blank)\b', 0.2),
-        (r'\b(overworked|stressed out|pushed too hard|too much)\b', 0.2),
-        
-        # Additional low energy expressions (weight: 0.3)
-        (r'\b(not feeling well|not feeling good|not feeling great)\b', 0.3),
-        (r'\b(not up to it|not up for it|not in the mood)\b', 0.3),
-        (r'\b(no motivation|no drive|no energy|no strength)\b', 0.3),
-        (r'\b(too tired|too exhausted|too drained|too weary)\b', 0.3)
-    ]
-    
-    import re
-    
-    # Check each pattern and calculate low energy score with weighted matches
-    low_energy_score = 0
-    for pattern, weight in low_energy_patterns:
-        matches = re.findall(pattern, text_lower)
-        if matches:
-            low_energy_score += len(matches) * weight
-    
-    # Boost the score if multiple low energy indicators are present
-    if low_energy_score > 0:
-        low_energy_score *= 1.5
-    
-    # Additional boost for "feeling low" and similar phrases
-    if re.search(r'\b(feeling|feel|am|is)\s+low\b', text_lower):
-        low_energy_score += 0.3
-    
-    return low_energy_score
+    return api_response({
+        'success': True,
+        'analytics': analytics
+    }, 200)
 
 @app.route('/api/analyze-mood', methods=['POST'])
 def analyze_mood():
@@ -927,149 +741,18 @@ def analyze_mood():
         if not data or 'text' not in data:
             return jsonify({'error': 'No text provided'}), 400
 
+        detail = requested_detail()
+        if detail is None:
+            return jsonify({'error': f"detail must be one of {', '.join(DETAIL_LEVELS)}"}), 400
+
         text = data.get('text')
-        logger.info(f"Analyzing text: {text}")
+        if app.config['LOG_PAYLOADS']:
+            logger.info("Analyze mood payload", extra={'text': text})
         
         try:
-            # Check for motivation using pattern matching
-            motivation_score = detect_motivation(text)
-            logger.info(f"Motivation score: {motivation_score}")
-            
-            # Check for love using pattern matching
-            love_score = detect_love(text)
-            logger.info(f"Love score: {love_score}")
-            
-            # Check for heartbreak using pattern matching
-            heartbreak_score = detect_heartbreak(text)
-            logger.info(f"Heartbreak score: {heartbreak_score}")
-            
-            # Check for calm using pattern matching
-            calm_score = detect_calm(text)
-            logger.info(f"Calm score: {calm_score}")
-            
-            # Check for low energy using pattern matching
-            low_energy_score = detect_low_energy(text)
-            logger.info(f"Low energy score: {low_energy_score}")
-            
-            # Get emotion analysis from the model
-            results = emotion_analyzer(text)[0]
-            logger.info(f"Model emotion results: {results}")
-            
-            # Group emotions into categories
-            grouped_emotions = group_emotions(results)
-            
-            # If low energy score is high enough, override the primary emotion
-            if low_energy_score > 0.2:
-                grouped_emotions['primary_category'] = 'Low Energy 😴'
-                # Add low energy to the categories if not present
-                if not any(cat['name'] == 'Low Energy 😴' for cat in grouped_emotions['categories']):
-                    grouped_emotions['categories'].append({
-                        'name': 'Low Energy 😴',
-                        'score': round(low_energy_score * 100, 2),
-                        'emotions': [{
-                            'emotion': 'low energy',
-                            'emoji': '😴',
-                            'score': round(low_energy_score * 100, 2)
-                        }]
-                    })
-            
-            # If calm score is high enough, override the primary emotion
-            if calm_score > 0.2:  # Threshold for calm detection
-                grouped_emotions['primary_category'] = 'Calm 😌'
-                # Add calm to the categories if not present
-                if not any(cat['name'] == 'Calm 😌' for cat in grouped_emotions['categories']):
-                    grouped_emotions['categories'].append({
-                        'name': 'Calm 😌',
-                        'score': round(calm_score * 100, 2),
-                        'emotions': [{
-                            'emotion': 'calm',
-                            'emoji': '😌',
-                            'score': round(calm_score * 100, 2)
-                        }]
-                    })
-            
-            # If motivation score is high enough, override the primary emotion
-            if motivation_score > 0.2:
-                grouped_emotions['primary_category'] = 'Motivated 💪'
-                # Add motivation to the categories if not present
-                if not any(cat['name'] == 'Motivated 💪' for cat in grouped_emotions['categories']):
-                    grouped_emotions['categories'].append({
-                        'name': 'Motivated 💪',
-                        'score': round(motivation_score * 100, 2),
-                        'emotions': [{
-                            'emotion': 'motivation',
-                            'emoji': '💪',
-                            'score': round(motivation_score * 100, 2)
-                        }]
-                    })
-            
-            # If heartbreak score is high enough, override the primary emotion
-            if heartbreak_score > 0.2:
-                grouped_emotions['primary_category'] = 'Heartbroken 💔'
-                # Add heartbreak to the categories if not present
-                if not any(cat['name'] == 'Heartbroken 💔' for cat in grouped_emotions['categories']):
-                    grouped_emotions['categories'].append({
-                        'name': 'Heartbroken 💔',
-                        'score': round(heartbreak_score * 100, 2),
-                        'emotions': [{
-                            'emotion': 'heartbreak',
-                            'emoji': '💔',
-                            'score': round(heartbreak_score * 100, 2)
-                        }]
-                    })
-            
-            # If love score is high enough, override the primary emotion
-            if love_score > 0.3:
-                grouped_emotions['primary_category'] = 'Loving 💝'
-                # Add love to the categories if not present
-                if not any(cat['name'] == 'Loving 💝' for cat in grouped_emotions['categories']):
-                    grouped_emotions['categories'].append({
-                        'name': 'Loving 💝',
-                        'score': round(love_score * 100, 2),
-                        'emotions': [{
-                            'emotion': 'love',
-                            'emoji': '💝',
-                            'score': round(love_score * 100, 2)
-                        }]
-                    })
-            
-            # Get the primary emotion (highest score)
-            primary_emotion = max(results, key=lambda x: x['score'])
-            
-            # Format the response with emojis
-            response = {
-                'primary_mood': grouped_emotions['primary_category'],
-                'confidence': round(primary_emotion['score'] * 100, 2),
-                'emotions': [
-                    f"{map_emotion_to_category(emotion['label']).split(' ')[0]} {EMOTION_EMOJIS.get(emotion['label'], '')}"
-                    for emotion in results
-                    if emotion['score'] > 0.1
-                ],
-                'emotion_groups': grouped_emotions
-            }
-            
-            # If low energy was detected, add it to the emotions list
-            if low_energy_score > 0.2:
-                response['emotions'].append(f"low energy 😴")
-            
-            # If calm was detected, add it to the emotions list
-            if calm_score > 0.2:
-                response['emotions'].append(f"calm 😌")
-            
-            # If motivation was detected, add it to the emotions list
-            if motivation_score > 0.2:
-                response['emotions'].append(f"motivation 💪")
-            
-            # If love was detected, add it to the emotions list
-            if love_score > 0.3:
-                response['emotions'].append(f"love 💝")
-            
-            # If heartbreak was detected, add it to the emotions list
-            if heartbreak_score > 0.2:
-                response['emotions'].append(f"heartbreak 💔")
-            
-            logger.info(f"Analysis response: {json.dumps(response, indent=2)}")
-            return jsonify(response)
+            result = run_analysis(text)
+            with span('analysis', 'encode'):
+                return api_response(result.render(detail))
 
         except Exception as analysis_error:
             logger.error(f"Error during analysis: {str(analysis_error)}")
@@ -1085,6 +768,108 @@ def analyze_mood():
             'details': str(e)
         }), 500
 
+def analyze_batch_chunk(chunk, detail='full'):
+    """Analyze one chunk of ``(id, text)`` items for the batch endpoint.
+
+    Returns one line per item, in order, each holding either the same
+    ``result`` /api/analyze-mood would return at ``detail`` or an ``error``.
+    """
+    lines = [None] * len(chunk)
+    pending = []
+    for position, (item_id, text) in enumerate(chunk):
+        if not isinstance(text, str):
+            lines[position] = {'id': item_id, 'error': 'No text provided'}
+            continue
+        cached_result = analysis_cache.get(text)
+        if cached_result is not None:
+            lines[position] = {'id': item_id, 'result': cached_result.render(detail)}
+            continue
+        pending.append((position, item_id, text))
+
+    if not pending:
+        return lines
+
+    texts = [text for _, _, text in pending]
+    try:
+        lexicon_scores = [score_text(text) for text in texts]
+        model_results = infer_emotions_many(texts)
+        # The whole chunk is grouped into categories with one matrix product
+        results = build_mood_results(model_results, lexicon_scores, emotion_model.matrix)
+    except Exception as e:
+        logger.error(f"Error during batch analysis: {str(e)}")
+        for position, item_id, _ in pending:
+            lines[position] = {'id': item_id, 'error': 'Failed to analyze text', 'details': str(e)}
+        return lines
+
+    for (position, item_id, text), result in zip(pending, results):
+        analysis_cache.set(text, result)
+        lines[position] = {'id': item_id, 'result': result.render(detail)}
+
+    return lines
+
+@app.route('/api/analyze-mood/batch', methods=['POST'])
+@jwt_required()
+def analyze_mood_batch():
+    """Analyze many texts, streaming one NDJSON line per item as each chunk finishes"""
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({
+            'success': False,
+            'error': 'items must be a non-empty array'
+        }), 400
+
+    max_items = app.config['ANALYZE_BATCH_MAX_ITEMS']
+    if len(items) > max_items:
+        return jsonify({
+            'success': False,
+            'error': f'At most {max_items} items can be analyzed per request'
+        }), 413
+
+    detail = requested_detail()
+    if detail is None:
+        return jsonify({
+            'success': False,
+            'error': f"detail must be one of {', '.join(DETAIL_LEVELS)}"
+        }), 400
+
+    # Items are either plain strings or {"id": ..., "text": ...}; ids default
+    # to the item's position so every line can be matched to its input
+    normalized = []
+    for index, item in enumerate(items):
+        if isinstance(item, dict):
+            item_id = item.get('id', index)
+            if not isinstance(item_id, (str, int)):
+                item_id = str(item_id)
+            normalized.append((item_id, item.get('text')))
+        else:
+            normalized.append((index, item))
+
+    chunk_size = app.config['ANALYZE_BATCH_CHUNK_SIZE']
+
+    def generate():
+        for start in range(0, len(normalized), chunk_size):
+            lines = analyze_batch_chunk(normalized[start:start + chunk_size], detail)
+            yield ''.join(json.dumps(line) + '\n' for line in lines)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/analyze-mood/stats', methods=['GET'])
+def analyze_mood_stats():
+    return jsonify({
+        'success': True,
+        'batching': emotion_batcher.stats(),
+        'cache': analysis_cache.stats(),
+        'jobs': queue_stats(),
+        'logging': logging_stats()
+    }), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    if not app.config['METRICS_ENABLED']:
+        return jsonify({'success': False, 'error': 'Metrics are disabled'}), 404
+    return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/music-feedback', methods=['POST'])
 @jwt_required()
 def submit_music_feedback():
@@ -1128,6 +913,7 @@ def submit_music_feedback():
             feedback_text=data.get('feedback_text', '')
         )
         feedback.save()
+        record_feedback(feedback)
 
         return jsonify({
             'success': True,
@@ -1136,7 +922,7 @@ def submit_music_feedback():
                 'playlist_id': feedback.playlist_id,
                 'mood_score': feedback.mood_score,
                 'feedback_text': feedback.feedback_text,
-                'created_at': feedback.created_at.isoformat()
+                'created_at': utc_isoformat(feedback.created_at)
             }
         }), 201
 
@@ -1157,8 +943,27 @@ def get_music_feedback():
                 'error': 'Invalid or expired token'
             }), 401
 
-        # Get all feedback entries for the user, ordered by creation date
-        feedback_entries = MusicFeedback.objects(user_id=current_user_id).order_by('-created_at')
+        validator = feedback_validator(current_user_id)
+        etag = make_etag(validator, request.full_path, negotiated_mimetype())
+        if is_not_modified(request, etag, validator):
+            return not_modified(etag, validator)
+
+        # Without limit/cursor the full history is returned, as before
+        paginated = 'limit' in request.args or 'cursor' in request.args
+        feedback_entries = MusicFeedback.objects(user_id=current_user_id)
+        if paginated:
+            try:
+                limit, position = parse_page_args(
+                    request.args, app.config['PAGE_DEFAULT_LIMIT'], app.config['PAGE_MAX_LIMIT']
+                )
+            except ValueError as ve:
+                return jsonify({
+                    'success': False,
+                    'error': str(ve)
+                }), 400
+            feedback_entries, next_cursor = paginate(feedback_entries, position, limit)
+        else:
+            feedback_entries = feedback_entries.order_by('-created_at', '-id')
         
         # Format the response
         feedback_list = [{
@@ -1166,13 +971,16 @@ def get_music_feedback():
             'playlist_id': feedback.playlist_id,
             'mood_score': feedback.mood_score,
             'feedback_text': feedback.feedback_text,
-            'created_at': feedback.created_at.isoformat()
+            'created_at': utc_isoformat(feedback.created_at)
         } for feedback in feedback_entries]
 
-        return jsonify({
+        response = {
             'success': True,
             'feedback': feedback_list
-        }), 200
+        }
+        if paginated:
+            response['next_cursor'] = next_cursor
+        return add_validators(api_response(response, 200), etag, validator)
 
     except Exception as e:
         return jsonify({
@@ -1180,6 +988,12 @@ def get_music_feedback():
             'error': str(e)
         }), 500
 
+def parse_export_range(values):
+    """Optional export date range, e.g. start=2024-01-01&end=2024-02-01 (end exclusive)"""
+    start = parser.isoparse(values['start']) if values.get('start') else None
+    end = parser.isoparse(values['end']) if values.get('end') else None
+    return start, end
+
 @app.route('/api/journal/export', methods=['GET'])
 @jwt_required()
 def export_journal_pdf():
@@ -1191,101 +1005,182 @@ def export_journal_pdf():
                 'error': 'Invalid or expired token'
             }), 401
 
-        # Get user's journal entries
-        entries = JournalEntry.objects(user_id=current_user_id).order_by('-created_at')
-        
-        # Create a BytesIO buffer to store the PDF
-        buffer = BytesIO()
-        
-        # Create the PDF document
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        
-        # Create custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=colors.purple
-        )
-        
-        date_style = ParagraphStyle(
-            'CustomDate',
-            parent=styles['Normal'],
-            fontSize=12,
-            textColor=colors.gray
-        )
-        
-        content_style = ParagraphStyle(
-            'CustomContent',
-            parent=styles['Normal'],
-            fontSize=12,
-            spaceAfter=20
-        )
-        
-        mood_style = ParagraphStyle(
-            'CustomMood',
-            parent=styles['Normal'],
-            fontSize=12,
-            textColor=colors.purple,
-            spaceAfter=10
-        )
-        
-        # Build the PDF content
-        story = []
-        
-        # Add title
-        story.append(Paragraph("Mood Journal Report", title_style))
-        story.append(Spacer(1, 20))
-        
-        # Add entries
-        for entry in entries:
-            # Add date
-            date_str = entry.created_at.strftime("%B %d, %Y at %I:%M %p")
-            story.append(Paragraph(date_str, date_style))
-            story.append(Spacer(1, 10))
-            
-            # Add content
-            story.append(Paragraph(entry.content, content_style))
-            
-            # Add mood information if available
-            mood_data = entry.get_mood()
-            if mood_data:
-                mood_text = f"Mood: {mood_data['primary_mood']} (Confidence: {mood_data['confidence']}%)"
-                story.append(Paragraph(mood_text, mood_style))
-                
-                if mood_data.get('emotions'):
-                    emotions_text = "Detected Emotions: " + ", ".join(mood_data['emotions'])
-                    story.append(Paragraph(emotions_text, mood_style))
-            
-            story.append(Spacer(1, 30))
-        
-        # Build the PDF
-        doc.build(story)
-        
-        # Reset buffer position
-        buffer.seek(0)
-        
+        try:
+            start, end = parse_export_range(request.args)
+        except ValueError as ve:
+            return jsonify({
+                'success': False,
+                'error': 'start and end must be ISO 8601 dates',
+                'details': str(ve)
+            }), 400
+
         # Generate filename with current date
         filename = f"mood-journal-{datetime.now().strftime('%Y-%m-%d')}.pdf"
-        
-        # Return the PDF file
-        return send_file(
-            buffer,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/pdf'
+
+        cache_key = export_cache_key(current_user_id, start, end) if export_cache else None
+        cached_path = export_cache.get(cache_key) if cache_key else None
+        if cached_path:
+            logger.info(f"Serving cached journal export for user {current_user_id}")
+            return send_file(
+                cached_path,
+                as_attachment=True,
+                download_name=filename,
+                mimetype='application/pdf'
+            )
+
+        spool = render_export(current_user_id, start, end, app.config['EXPORT_SPOOL_MAX_BYTES'])
+        if cache_key:
+            try:
+                path = export_cache.put(cache_key, spool)
+            except OSError as e:
+                logger.error(f"Could not cache journal export: {str(e)}")
+                spool.seek(0)
+            else:
+                spool.close()
+                return send_file(
+                    path,
+                    as_attachment=True,
+                    download_name=filename,
+                    mimetype='application/pdf'
+                )
+
+        # Stream the spooled PDF out in chunks
+        return Response(
+            iter_file_chunks(spool),
+            mimetype='application/pdf',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
         
     except Exception as e:
-        print(f"Error generating PDF: {str(e)}")
+        logger.exception("Error generating PDF")
         return jsonify({
             'success': False,
             'error': 'Failed to generate PDF report',
             'details': str(e)
         }), 500
 
+@app.route('/api/journal/export/jobs', methods=['POST'])
+@jwt_required()
+def create_export_job_endpoint():
+    """Start rendering an export in the background"""
+    current_user_id = get_jwt_identity()
+    user = User.objects(id=current_user_id).only('id').first()
+    if not user:
+        return jsonify({
+            'success': False,
+            'error': 'User not found'
+        }), 404
+
+    data = request.get_json(silent=True) or {}
+    try:
+        start, end = parse_export_range(data)
+    except (ValueError, TypeError) as e:
+        return jsonify({
+            'success': False,
+            'error': 'start and end must be ISO 8601 dates',
+            'details': str(e)
+        }), 400
+
+    try:
+        job = create_export_job(user, start, end, app.config['EXPORT_JOB_TTL_SECONDS'])
+        submit_export_job(
+            job,
+            app.config['EXPORT_PROCESSES'],
+            artifact_dir=app.config['EXPORT_ARTIFACT_DIR'],
+            ttl_seconds=app.config['EXPORT_JOB_TTL_SECONDS'],
+            cache_dir=app.config['EXPORT_CACHE_DIR'] or None,
+            cache_ttl_seconds=app.config['EXPORT_CACHE_TTL_SECONDS'],
+            spool_max_bytes=app.config['EXPORT_SPOOL_MAX_BYTES']
+        )
+    except Exception as e:
+        logger.error(f"Could not start export job: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to start export',
+            'details': str(e)
+        }), 500
+
+    return jsonify({
+        'success': True,
+        'job': job_payload(job)
+    }), 202
+
+def find_export_job(job_id):
+    return ExportJob.objects(id=job_id, user_id=get_jwt_identity()).first()
+
+@app.route('/api/journal/export/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_export_job(job_id):
+    try:
+        job = find_export_job(job_id)
+    except ValidationError:
+        job = None
+    if not job:
+        return jsonify({
+            'success': False,
+            'error': 'Export job not found'
+        }), 404
+    return jsonify({
+        'success': True,
+        'job': job_payload(job)
+    }), 200
+
+@app.route('/api/journal/export/jobs/<job_id>/download', methods=['GET'])
+@jwt_required()
+def download_export_job(job_id):
+    try:
+        job = find_export_job(job_id)
+    except ValidationError:
+        job = None
+    if not job:
+        return jsonify({
+            'success': False,
+            'error': 'Export job not found'
+        }), 404
+    if job.status != 'done':
+        return jsonify({
+            'success': False,
+            'error': f'Export is {job.status}',
+            'job': job_payload(job)
+        }), 409
+
+    path = artifact_path(app.config['EXPORT_ARTIFACT_DIR'], str(job.id))
+    if job.expires_at <= datetime.utcnow() or not os.path.exists(path):
+        return jsonify({
+            'success': False,
+            'error': 'Export has expired'
+        }), 410
+
+    filename = f"mood-journal-{job.finished_at.strftime('%Y-%m-%d')}.pdf"
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=filename,
+        mimetype='application/pdf'
+    )
+
+@app.route('/api/profiles', methods=['GET'])
+def list_request_profiles():
+    """Stored request profiles, newest first (requires X-Profile-Token)"""
+    if not has_profile_token(request, app.config['PROFILE_TOKEN']):
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    return jsonify({
+        'success': True,
+        'profiles': list_profiles(app.config['PROFILE_DIR'])
+    }), 200
+
+@app.route('/api/profiles/<name>', methods=['GET'])
+def download_request_profile(name):
+    if not has_profile_token(request, app.config['PROFILE_TOKEN']):
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    path = os.path.join(app.config['PROFILE_DIR'], name)
+    if not is_profile_name(name) or not os.path.isfile(path):
+        return jsonify({
+            'success': False,
+            'error': 'Profile not found'
+        }), 404
+    return send_file(path, as_attachment=True, download_name=name, mimetype='application/octet-stream')
+
 # Error handling middleware
 @app.errorhandler(500)
 def handle_500_error(e):
@@ -1313,7 +1208,7 @@ def handle_401_error(e):
 
 @app.errorhandler(Exception)
 def handle_generic_error(e):
-    print(f"Unhandled error: {str(e)}")
+    logger.exception("Unhandled error")
     return jsonify({
         'success': False,
         'error': 'An unexpected error occurred',
@@ -1322,4 +1217,6 @@ def handle_generic_error(e):
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
+    if app.config['EMOTION_MODEL_WARMUP']:
+        emotion_model.start_warmup()
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,183 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class _PendingItem:
+    __slots__ = ('payload', 'future', 'enqueued_at')
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Gather concurrent single-item calls into batches for one batch function.
+
+    Callers submit one item each and block on their own future. A background
+    worker takes the first waiting item, keeps collecting until either
+    ``max_batch_size`` items are queued or ``max_wait_ms`` has passed since that
+    first item arrived, then runs ``batch_fn`` once over the whole batch and
+    hands every caller its own result.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, max_wait_ms=10, stats_window=2048, name='micro-batcher'):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be at least 1')
+        if max_wait_ms < 0:
+            raise ValueError('max_wait_ms cannot be negative')
+
+        self.batch_fn = batch_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+
+        # Statistics
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._queue_waits = deque(maxlen=stats_window)
+        self._batch_durations = deque(maxlen=stats_window)
+        self._total_batches = 0
+        self._total_items = 0
+        self._total_errors = 0
+        self._max_batch_seen = 0
+
+    def submit(self, payload):
+        """Queue one item and return a future for its result"""
+        self._ensure_worker()
+        item = _PendingItem(payload)
+        self._queue.put(item)
+        return item.future
+
+    def __call__(self, payload, timeout=None):
+        return self.submit(payload).result(timeout=timeout)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _ensure_worker(self):
+        # Restart the worker after a fork (e.g. pre-forking WSGI servers),
+        # where the parent's thread does not exist in the child.
+        pid = os.getpid()
+        if self._worker is not None and self._worker.is_alive() and self._worker_pid == pid:
+            return
+        with self._start_lock:
+            if self._worker is not None and self._worker.is_alive() and self._worker_pid == pid:
+                return
+            if self._worker_pid != pid:
+                self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._worker_pid = pid
+            self._worker.start()
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Past the deadline: only take what is already waiting
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            waits = [started - item.enqueued_at for item in batch]
+
+            try:
+                results = self.batch_fn([item.payload for item in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f'Batch function returned {len(results)} results for {len(batch)} inputs'
+                    )
+            except Exception as e:
+                for item in batch:
+                    item.future.set_exception(e)
+                self._record(batch, waits, started, error=True)
+                continue
+
+            for item, result in zip(batch, results):
+                item.future.set_result(result)
+            self._record(batch, waits, started)
+
+    def _record(self, batch, waits, started, error=False):
+        duration = time.perf_counter() - started
+        with self._stats_lock:
+            self._total_batches += 1
+            self._total_items += len(batch)
+            if error:
+                self._total_errors += 1
+            self._max_batch_seen = max(self._max_batch_seen, len(batch))
+            self._batch_sizes.append(len(batch))
+            self._queue_waits.extend(waits)
+            self._batch_durations.append(duration)
+
+    def stats(self):
+        """Return batch-size and queue-wait statistics over the recent window"""
+        with self._stats_lock:
+            sizes = list(self._batch_sizes)
+            waits = sorted(self._queue_waits)
+            durations = sorted(self._batch_durations)
+            totals = {
+                'total_batches': self._total_batches,
+                'total_items': self._total_items,
+                'total_errors': self._total_errors,
+                'max_batch_size_seen': self._max_batch_seen,
+            }
+
+        histogram = {}
+        for size in sizes:
+            histogram[size] = histogram.get(size, 0) + 1
+
+        return {
+            'config': {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+            },
+            'pending': self.pending(),
+            **totals,
+            'batch_size': {
+                'mean': round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+                'histogram': {str(size): histogram[size] for size in sorted(histogram)},
+            },
+            'queue_wait_ms': _summarize_ms(waits),
+            'batch_duration_ms': _summarize_ms(durations),
+        }
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _summarize_ms(sorted_seconds):
+    if not sorted_seconds:
+        return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    return {
+        'mean': round(sum(sorted_seconds) / len(sorted_seconds) * 1000, 3),
+        'p50': round(_percentile(sorted_seconds, 0.50) * 1000, 3),
+        'p95': round(_percentile(sorted_seconds, 0.95) * 1000, 3),
+        'p99': round(_percentile(sorted_seconds, 0.99) * 1000, 3),
+        'max': round(sorted_seconds[-1] * 1000, 3),
+    }
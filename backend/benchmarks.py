@@ -0,0 +1,243 @@
+"""Microbenchmarks for the mood-analysis hot path.
+
+Times each of these on a synthetic corpus:
+
+- the lexicon detectors;
+- ``map_emotion_to_category``, ``group_emotions`` and ``build_mood_response``,
+  and ``build_mood_responses`` over a whole batch;
+- ``MoodResult.render`` at each detail level;
+- ``JournalEntry.set_mood``;
+- ``/api/analyze-mood`` end to end.
+
+Corpus variants cover short and long texts and phrase-dense and
+phrase-sparse texts. The corpus is generated from a fixed seed and the
+model is ``FakeEmotionModel``, so runs are repeatable and fully offline on
+CPU.
+
+    python benchmarks.py                          # run and print
+    python benchmarks.py --save                   # store as the baseline
+    python benchmarks.py --compare --threshold 0.2
+
+``--compare`` exits with status 1 when any benchmark's best time is more
+than ``threshold`` slower than the baseline. Baselines are only comparable
+on the machine that recorded them.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+FILLER_WORDS = (
+    'today', 'the', 'morning', 'was', 'and', 'then', 'we', 'went', 'to', 'a', 'coffee', 'shop',
+    'after', 'work', 'it', 'rained', 'for', 'while', 'my', 'sister', 'called', 'about', 'dinner',
+    'plans', 'I', 'read', 'some', 'pages', 'of', 'book', 'before', 'bed', 'traffic', 'kitchen',
+    'meeting', 'email', 'weekend', 'train', 'window', 'lunch', 'walked', 'home', 'slowly'
+)
+
+# (name, words per text, share of words replaced by lexicon phrases)
+VARIANTS = (
+    ('short_sparse', 25, 0.02),
+    ('short_dense', 25, 0.3),
+    ('long_sparse', 400, 0.02),
+    ('long_dense', 400, 0.3),
+)
+
+
+def make_text(rng, words, density, phrases):
+    tokens = []
+    for position in range(words):
+        token = rng.choice(phrases) if rng.random() < density else rng.choice(FILLER_WORDS)
+        tokens.append(token.capitalize() if position % 12 == 0 else token)
+        if position % 12 == 11:
+            tokens[-1] += rng.choice(('.', '.', '!', '?'))
+    return ' '.join(tokens) + '.'
+
+
+def make_corpus(seed=1234, texts_per_variant=40):
+    """``{variant: [text, ...]}``, identical for the same seed"""
+    from lexicon import phrases
+
+    rng = random.Random(seed)
+    pool = phrases()
+    return {
+        name: [make_text(rng, words, density, pool) for _ in range(texts_per_variant)]
+        for name, words, density in VARIANTS
+    }
+
+
+def measure(fn, inputs, repeat=5, min_round_seconds=0.05):
+    """Best and median seconds per call of ``fn`` over ``inputs``"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            for value in inputs:
+                fn(value)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_seconds or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    rounds = [elapsed]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            for value in inputs:
+                fn(value)
+        rounds.append(time.perf_counter() - started)
+
+    calls = loops * len(inputs)
+    return min(rounds) / calls, statistics.median(rounds) / calls
+
+
+def _analysis_client(model):
+    """A test client for app.py with ``model`` in place of the emotion model"""
+    # Batches are not held open, nothing touches Mongo and logs stay quiet
+    os.environ.update({
+        'EMOTION_MODEL_WARMUP': 'false',
+        'INFERENCE_SOCKET': '',
+        'INFERENCE_MAX_WAIT_MS': '0',
+        'ANALYSIS_WORKERS': '0',
+        'ANALYSIS_CACHE_MONGO': 'false',
+        'PROFILE_TOKEN': '',
+        'PROFILE_SAMPLE_RATE': '0',
+        'LOG_LEVEL': 'WARNING',
+    })
+    import app as app_module
+
+    app_module.emotion_model = model
+    return app_module, app_module.app.test_client()
+
+
+def build_benchmarks(corpus):
+    """``[(name, fn, inputs), ...]`` over the corpus variants"""
+    from fake_model import GO_EMOTIONS_LABELS, FakeEmotionModel
+    from lexicon import detect_calm, detect_heartbreak, detect_love, detect_low_energy, detect_motivation, score_text
+    from models import JournalEntry
+    from mood_analyzer import (
+        DETAIL_LEVELS, build_mood_response, build_mood_responses, build_mood_results, group_emotions,
+        map_emotion_to_category
+    )
+
+    model = FakeEmotionModel()
+    benchmarks = []
+    for variant, texts in corpus.items():
+        for detector in (detect_motivation, detect_love, detect_heartbreak, detect_calm, detect_low_energy, score_text):
+            benchmarks.append((f'{detector.__name__}[{variant}]', detector, texts))
+
+    mixed = [text for texts in corpus.values() for text in texts]
+    predictions = model.predict(mixed)
+    analyzed = [(result, score_text(text)) for result, text in zip(predictions, mixed)]
+    responses = [build_mood_response(result, scores) for result, scores in analyzed]
+
+    benchmarks.extend([
+        ('map_emotion_to_category', map_emotion_to_category, GO_EMOTIONS_LABELS),
+        ('group_emotions', group_emotions, predictions),
+        ('build_mood_response', lambda pair: build_mood_response(*pair), analyzed),
+        # One analyze-mood/batch chunk of 32 texts per call
+        ('build_mood_responses[32]', lambda chunk: build_mood_responses(*zip(*chunk)), [analyzed[i:i + 32] for i in range(0, len(analyzed), 32)]),
+        ('JournalEntry.set_mood', lambda mood: JournalEntry(content='x').set_mood(mood), responses),
+    ])
+
+    results = build_mood_results(predictions, [scores for _, scores in analyzed])
+    for detail in DETAIL_LEVELS:
+        benchmarks.append((f'MoodResult.render[{detail}]', lambda result, detail=detail: result.render(detail), results))
+
+    app_module, client = _analysis_client(model)
+
+    def analyze(text):
+        # Every call is a cache miss, as for a new journal entry
+        app_module.analysis_cache.local.clear()
+        response = client.post('/api/analyze-mood', json={'text': text})
+        if response.status_code != 200:
+            raise RuntimeError(f'analyze-mood returned {response.status_code}: {response.data[:200]}')
+
+    for variant in ('short_sparse', 'long_dense'):
+        benchmarks.append((f'analyze_mood[{variant}]', analyze, corpus[variant]))
+    return benchmarks
+
+
+def run(name_filter=None, repeat=5, texts_per_variant=40, seed=1234):
+    corpus = make_corpus(seed, texts_per_variant)
+    results = {}
+    for name, fn, inputs in build_benchmarks(corpus):
+        if name_filter and name_filter not in name:
+            continue
+        best, median = measure(fn, inputs, repeat)
+        results[name] = {'best_us': round(best * 1e6, 3), 'median_us': round(median * 1e6, 3)}
+        print(f"{name:<40} {results[name]['best_us']:>12.2f} {results[name]['median_us']:>12.2f}", flush=True)
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """``[(name, baseline_us, current_us, ratio), ...]`` for regressions beyond ``threshold``"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        ratio = result['best_us'] / previous['best_us'] if previous['best_us'] else 1.0
+        marker = ' REGRESSION' if ratio > 1.0 + threshold else ''
+        print(f"{name:<40} {previous['best_us']:>12.2f} {result['best_us']:>12.2f} {ratio - 1.0:>+9.1%}{marker}")
+        if marker:
+            regressions.append((name, previous['best_us'], result['best_us'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the mood-analysis hot path')
+    parser.add_argument('--filter', help='Only benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed rounds per benchmark (the best counts)')
+    parser.add_argument('--texts', type=int, default=40, help='Texts per corpus variant')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--compare', action='store_true', help='Fail on regressions against the baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown, as a fraction (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save first")
+            return 2
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('environment') != environment():
+            print(f"Warning: baseline was recorded on {baseline.get('environment')}")
+
+    print(f"{'benchmark':<40} {'best us':>12} {'median us':>12}")
+    results = run(args.filter, args.repeat, args.texts, args.seed)
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'seed': args.seed, 'texts': args.texts, 'results': results}, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    if baseline is not None:
+        print(f"\n{'benchmark':<40} {'baseline us':>12} {'current us':>12} {'change':>9}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmarks regressed by more than {args.threshold:.0%}")
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Long-entry support: sentence-aligned windows and length-weighted score merging.
+
+The emotion model only sees 512 tokens, so a long journal entry is split into
+windows of whole sentences that each fit under the limit, the windows are
+scored together as one batch, and their per-label scores are averaged
+weighted by window length before ``group_emotions`` runs. Cost then grows
+linearly with entry length and the end of the entry is no longer dropped.
+"""
+import bisect
+import re
+from collections import namedtuple
+
+Window = namedtuple('Window', ['text', 'tokens'])
+
+# Sentence ends (., ! or ? followed by whitespace) and line breaks
+_SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+|\s*\n\s*')
+
+
+def fits_without_tokenizing(text, max_tokens):
+    """True when text cannot exceed ``max_tokens``.
+
+    Byte-level BPE tokenizers (RoBERTa's included) never produce more tokens
+    than the text has UTF-8 bytes, so short entries skip tokenization.
+    """
+    return len(text.encode('utf-8')) <= max_tokens
+
+
+def sentence_spans(text):
+    """Return ``(start, end)`` character spans of the non-empty sentences"""
+    spans = []
+    start = 0
+    for boundary in _SENTENCE_BOUNDARY_RE.finditer(text):
+        if boundary.start() > start:
+            spans.append((start, boundary.start()))
+        start = boundary.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return [(s, e) for s, e in spans if text[s:e].strip()]
+
+
+def split_into_windows(text, token_offsets, max_tokens):
+    """Pack whole sentences into windows of at most ``max_tokens`` tokens.
+
+    ``token_offsets`` are the tokenizer's ``(start, end)`` character offsets
+    for ``text`` without special tokens. A sentence longer than the limit on
+    its own is cut at token boundaries.
+    """
+    token_starts = [start for start, _ in token_offsets]
+
+    def count_tokens(start, end):
+        return bisect.bisect_left(token_starts, end) - bisect.bisect_left(token_starts, start)
+
+    windows = []
+    window_start = window_end = None
+    window_tokens = 0
+
+    def flush():
+        if window_start is not None:
+            windows.append(Window(text[window_start:window_end], window_tokens))
+
+    for start, end in sentence_spans(text):
+        tokens = count_tokens(start, end)
+
+        if tokens > max_tokens:
+            flush()
+            window_start, window_tokens = None, 0
+            # Cut the oversized sentence every max_tokens tokens
+            first = bisect.bisect_left(token_starts, start)
+            last = bisect.bisect_left(token_starts, end)
+            for piece in range(first, last, max_tokens):
+                piece_end = token_starts[piece + max_tokens] if piece + max_tokens < last else end
+                piece_start = max(token_starts[piece], start)
+                windows.append(Window(text[piece_start:piece_end].strip(), min(max_tokens, last - piece)))
+            continue
+
+        if window_start is not None and window_tokens + tokens > max_tokens:
+            flush()
+            window_start, window_tokens = None, 0
+
+        if window_start is None:
+            window_start = start
+        window_end = end
+        window_tokens += tokens
+
+    flush()
+    return [window for window in windows if window.text]
+
+
+def combine_window_scores(window_results, weights):
+    """Length-weighted average of per-label scores across windows.
+
+    ``window_results`` holds one ``[{'label', 'score'}, ...]`` list per window,
+    all in the same label order; the result has the same shape.
+    """
+    if len(window_results) == 1:
+        return window_results[0]
+
+    if not sum(weights):
+        weights = [1] * len(window_results)
+    total = float(sum(weights))
+
+    labels = [item['label'] for item in window_results[0]]
+    sums = [0.0] * len(labels)
+    for result, weight in zip(window_results, weights):
+        for index, item in enumerate(result):
+            sums[index] += item['score'] * weight
+
+    return [{'label': label, 'score': score / total} for label, score in zip(labels, sums)]
@@ -0,0 +1,81 @@
+"""Conditional GET for per-user listings.
+
+A listing's validator is the user's document count and latest write time in
+that collection. Both lookups are answered from the ``user_id`` indexes
+without fetching documents: a COUNT_SCAN and a covered one-key scan. The
+validator yields a weak ETag and a Last-Modified header. A request whose
+``If-None-Match`` or ``If-Modified-Since`` still matches gets a 304 before
+any listing query runs.
+"""
+import hashlib
+from collections import namedtuple
+from datetime import timezone
+
+from bson import ObjectId
+from flask import Response
+
+from models import JournalEntry, MusicFeedback
+
+Validator = namedtuple('Validator', ['count', 'latest'])
+
+
+def _validator(collection, user_id, time_field):
+    user_oid = ObjectId(user_id)
+    latest = collection.find_one(
+        {'user_id': user_oid},
+        {'_id': 0, time_field: 1},
+        sort=[(time_field, -1)]
+    )
+    return Validator(
+        collection.count_documents({'user_id': user_oid}),
+        latest.get(time_field) if latest else None
+    )
+
+
+def journal_validator(user_id):
+    # updated_at is bumped by every write to an entry, including mood fills
+    return _validator(JournalEntry._get_collection(), user_id, 'updated_at')
+
+
+def feedback_validator(user_id):
+    # Feedback is never modified after it is created
+    return _validator(MusicFeedback._get_collection(), user_id, 'created_at')
+
+
+def make_etag(validator, *variant):
+    """Opaque tag for a validator and whatever else shapes the response"""
+    latest = validator.latest.isoformat() if validator.latest else ''
+    source = '\x00'.join([str(validator.count), latest] + [str(part) for part in variant])
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:32]
+
+
+def _utc(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    # HTTP dates have whole-second precision
+    return value.replace(microsecond=0)
+
+
+def is_not_modified(request, etag, validator):
+    """Whether the client's cached copy is still current"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and validator.latest:
+        return _utc(validator.latest) <= _utc(request.if_modified_since)
+    return False
+
+
+def add_validators(response, etag, validator):
+    response.set_etag(etag, weak=True)
+    if validator.latest:
+        response.last_modified = _utc(validator.latest).replace(tzinfo=timezone.utc)
+    # Per-user data: browsers may keep it but must revalidate on every use
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def not_modified(etag, validator):
+    response = add_validators(Response(status=304), etag, validator)
+    # The 200 it stands for varies on Accept (JSON or MessagePack)
+    response.vary.add('Accept')
+    return response
@@ -16,10 +16,116 @@ class Config:
     # MongoDB connection settings
     MONGODB_SETTINGS = {
         'host': f'mongodb://{MONGODB_USERNAME}:{MONGODB_PASSWORD}@{MONGODB_HOST}:{MONGODB_PORT}/{MONGODB_DB}' if MONGODB_USERNAME and MONGODB_PASSWORD else f'mongodb://{MONGODB_HOST}:{MONGODB_PORT}/{MONGODB_DB}',
-        'db': MONGODB_DB
+        'db': MONGODB_DB,
+        'serverSelectionTimeoutMS': int(os.environ.get('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 5000))
     }
     
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+
+    # Emotion model
+    EMOTION_MODEL_NAME = os.environ.get('EMOTION_MODEL_NAME', 'SamLowe/roberta-base-go_emotions')
+    # Warm the model in the background as soon as the app serves; when false
+    # it is only loaded by the first analysis that needs it
+    EMOTION_MODEL_WARMUP = os.environ.get('EMOTION_MODEL_WARMUP', 'true').lower() in ('1', 'true', 'yes')
+    # eager, int8, torchscript or onnx; compare them with `python inference_backends.py`
+    INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'eager')
+    INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', 0)) or None
+    # Unix socket of a shared inference sidecar; when set, workers load no model
+    INFERENCE_SOCKET = os.environ.get('INFERENCE_SOCKET', '')
+    INFERENCE_POOL_SIZE = int(os.environ.get('INFERENCE_POOL_SIZE', 4))
+
+    # Emotion model micro-batching
+    INFERENCE_MAX_BATCH_SIZE = int(os.environ.get('INFERENCE_MAX_BATCH_SIZE', 16))
+    INFERENCE_MAX_WAIT_MS = float(os.environ.get('INFERENCE_MAX_WAIT_MS', 10))
+    INFERENCE_TIMEOUT_SECONDS = float(os.environ.get('INFERENCE_TIMEOUT_SECONDS', 30))
+
+    # Long entries are scored as sentence-aligned windows of at most this many
+    # tokens (the model takes 512 including its two special tokens)
+    LONG_ENTRY_MODE = os.environ.get('LONG_ENTRY_MODE', 'true').lower() in ('1', 'true', 'yes')
+    LONG_ENTRY_WINDOW_TOKENS = int(os.environ.get('LONG_ENTRY_WINDOW_TOKENS', 500))
+
+    # /api/analyze-mood/batch limits; items are analyzed and streamed per chunk
+    ANALYZE_BATCH_MAX_ITEMS = int(os.environ.get('ANALYZE_BATCH_MAX_ITEMS', 1000))
+    ANALYZE_BATCH_CHUNK_SIZE = int(os.environ.get('ANALYZE_BATCH_CHUNK_SIZE', 32))
+
+    # Bulk journal import (POST /api/journal/import)
+    JOURNAL_IMPORT_MAX_ENTRIES = int(os.environ.get('JOURNAL_IMPORT_MAX_ENTRIES', 10000))
+    JOURNAL_IMPORT_CHUNK_SIZE = int(os.environ.get('JOURNAL_IMPORT_CHUNK_SIZE', 1000))
+
+    # Journal entries saved without mood are analyzed by a background job queue
+    ASYNC_MOOD_ANALYSIS = os.environ.get('ASYNC_MOOD_ANALYSIS', 'true').lower() in ('1', 'true', 'yes')
+    # In-process worker threads per web worker; 0 when running `python analysis_jobs.py` separately
+    ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 1))
+    ANALYSIS_POLL_INTERVAL_SECONDS = float(os.environ.get('ANALYSIS_POLL_INTERVAL_SECONDS', 1.0))
+    # Done and failed jobs are deleted this long after finishing
+    ANALYSIS_JOB_TTL_SECONDS = int(os.environ.get('ANALYSIS_JOB_TTL_SECONDS', 86400))
+
+    # PDF export: finished exports are cached on disk until an entry changes;
+    # an empty EXPORT_CACHE_DIR disables the cache
+    EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'export_cache'))
+    EXPORT_CACHE_TTL_SECONDS = int(os.environ.get('EXPORT_CACHE_TTL_SECONDS', 86400))
+    EXPORT_SPOOL_MAX_BYTES = int(os.environ.get('EXPORT_SPOOL_MAX_BYTES', 8 * 1024 * 1024))
+
+    # Background export jobs: rendered by EXPORT_PROCESSES worker processes,
+    # kept (job and PDF) for EXPORT_JOB_TTL_SECONDS after finishing
+    EXPORT_ARTIFACT_DIR = os.environ.get('EXPORT_ARTIFACT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'export_artifacts'))
+    EXPORT_JOB_TTL_SECONDS = int(os.environ.get('EXPORT_JOB_TTL_SECONDS', 3600))
+    EXPORT_PROCESSES = int(os.environ.get('EXPORT_PROCESSES', 2))
+
+    # GET /api/mood-analytics: window size in days and per-user result cache
+    ANALYTICS_DEFAULT_DAYS = int(os.environ.get('ANALYTICS_DEFAULT_DAYS', 30))
+    ANALYTICS_MAX_DAYS = int(os.environ.get('ANALYTICS_MAX_DAYS', 366))
+    ANALYTICS_CACHE_SIZE = int(os.environ.get('ANALYTICS_CACHE_SIZE', 1024))
+    ANALYTICS_CACHE_TTL_SECONDS = int(os.environ.get('ANALYTICS_CACHE_TTL_SECONDS', 300))
+
+    # Daily mood rollups are bucketed by local day in this timezone; analytics
+    # requested in it are served from the rollups
+    ROLLUP_TIMEZONE = os.environ.get('ROLLUP_TIMEZONE', 'UTC')
+
+    # Logging: records go through a background queue (LOG_QUEUE_SIZE, dropped
+    # when full) as JSON lines or text. Access records are sampled per
+    # endpoint, e.g. LOG_SAMPLE_RATES="analyze_mood=0.1". Journal text and
+    # analysis results are only logged with LOG_PAYLOADS=true
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+    LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', '')
+    LOG_PAYLOADS = os.environ.get('LOG_PAYLOADS', 'false').lower() in ('1', 'true', 'yes')
+
+    # Request profiling: requests carrying X-Profile-Token=PROFILE_TOKEN, plus a
+    # PROFILE_SAMPLE_RATE fraction of PROFILE_ENDPOINTS (comma separated, empty
+    # for all), are profiled into PROFILE_DIR, keeping PROFILE_MAX_FILES files.
+    # PROFILE_TOKEN also guards /api/profiles; leave it empty to disable those
+    PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.0))
+    PROFILE_ENDPOINTS = [name.strip() for name in os.environ.get('PROFILE_ENDPOINTS', '').split(',') if name.strip()]
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 100))
+
+    # Prometheus text metrics at /metrics (per process)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    # Response bodies at least this large are brotli/gzip compressed when the
+    # client accepts it (0 compresses everything); RESPONSE_COMPRESSION=false
+    # leaves it to a proxy
+    RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+
+    # Default ?detail= of /api/analyze-mood responses: minimal, standard or full
+    ANALYSIS_DEFAULT_DETAIL = os.environ.get('ANALYSIS_DEFAULT_DETAIL', 'full')
+
+    # Cursor pagination for GET /api/journal and GET /api/music-feedback
+    PAGE_DEFAULT_LIMIT = int(os.environ.get('PAGE_DEFAULT_LIMIT', 50))
+    PAGE_MAX_LIMIT = int(os.environ.get('PAGE_MAX_LIMIT', 200))
+
+    # Mood analysis result cache
+    ANALYSIS_CACHE_SIZE = int(os.environ.get('ANALYSIS_CACHE_SIZE', 2048))
+    ANALYSIS_CACHE_TTL_SECONDS = int(os.environ.get('ANALYSIS_CACHE_TTL_SECONDS', 3600))
+    ANALYSIS_CACHE_MONGO = os.environ.get('ANALYSIS_CACHE_MONGO', 'false').lower() in ('1', 'true', 'yes')
+    ANALYSIS_CACHE_MONGO_TTL_SECONDS = int(os.environ.get('ANALYSIS_CACHE_MONGO_TTL_SECONDS', 86400))
     DEBUG = True
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""Background PDF exports rendered in a process pool.
+
+``POST /api/journal/export/jobs`` records an ``ExportJob`` and hands its id
+to a pool of worker processes, so ReportLab's CPU-bound layout never runs in
+a web worker. The job document carries status and progress for polling. The
+finished PDF is written to the artifact directory as ``<job id>.pdf``.
+Artifacts and job documents both expire after the job TTL: job documents
+through a TTL index, artifact files when later jobs finish.
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from mongoengine import connect
+
+from config import Config
+from journal_export import ExportCache, export_cache_key, export_queryset, render_export
+from models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress writes while a job renders
+PROGRESS_INTERVAL = 0.5
+
+_executor = None
+_executor_pid = None
+
+
+def _init_process():
+    # Spawned processes start without the web worker's connection
+    connect(**Config.MONGODB_SETTINGS)
+
+
+def get_executor(processes):
+    """Per-process pool of export workers, created on first use"""
+    global _executor, _executor_pid
+    # A pool must not be shared across a fork
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_process
+        )
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _discard_executor(executor):
+    """Forget a broken pool so the next submit starts a fresh one"""
+    global _executor
+    if _executor is executor:
+        _executor = None
+    executor.shutdown(wait=False)
+
+
+def artifact_path(artifact_dir, job_id):
+    return os.path.join(artifact_dir, f'{job_id}.pdf')
+
+
+def create_export_job(user, start, end, ttl_seconds):
+    return ExportJob(
+        user_id=user,
+        start=start,
+        end=end,
+        expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds)
+    ).save()
+
+
+def submit_export_job(job, processes, **options):
+    """Queue a saved job on the process pool"""
+    job_id = str(job.id)
+    executor = get_executor(processes)
+    try:
+        future = executor.submit(run_export_job, job_id, **options)
+    except BrokenProcessPool:
+        # A worker died since the last job; start over with a fresh pool
+        _discard_executor(executor)
+        executor = get_executor(processes)
+        future = executor.submit(run_export_job, job_id, **options)
+    future.add_done_callback(lambda done: _on_job_done(done, job_id, executor))
+    return future
+
+
+def _on_job_done(future, job_id, executor):
+    """Fail a job whose worker process never reported back"""
+    error = future.exception()
+    if error is None:
+        return
+    logger.error(f"Export job {job_id} process failed: {str(error)}")
+    if isinstance(error, BrokenProcessPool):
+        # The pool is unusable after a worker crash or a failed initializer
+        _discard_executor(executor)
+    try:
+        ExportJob.objects(id=job_id, status__in=('queued', 'running')).update_one(
+            set__status='failed',
+            set__error=f"Export worker failed: {str(error) or type(error).__name__}",
+            set__updated_at=datetime.utcnow()
+        )
+    except Exception as e:
+        logger.error(f"Failed to mark export job {job_id} as failed: {str(e)}")
+
+
+def run_export_job(job_id, artifact_dir, ttl_seconds, cache_dir=None,
+                   cache_ttl_seconds=86400, spool_max_bytes=8 * 1024 * 1024):
+    """Render one export job; runs inside a pool process"""
+    job = ExportJob.objects(id=job_id).first()
+    if job is None:
+        return
+
+    user_id = job.user_id.id
+    now = datetime.utcnow()
+    total = export_queryset(user_id, job.start, job.end).count()
+    job.update(set__status='running', set__total_entries=total, set__updated_at=now)
+
+    last_write = [time.monotonic()]
+
+    def progress(rendered):
+        if time.monotonic() - last_write[0] >= PROGRESS_INTERVAL:
+            last_write[0] = time.monotonic()
+            job.update(set__rendered_entries=rendered, set__updated_at=datetime.utcnow())
+
+    path = artifact_path(artifact_dir, job_id)
+    try:
+        os.makedirs(artifact_dir, exist_ok=True)
+        cache = ExportCache(cache_dir, cache_ttl_seconds) if cache_dir else None
+        cache_key = export_cache_key(user_id, job.start, job.end) if cache else None
+        cached_path = cache.get(cache_key) if cache else None
+        if cached_path:
+            shutil.copyfile(cached_path, path)
+        else:
+            spool = render_export(user_id, job.start, job.end, spool_max_bytes, progress)
+            with spool, open(path + '.tmp', 'wb') as out:
+                shutil.copyfileobj(spool, out)
+            os.replace(path + '.tmp', path)
+            if cache:
+                with open(path, 'rb') as artifact:
+                    cache.put(cache_key, artifact)
+    except Exception as e:
+        logger.error(f"Export job {job_id} failed: {str(e)}")
+        job.update(set__status='failed', set__error=str(e), set__updated_at=datetime.utcnow())
+        return
+
+    finished = datetime.utcnow()
+    job.update(
+        set__status='done',
+        set__rendered_entries=total,
+        set__artifact_size=os.path.getsize(path),
+        set__finished_at=finished,
+        set__updated_at=finished,
+        set__expires_at=finished + timedelta(seconds=ttl_seconds)
+    )
+    prune_artifacts(artifact_dir, ttl_seconds)
+
+
+def prune_artifacts(artifact_dir, ttl_seconds):
+    """Delete artifact files older than the job TTL"""
+    now = time.time()
+    for name in os.listdir(artifact_dir):
+        path = os.path.join(artifact_dir, name)
+        try:
+            if now - os.path.getmtime(path) >= ttl_seconds:
+                os.unlink(path)
+        except OSError:
+            pass
+
+
+def job_payload(job):
+    progress = 100.0 if job.status == 'done' else (
+        round(100.0 * job.rendered_entries / job.total_entries, 1) if job.total_entries else 0.0
+    )
+    return {
+        'id': str(job.id),
+        'status': job.status,
+        'progress': progress,
+        'total_entries': job.total_entries,
+        'rendered_entries': job.rendered_entries,
+        'start': job.start.isoformat() if job.start else None,
+        'end': job.end.isoformat() if job.end else None,
+        'artifact_size': job.artifact_size,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'expires_at': job.expires_at.isoformat()
+    }
@@ -0,0 +1,106 @@
+"""Deterministic stand-in for the emotion model, for benchmarks and load tests.
+
+``FakeEmotionModel`` exposes the ``EmotionModel`` methods app.py relies on,
+with no torch, transformers or model download. Scores come from a hash of
+each text, so a text always gets the same scores. They use the go_emotions
+label set in the model's label order: a couple of dominant labels and low
+scores elsewhere, as the real multi-label model returns. ``latency_ms`` and
+``per_text_ms`` add a simulated forward-pass cost. ``jitter`` scales each
+pass by a log-normal factor with that sigma, giving a long tail like a busy
+CPU.
+"""
+import hashlib
+import math
+import random
+import re
+import time
+
+# id2label of SamLowe/roberta-base-go_emotions
+GO_EMOTIONS_LABELS = [
+    'admiration', 'amusement', 'anger', 'annoyance', 'approval', 'caring', 'confusion',
+    'curiosity', 'desire', 'disappointment', 'disapproval', 'disgust', 'embarrassment',
+    'excitement', 'fear', 'gratitude', 'grief', 'joy', 'love', 'nervousness', 'optimism',
+    'pride', 'realization', 'relief', 'remorse', 'sadness', 'surprise', 'neutral'
+]
+
+_TOKEN_RE = re.compile(r'\w+|[^\w\s]')
+
+
+def fake_scores(text, labels=GO_EMOTIONS_LABELS):
+    """Per-label probabilities for ``text``, the same on every call"""
+    rng = random.Random(hashlib.sha256(text.encode('utf-8')).digest())
+    logits = [rng.gauss(-4.0, 1.2) for _ in labels]
+    for index in rng.sample(range(len(labels)), 2):
+        logits[index] = rng.uniform(-0.5, 3.0)
+    return [1.0 / (1.0 + math.exp(-logit)) for logit in logits]
+
+
+class FakeEmotionModel:
+    """Drop-in for ``EmotionModel`` in benchmarks and load tests"""
+
+    def __init__(self, latency_ms=0.0, per_text_ms=0.0, jitter=0.0, labels=GO_EMOTIONS_LABELS):
+        self.latency_ms = latency_ms
+        self.per_text_ms = per_text_ms
+        self.jitter = jitter
+        self.labels = list(labels)
+        self.model_name = 'fake'
+        self.backend_name = 'fake'
+        self.calls = 0
+
+    @property
+    def is_ready(self):
+        return True
+
+    @property
+    def id2label(self):
+        return dict(enumerate(self.labels))
+
+    @property
+    def matrix(self):
+        from mood_analyzer import category_matrix
+
+        return category_matrix(tuple(self.labels))
+
+    def start_warmup(self):
+        pass
+
+    def load(self):
+        return self
+
+    def _sleep(self, count):
+        delay = (self.latency_ms + self.per_text_ms * count) / 1000.0
+        if delay > 0 and self.jitter > 0:
+            delay *= random.lognormvariate(0.0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def score_matrix(self, texts):
+        import numpy as np
+
+        self._sleep(len(texts))
+        self.calls += 1
+        return np.array([fake_scores(text, self.labels) for text in texts], dtype=np.float32)
+
+    def predict(self, texts):
+        self._sleep(len(texts))
+        self.calls += 1
+        return [
+            [{'label': label, 'score': score} for label, score in zip(self.labels, fake_scores(text, self.labels))]
+            for text in texts
+        ]
+
+    def token_offsets(self, text):
+        # Word pieces are approximated by words and punctuation
+        return [match.span() for match in _TOKEN_RE.finditer(text)]
+
+    def status(self):
+        return {
+            'model': self.model_name,
+            'backend': self.backend_name,
+            'state': 'ready',
+            'ready': True,
+            'load_seconds': 0.0,
+            'warmup_seconds': 0.0,
+            'ready_at': None,
+            'error': None,
+        }
@@ -0,0 +1,348 @@
+"""CPU inference backends for the emotion classification model.
+
+Every backend shares the tokenizer and the post-processing of the Hugging Face
+text-classification pipeline (sigmoid for multi-label models such as
+go_emotions, softmax otherwise) and differs only in how logits are computed:
+
+* ``eager``       - the fp32 PyTorch model, as loaded by ``from_pretrained``
+* ``int8``        - the same model with Linear layers dynamically quantized to int8
+* ``torchscript`` - a traced and frozen TorchScript module
+* ``onnx``        - an exported ONNX graph run by ONNX Runtime
+
+Run ``python inference_backends.py`` to compare every backend against the
+eager reference on a fixed corpus and pick the fastest acceptable one.
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBackend:
+    """Base class: tokenization, post-processing and warm-up"""
+
+    name = None
+
+    def __init__(self, model_name, max_length=512, num_threads=None):
+        self.model_name = model_name
+        self.max_length = max_length
+        self.num_threads = num_threads
+        self.tokenizer = None
+        self.labels = None
+        self.multi_label = True
+
+    def load(self):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name, **self._model_kwargs())
+        model.eval()
+
+        config = model.config
+        self.labels = [config.id2label[i] for i in range(config.num_labels)]
+        # Same rule the pipeline uses to pick its score function
+        self.multi_label = config.problem_type == 'multi_label_classification' or config.num_labels == 1
+
+        self._prepare(model)
+        return self
+
+    def _model_kwargs(self):
+        return {}
+
+    def _prepare(self, model):
+        raise NotImplementedError
+
+    def _logits(self, encoded):
+        """Return a (batch, num_labels) numpy array of logits"""
+        raise NotImplementedError
+
+    def _encode(self, texts, return_tensors='pt'):
+        return self.tokenizer(
+            list(texts),
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors=return_tensors
+        )
+
+    def score_matrix(self, texts):
+        """Return a (batch, num_labels) numpy array of label probabilities"""
+        import numpy as np
+
+        logits = np.asarray(self._logits(self._encode(texts)), dtype=np.float32)
+        if self.multi_label:
+            return 1.0 / (1.0 + np.exp(-logits))
+        shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return shifted / shifted.sum(axis=-1, keepdims=True)
+
+    def predict(self, texts):
+        """Return per-text ``[{'label', 'score'}, ...]`` lists in label order,
+        the same shape the pipeline returns with ``return_all_scores=True``"""
+        scores = self.score_matrix(texts)
+        labels = self.labels
+        return [
+            [{'label': label, 'score': float(score)} for label, score in zip(labels, row)]
+            for row in scores
+        ]
+
+    def warm_up(self, texts=("Warming up the emotion model.",)):
+        """Run a throwaway pass so the first real request isn't the slow one"""
+        started = time.perf_counter()
+        self.score_matrix(texts)
+        return time.perf_counter() - started
+
+
+class EagerBackend(InferenceBackend):
+    name = 'eager'
+
+    def _prepare(self, model):
+        self.model = model
+
+    def _logits(self, encoded):
+        import torch
+
+        with torch.inference_mode():
+            return self.model(**encoded).logits.numpy()
+
+
+class QuantizedBackend(EagerBackend):
+    """fp32 model with dynamically quantized int8 Linear layers"""
+
+    name = 'int8'
+
+    def _prepare(self, model):
+        import torch
+
+        self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class TorchScriptBackend(InferenceBackend):
+    """Model traced over (input_ids, attention_mask) and frozen"""
+
+    name = 'torchscript'
+
+    def _model_kwargs(self):
+        return {'torchscript': True}
+
+    def _prepare(self, model):
+        import torch
+
+        example = self._encode(["Tracing the emotion model.", "A second, slightly longer example sentence."])
+        with torch.no_grad():
+            traced = torch.jit.trace(model, (example['input_ids'], example['attention_mask']), strict=False)
+        self.model = torch.jit.freeze(traced.eval())
+
+    def _logits(self, encoded):
+        import torch
+
+        with torch.inference_mode():
+            return self.model(encoded['input_ids'], encoded['attention_mask'])[0].numpy()
+
+
+class OnnxBackend(InferenceBackend):
+    """Model exported once to ONNX (cached on disk) and run by ONNX Runtime"""
+
+    name = 'onnx'
+
+    def __init__(self, model_name, max_length=512, num_threads=None, cache_dir=None):
+        super().__init__(model_name, max_length=max_length, num_threads=num_threads)
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'onnx_cache')
+
+    @property
+    def onnx_path(self):
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', self.model_name)
+        return os.path.join(self.cache_dir, f'{safe_name}.onnx')
+
+    def _prepare(self, model):
+        import onnxruntime
+
+        if not os.path.exists(self.onnx_path):
+            self._export(model)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        self.session = onnxruntime.InferenceSession(
+            self.onnx_path, options, providers=['CPUExecutionProvider']
+        )
+        self._input_names = {item.name for item in self.session.get_inputs()}
+
+    def _export(self, model):
+        import torch
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        example = self._encode(["Exporting the emotion model."])
+        tmp_path = f'{self.onnx_path}.{os.getpid()}.tmp'
+        # Export a plain (logits,) tuple rather than a ModelOutput
+        model.config.return_dict = False
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (example['input_ids'], example['attention_mask']),
+                tmp_path,
+                input_names=['input_ids', 'attention_mask'],
+                output_names=['logits'],
+                dynamic_axes={
+                    'input_ids': {0: 'batch', 1: 'sequence'},
+                    'attention_mask': {0: 'batch', 1: 'sequence'},
+                    'logits': {0: 'batch'},
+                },
+                opset_version=14
+            )
+        # Atomic rename so concurrent workers never load a half-written file
+        os.replace(tmp_path, self.onnx_path)
+        logger.info(f"Exported {self.model_name} to {self.onnx_path}")
+
+    def _logits(self, encoded):
+        feeds = {
+            name: encoded[name].numpy().astype('int64')
+            for name in ('input_ids', 'attention_mask')
+            if name in self._input_names
+        }
+        return self.session.run(['logits'], feeds)[0]
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (EagerBackend, QuantizedBackend, TorchScriptBackend, OnnxBackend)
+}
+
+
+def create_backend(name, model_name, **kwargs):
+    """Instantiate (but do not load) the backend registered under ``name``"""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown inference backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return backend_class(model_name, **kwargs)
+
+
+PARITY_CORPUS = [
+    "Today was amazing, I finally got the job I have been working towards!",
+    "I feel so alone since we broke up. My heart hurts every single night.",
+    "Quiet morning, coffee on the porch, watching the sunrise. Everything is calm.",
+    "I am exhausted. Work has drained me and I can't think straight anymore.",
+    "Why does everyone keep ignoring my messages? This is so frustrating.",
+    "I'm terrified about the surgery tomorrow and can't stop worrying.",
+    "Thank you so much for the lovely gift, it made my whole week.",
+    "Wow, I did not expect that ending at all!",
+    "That restaurant was disgusting, I'm never going back.",
+    "Looking at old photos of my grandparents made me nostalgic for childhood summers.",
+    "I'm determined to run the marathon next spring. Training starts Monday.",
+    "Meh. Nothing much happened today.",
+    "I love spending weekends with my partner, we laugh all the time.",
+    "Honestly I'm a bit confused about what I want to do after graduation.",
+    "I'm proud of my sister for finishing her degree while working full time.",
+    "The deadline moved up again and I'm stressed out and overwhelmed.",
+]
+
+
+def check_backend_parity(backend_names, model_name, corpus=PARITY_CORPUS, reference='eager',
+                         repeats=3, build_response=None, lexicon_score=None, **backend_kwargs):
+    """Compare every backend against the reference backend on ``corpus``.
+
+    For each backend reports the max and mean absolute difference over all
+    label scores, how often the top label and the resulting ``primary_mood``
+    agree with the reference, and the median latency of scoring the corpus
+    as one batch.
+    """
+    import numpy as np
+
+    if build_response is None or lexicon_score is None:
+        from lexicon import score_text
+        from mood_analyzer import build_mood_response
+        build_response = build_response or build_mood_response
+        lexicon_score = lexicon_score or score_text
+
+    lexicon_scores = [lexicon_score(text) for text in corpus]
+
+    def evaluate(backend):
+        load_started = time.perf_counter()
+        backend.load()
+        load_seconds = time.perf_counter() - load_started
+        warmup_seconds = backend.warm_up()
+
+        timings = []
+        for _ in range(max(1, repeats)):
+            started = time.perf_counter()
+            scores = backend.score_matrix(corpus)
+            timings.append(time.perf_counter() - started)
+
+        predictions = backend.predict(corpus)
+        moods = [
+            build_response(result, scores_for_text)['primary_mood']
+            for result, scores_for_text in zip(predictions, lexicon_scores)
+        ]
+        return {
+            'scores': scores,
+            'moods': moods,
+            'load_seconds': round(load_seconds, 3),
+            'warmup_seconds': round(warmup_seconds, 3),
+            'batch_latency_ms': round(sorted(timings)[len(timings) // 2] * 1000, 2),
+        }
+
+    reference_run = evaluate(create_backend(reference, model_name, **backend_kwargs))
+    reference_top = reference_run['scores'].argmax(axis=1)
+
+    report = {}
+    for name in backend_names:
+        run = reference_run if name == reference else evaluate(create_backend(name, model_name, **backend_kwargs))
+        diff = np.abs(run['scores'] - reference_run['scores'])
+        report[name] = {
+            'max_abs_diff': float(diff.max()),
+            'mean_abs_diff': float(diff.mean()),
+            'top_label_agreement': float((run['scores'].argmax(axis=1) == reference_top).mean()),
+            'primary_mood_agreement': float(np.mean([
+                mood == expected for mood, expected in zip(run['moods'], reference_run['moods'])
+            ])),
+            'load_seconds': run['load_seconds'],
+            'warmup_seconds': run['warmup_seconds'],
+            'batch_latency_ms': run['batch_latency_ms'],
+        }
+    return report
+
+
+def pick_backend(report, max_abs_diff=0.05, min_mood_agreement=1.0):
+    """Return the fastest backend whose accuracy is within the given bounds"""
+    acceptable = [
+        (result['batch_latency_ms'], name)
+        for name, result in report.items()
+        if result['max_abs_diff'] <= max_abs_diff and result['primary_mood_agreement'] >= min_mood_agreement
+    ]
+    return min(acceptable)[1] if acceptable else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare emotion model inference backends against eager PyTorch')
+    parser.add_argument('--model', default=os.environ.get('EMOTION_MODEL_NAME', 'SamLowe/roberta-base-go_emotions'))
+    parser.add_argument('--backends', default=','.join(BACKENDS), help='Comma-separated backend names')
+    parser.add_argument('--threads', type=int, default=None, help='Intra-op threads per backend')
+    parser.add_argument('--max-abs-diff', type=float, default=0.05)
+    parser.add_argument('--min-mood-agreement', type=float, default=1.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = check_backend_parity(args.backends.split(','), args.model, num_threads=args.threads)
+
+    print(f"{'backend':<12} {'max diff':>10} {'mean diff':>10} {'top label':>10} {'mood':>8} {'latency ms':>11}")
+    for name, result in report.items():
+        print(
+            f"{name:<12} {result['max_abs_diff']:>10.5f} {result['mean_abs_diff']:>10.6f} "
+            f"{result['top_label_agreement']:>10.2%} {result['primary_mood_agreement']:>8.2%} "
+            f"{result['batch_latency_ms']:>11.2f}"
+        )
+
+    chosen = pick_backend(report, args.max_abs_diff, args.min_mood_agreement)
+    if chosen is None:
+        print("No backend met the accuracy bounds")
+        sys.exit(1)
+    print(f"Fastest acceptable backend: {chosen} (set INFERENCE_BACKEND={chosen})")
@@ -0,0 +1,339 @@
+"""Local inference sidecar: one process owns the emotion model for every web worker.
+
+Run it next to the web workers and point them at its socket:
+
+    python inference_server.py --socket /tmp/moodtunes-inference.sock
+    INFERENCE_SOCKET=/tmp/moodtunes-inference.sock gunicorn -w 8 app:app
+
+Web workers then load no model at all. ``InferenceClient`` has the same
+interface as ``EmotionModel``, so ``app.py`` uses whichever is configured.
+Requests from all workers are micro-batched together inside the sidecar.
+
+Wire protocol (all integers big-endian). Every message is a frame: a
+``uint32`` payload length followed by the payload.
+
+Request payload::
+
+    uint8 op, uint32 count, count x (uint32 length, utf-8 bytes)
+
+Response payload::
+
+    uint8 status (0 = ok, 1 = error); on error the rest is a utf-8 message.
+    OP_PREDICT        uint16 labels, labels x (uint16 length, utf-8 label),
+                      uint32 rows, rows x labels float32 scores
+    OP_TOKEN_OFFSETS  uint32 tokens, tokens x (uint32 start, uint32 end)
+    OP_STATUS         utf-8 JSON object
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+
+logger = logging.getLogger(__name__)
+
+OP_PREDICT = 1
+OP_TOKEN_OFFSETS = 2
+OP_STATUS = 3
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+_LENGTH = struct.Struct('!I')
+_HEADER = struct.Struct('!BI')
+_SHORT = struct.Struct('!H')
+_PAIR = struct.Struct('!II')
+
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError('Connection closed mid-frame')
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_frame(sock):
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    if size > MAX_FRAME_BYTES:
+        raise ProtocolError(f'Frame of {size} bytes exceeds the {MAX_FRAME_BYTES} byte limit')
+    return _recv_exact(sock, size)
+
+
+def send_frame(sock, payload):
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def encode_request(op, texts=()):
+    parts = [_HEADER.pack(op, len(texts))]
+    for text in texts:
+        data = text.encode('utf-8')
+        parts.append(_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+
+def decode_request(payload):
+    op, count = _HEADER.unpack_from(payload, 0)
+    offset = _HEADER.size
+    texts = []
+    for _ in range(count):
+        (size,) = _LENGTH.unpack_from(payload, offset)
+        offset += _LENGTH.size
+        texts.append(payload[offset:offset + size].decode('utf-8'))
+        offset += size
+    return op, texts
+
+
+def encode_predictions(results):
+    labels = [item['label'] for item in results[0]] if results else []
+    parts = [bytes([STATUS_OK]), _SHORT.pack(len(labels))]
+    for label in labels:
+        data = label.encode('utf-8')
+        parts.append(_SHORT.pack(len(data)))
+        parts.append(data)
+    scores = [item['score'] for result in results for item in result]
+    parts.append(_LENGTH.pack(len(results)))
+    parts.append(struct.pack(f'!{len(scores)}f', *scores))
+    return b''.join(parts)
+
+
+def decode_predictions(payload):
+    offset = 1
+    (label_count,) = _SHORT.unpack_from(payload, offset)
+    offset += _SHORT.size
+    labels = []
+    for _ in range(label_count):
+        (size,) = _SHORT.unpack_from(payload, offset)
+        offset += _SHORT.size
+        labels.append(payload[offset:offset + size].decode('utf-8'))
+        offset += size
+    (rows,) = _LENGTH.unpack_from(payload, offset)
+    offset += _LENGTH.size
+    scores = struct.unpack_from(f'!{rows * label_count}f', payload, offset)
+    return [
+        [{'label': label, 'score': scores[row * label_count + index]} for index, label in enumerate(labels)]
+        for row in range(rows)
+    ]
+
+
+def encode_offsets(offsets):
+    parts = [bytes([STATUS_OK]), _LENGTH.pack(len(offsets))]
+    parts.extend(_PAIR.pack(start, end) for start, end in offsets)
+    return b''.join(parts)
+
+
+def decode_offsets(payload):
+    (count,) = _LENGTH.unpack_from(payload, 1)
+    offset = 1 + _LENGTH.size
+    return [_PAIR.unpack_from(payload, offset + i * _PAIR.size) for i in range(count)]
+
+
+def encode_error(message):
+    return bytes([STATUS_ERROR]) + str(message).encode('utf-8')
+
+
+class _InferenceHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                payload = recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            except ProtocolError as e:
+                send_frame(self.request, encode_error(e))
+                return
+
+            try:
+                op, texts = decode_request(payload)
+                if op == OP_PREDICT:
+                    futures = [server.batcher.submit(text) for text in texts]
+                    response = encode_predictions([future.result() for future in futures])
+                elif op == OP_TOKEN_OFFSETS:
+                    response = encode_offsets(server.model.token_offsets(texts[0]))
+                elif op == OP_STATUS:
+                    status = server.model.status()
+                    status['batching'] = server.batcher.stats()
+                    response = bytes([STATUS_OK]) + json.dumps(status).encode('utf-8')
+                else:
+                    response = encode_error(f'Unknown op {op}')
+            except Exception as e:
+                logger.error(f"Inference request failed: {str(e)}")
+                response = encode_error(e)
+
+            try:
+                send_frame(self.request, response)
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, model, batcher):
+        self.model = model
+        self.batcher = batcher
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _InferenceHandler)
+        os.chmod(socket_path, 0o660)
+
+
+class InferenceClient:
+    """Pooled client for the inference sidecar with ``EmotionModel``'s interface"""
+
+    def __init__(self, socket_path, pool_size=4, timeout=30.0):
+        self.socket_path = socket_path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        # The sidecar validates its model's labels when it loads; results are
+        # grouped by the matrix for the label order they arrive in
+        self.matrix = None
+        self._pool = None
+        self._pool_pid = None
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _ensure_pool(self):
+        # Sockets must not be shared across a fork
+        pid = os.getpid()
+        if self._pool_pid != pid:
+            with self._lock:
+                if self._pool_pid != pid:
+                    self._pool = queue.LifoQueue()
+                    self._created = 0
+                    self._pool_pid = pid
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _acquire(self):
+        """``(socket, reused)``; ``reused`` is True for a pooled connection"""
+        self._ensure_pool()
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                try:
+                    return self._connect(), False
+                except Exception:
+                    self._created -= 1
+                    raise
+        try:
+            return self._pool.get(timeout=self.timeout), True
+        except queue.Empty:
+            raise TimeoutError(
+                f"No inference connection became free within {self.timeout}s "
+                f"(all {self.pool_size} are in use)"
+            ) from None
+
+    def _release(self, sock, broken=False):
+        if broken:
+            try:
+                sock.close()
+            finally:
+                with self._lock:
+                    self._created -= 1
+            return
+        self._pool.put(sock)
+
+    def _call(self, op, texts=()):
+        request = encode_request(op, texts)
+        for attempt in range(2):
+            sock, reused = self._acquire()
+            try:
+                send_frame(sock, request)
+                payload = recv_frame(sock)
+            except BaseException as e:
+                # The connection is in an unknown state, whatever went wrong
+                self._release(sock, broken=True)
+                # A pooled connection may have gone stale (e.g. sidecar
+                # restart). A timeout is never re-sent: the sidecar is busy.
+                if attempt or not reused or not isinstance(e, ConnectionError):
+                    raise
+                continue
+            self._release(sock)
+            if payload[0] != STATUS_OK:
+                raise RuntimeError(f"Inference server error: {payload[1:].decode('utf-8', 'replace')}")
+            return payload
+
+    def predict(self, texts):
+        return decode_predictions(self._call(OP_PREDICT, list(texts)))
+
+    def token_offsets(self, text):
+        return decode_offsets(self._call(OP_TOKEN_OFFSETS, [text]))
+
+    def status(self):
+        try:
+            status = json.loads(self._call(OP_STATUS)[1:].decode('utf-8'))
+        except Exception as e:
+            return {'state': 'unreachable', 'ready': False, 'socket': self.socket_path, 'error': str(e)}
+        status['socket'] = self.socket_path
+        return status
+
+    @property
+    def is_ready(self):
+        return self.status()['ready']
+
+    def start_warmup(self):
+        # The sidecar warms its own model at startup
+        pass
+
+
+def main():
+    from config import Config
+    from batching import MicroBatcher
+    from mood_analyzer import EmotionModel
+
+    parser = argparse.ArgumentParser(description='Serve the emotion model over a Unix domain socket')
+    parser.add_argument('--socket', default=Config.INFERENCE_SOCKET or '/tmp/moodtunes-inference.sock')
+    parser.add_argument('--model', default=Config.EMOTION_MODEL_NAME)
+    parser.add_argument('--backend', default=Config.INFERENCE_BACKEND)
+    parser.add_argument('--threads', type=int, default=Config.INFERENCE_THREADS)
+    parser.add_argument('--max-batch-size', type=int, default=Config.INFERENCE_MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=Config.INFERENCE_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    model = EmotionModel(args.model, backend=args.backend, num_threads=args.threads)
+    model.load()
+    batcher = MicroBatcher(
+        model.predict,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        name='sidecar-batcher'
+    )
+
+    server = InferenceServer(args.socket, model, batcher)
+    logger.info(f"Inference server listening on {args.socket}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""PDF export of a user's journal.
+
+ReportLab styles are built once per process. Entries are read lazily and fed
+to ReportLab a few at a time, so the flowable list stays small however long
+the journal is. The PDF is rendered into a spooled temporary file, which
+moves to disk past ``spool_max_bytes``, and is sent out in chunks.
+
+Finished PDFs are cached on disk under a key built from the user, the date
+range, and the user's entry count and latest ``updated_at``. A repeated
+download is served straight from the file until an entry changes.
+"""
+import functools
+import hashlib
+import os
+import tempfile
+import time
+from itertools import islice
+
+from models import JournalEntry
+
+CHUNK_SIZE = 64 * 1024
+
+# Flowables kept queued ahead of ReportLab; enough for keepWithNext lookahead
+_FEED_SIZE = 64
+
+
+@functools.lru_cache(maxsize=None)
+def pdf_styles():
+    """Paragraph styles for the export, built on first use"""
+    # ReportLab is only needed here, so keep it off the startup path
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            textColor=colors.purple
+        ),
+        'date': ParagraphStyle(
+            'CustomDate',
+            parent=styles['Normal'],
+            fontSize=12,
+            textColor=colors.gray
+        ),
+        'content': ParagraphStyle(
+            'CustomContent',
+            parent=styles['Normal'],
+            fontSize=12,
+            spaceAfter=20
+        ),
+        'mood': ParagraphStyle(
+            'CustomMood',
+            parent=styles['Normal'],
+            fontSize=12,
+            textColor=colors.purple,
+            spaceAfter=10
+        ),
+    }
+
+
+def journal_flowables(entries, progress=None):
+    """Yield the report's flowables one entry at a time.
+
+    ``progress``, if given, is called with the number of entries laid out so far.
+    """
+    from reportlab.platypus import Paragraph, Spacer
+
+    styles = pdf_styles()
+    done = 0
+    yield Paragraph("Mood Journal Report", styles['title'])
+    yield Spacer(1, 20)
+
+    for entry in entries:
+        date_str = entry.created_at.strftime("%B %d, %Y at %I:%M %p")
+        yield Paragraph(date_str, styles['date'])
+        yield Spacer(1, 10)
+
+        yield Paragraph(entry.content, styles['content'])
+
+        mood_data = entry.get_mood()
+        if mood_data:
+            mood_text = f"Mood: {mood_data['primary_mood']} (Confidence: {mood_data['confidence']}%)"
+            yield Paragraph(mood_text, styles['mood'])
+
+            if mood_data.get('emotions'):
+                emotions_text = "Detected Emotions: " + ", ".join(mood_data['emotions'])
+                yield Paragraph(emotions_text, styles['mood'])
+
+        yield Spacer(1, 30)
+
+        if progress:
+            done += 1
+            progress(done)
+
+
+class _FlowableFeed(list):
+    """List of flowables that refills from an iterator as ReportLab consumes it.
+
+    ``doc.build`` only takes flowables off the front (``del flowables[0]``)
+    and puts split halves back there, so topping the list up after each
+    delete keeps the full story out of memory.
+    """
+
+    def __init__(self, flowables):
+        self._source = iter(flowables)
+        super().__init__(islice(self._source, _FEED_SIZE))
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        if len(self) < _FEED_SIZE // 2:
+            self.extend(islice(self._source, _FEED_SIZE - len(self)))
+
+
+def render_journal_pdf(entries, output, progress=None):
+    """Render the journal report for ``entries`` into a binary file object"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    doc.build(_FlowableFeed(journal_flowables(entries, progress)))
+
+
+def export_queryset(user_id, start=None, end=None):
+    """A user's entries created in ``[start, end)``; either bound may be None"""
+    entries = JournalEntry.objects(user_id=user_id)
+    if start is not None:
+        entries = entries.filter(created_at__gte=start)
+    if end is not None:
+        entries = entries.filter(created_at__lt=end)
+    return entries
+
+
+def export_cache_key(user_id, start=None, end=None):
+    """Key that changes whenever any of the user's entries is added or modified.
+
+    The version covers the whole journal rather than the range, so both of
+    its queries are answered from the ``user_id`` indexes alone.
+    """
+    entries = JournalEntry.objects(user_id=user_id)
+    latest = entries.order_by('-updated_at').only('updated_at').first()
+    version = '|'.join([
+        str(entries.count()),
+        latest.updated_at.isoformat() if latest and latest.updated_at else '',
+    ])
+    span = f"{start.isoformat() if start else ''}|{end.isoformat() if end else ''}"
+    return (
+        f"{user_id}-{hashlib.sha256(span.encode('utf-8')).hexdigest()[:16]}"
+        f"-{hashlib.sha256(version.encode('utf-8')).hexdigest()[:16]}"
+    )
+
+
+def render_export(user_id, start=None, end=None, spool_max_bytes=8 * 1024 * 1024, progress=None):
+    """Render an export into a spooled temporary file positioned at its start"""
+    entries = (
+        export_queryset(user_id, start, end)
+        .order_by('-created_at')
+        .only('created_at', 'content', 'mood_data')
+        .no_cache()
+    )
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes)
+    try:
+        render_journal_pdf(entries, spool, progress)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def iter_file_chunks(fileobj, chunk_size=CHUNK_SIZE):
+    """Yield a file's contents in chunks, closing it once exhausted"""
+    try:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+class ExportCache:
+    """Finished PDFs on disk, one file per cache key"""
+
+    def __init__(self, directory, ttl_seconds=86400):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.pdf')
+
+    def get(self, key):
+        """Path of a cached export, or None"""
+        path = self.path(key)
+        try:
+            if time.time() - os.path.getmtime(path) < self.ttl_seconds:
+                return path
+        except OSError:
+            pass
+        return None
+
+    def put(self, key, fileobj):
+        """Store an export atomically; returns its path"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                fileobj.seek(0)
+                while True:
+                    chunk = fileobj.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+            os.replace(tmp_path, self.path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._prune(key)
+        return self.path(key)
+
+    def _prune(self, key):
+        # Older versions of the same user and range, and anything expired
+        range_prefix = key.rsplit('-', 1)[0] + '-'
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                superseded = name.startswith(range_prefix) and name != f'{key}.pdf'
+                if superseded or now - os.path.getmtime(path) >= self.ttl_seconds:
+                    os.unlink(path)
+            except OSError:
+                pass
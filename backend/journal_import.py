@@ -0,0 +1,102 @@
+"""Bulk journal import: per-row validation and chunked unordered inserts.
+
+Rows are validated into ``JournalEntry`` documents with the same rules as
+``POST /api/journal`` (``set_mood`` included), then written with
+``insert_many(ordered=False)`` so one bad row never stops the rest of its
+chunk and each chunk is a single round trip.
+"""
+import logging
+
+from bson import ObjectId
+from dateutil.parser import isoparse
+from mongoengine.errors import ValidationError
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from models import JournalEntry
+
+logger = logging.getLogger(__name__)
+
+
+class ImportRowError(Exception):
+    """A row that cannot be imported, with the stage that rejected it"""
+
+    def __init__(self, message, stage):
+        super().__init__(message)
+        self.stage = stage
+
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 timestamp"""
+    if not isinstance(value, str):
+        raise ImportRowError('created_at must be an ISO 8601 string', 'timestamp_validation')
+    try:
+        return isoparse(value)
+    except ValueError:
+        raise ImportRowError(f'Invalid created_at: {value}', 'timestamp_validation')
+
+
+def build_entry(row, user):
+    """Validate one import row into an unsaved ``JournalEntry``"""
+    if not isinstance(row, dict):
+        raise ImportRowError('Each entry must be an object', 'data_validation')
+
+    content = str(row.get('content') or '').strip()
+    if not content:
+        raise ImportRowError('Content cannot be empty', 'content_validation')
+
+    entry = JournalEntry(content=content, user_id=user)
+    if row.get('created_at') is not None:
+        entry.created_at = parse_timestamp(row['created_at'])
+
+    mood_data = row.get('mood')
+    if mood_data:
+        try:
+            entry.set_mood(mood_data)
+        except ValueError as ve:
+            raise ImportRowError(str(ve), 'mood_validation')
+
+    try:
+        entry.validate()
+    except ValidationError as ve:
+        raise ImportRowError(str(ve), 'data_validation')
+    return entry
+
+
+def insert_entries(entries, chunk_size):
+    """Insert entries in unordered chunks.
+
+    Returns one ``(id, None)`` or ``(None, error)`` per entry, in order.
+    """
+    collection = JournalEntry._get_collection()
+    outcomes = []
+    for start in range(0, len(entries), chunk_size):
+        documents = [entry.to_mongo() for entry in entries[start:start + chunk_size]]
+        # Assigned up front, so the rows that landed can be found if the
+        # chunk fails part way
+        for document in documents:
+            document['_id'] = ObjectId()
+        errors = {}
+        try:
+            collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = {error['index']: error.get('errmsg', 'Write failed') for error in e.details.get('writeErrors', [])}
+        except PyMongoError as e:
+            errors = _unwritten(collection, documents, str(e))
+        for index, document in enumerate(documents):
+            if index in errors:
+                outcomes.append((None, errors[index]))
+            else:
+                outcomes.append((document['_id'], None))
+    return outcomes
+
+
+def _unwritten(collection, documents, message):
+    """``{index: error}`` for the documents of a failed chunk that were not inserted"""
+    ids = [document['_id'] for document in documents]
+    try:
+        written = {found['_id'] for found in collection.find({'_id': {'$in': ids}}, {'_id': 1})}
+    except PyMongoError as e:
+        # The chunk's outcome is unknown, so report all of it as failed
+        logger.error(f"Failed to check which imported entries were written: {str(e)}")
+        return {index: message for index in range(len(documents))}
+    return {index: message for index, _id in enumerate(ids) if _id not in written}
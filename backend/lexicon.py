@@ -0,0 +1,397 @@
+"""Pattern-based mood detectors compiled into a single-pass lexicon scanner.
+
+The rule tables below are the ones the ``detect_*`` functions used to build
+and run one ``re.findall`` at a time. ``LexiconScanner`` compiles them once
+and scores all five detectors from a single scan of the lowercased text,
+reproducing ``re.findall`` counting exactly: each pattern counts its own
+leftmost, non-overlapping matches, preferring its alternatives in order.
+"""
+import re
+import sys
+from collections import namedtuple
+
+# Bump when any table or boost below changes; part of the analysis cache key
+LEXICON_VERSION = '1'
+
+MOTIVATION_PATTERNS = [
+    # Direct motivation words (weight: 0.4)
+    (r'\b(motivated|motivation|inspire|inspired|inspiration|determined|determination)\b', 0.4),
+    (r'\b(driven|ambitious|passionate|focused|dedicated|committed)\b', 0.4),
+
+    # Action-oriented phrases (weight: 0.3)
+    (r'\b(going to|plan to|aim to|striving to|working to|trying to)\b', 0.3),
+    (r'\b(achieve|accomplish|reach|attain|succeed|succeeding)\b', 0.3),
+
+    # Goal-related terms (weight: 0.3)
+    (r'\b(goal|target|objective|mission|purpose|vision)\b', 0.3),
+    (r'\b(dream|aspiration|ambition|drive|push|progress)\b', 0.3),
+
+    # Growth and improvement (weight: 0.2)
+    (r'\b(improve|grow|develop|progress|advance|better)\b', 0.2),
+    (r'\b(learning|growing|developing|improving|advancing)\b', 0.2),
+
+    # Positive mindset (weight: 0.2)
+    (r'\b(never give up|keep going|push through|stay strong)\b', 0.2),
+    (r'\b(believe|confidence|strength|courage|power)\b', 0.2)
+]
+
+LOVE_PATTERNS = [
+    # Relationship words
+    (r'\b(relationship|love|romance|dating|partner|boyfriend|girlfriend|spouse|husband|wife)\b', 0.2),
+    (r'\b(couple|marriage|wedding|engagement|proposal|anniversary)\b', 0.2),
+    (r'\b(crush|infatuation|attraction|chemistry|connection|bond)\b', 0.2),
+
+    # Love feelings
+    (r'\b(love|adore|cherish|care|date|affection|fondness|tenderness)\b', 0.2),
+    (r'\b(passion|desire|longing|yearning|devotion|commitment)\b', 0.2),
+    (r'\b(heart|soul|feelings|emotions|sentiment|attachment)\b', 0.2),
+
+    # Relationship actions
+    (r'\b(together|dating|seeing|meeting|talking|chatting|connecting)\b', 0.2),
+    (r'\b(share|care|support|trust|understand|respect|appreciate)\b', 0.2),
+    (r'\b(kiss|hug|hold|touch|embrace|caress|comfort)\b', 0.2),
+
+    # Relationship states
+    (r'\b(single|taken|committed|exclusive|serious|casual|complicated)\b', 0.2),
+    (r'\b(breakup|divorce|separation|reconciliation|reunion)\b', 0.2),
+
+    # Love expressions
+    (r'\b(miss you|love you|care about|think about|dream about)\b', 0.2),
+    (r'\b(special|important|meaningful|precious|valuable)\b', 0.2),
+    (r'\b(forever|always|never|forever|eternal|endless)\b', 0.2)
+]
+
+HEARTBREAK_PATTERNS = [
+    # Direct heartbreak words (weight: 0.4)
+    (r'\b(heartbreak|heartbroken|heartbreaking|broken heart|heart ache|emotional pain)\b', 0.4),
+    (r'\b(heart hurts|heart aching|heart pain|heart sore)\b', 0.4),
+
+    # Breakup related (weight: 0.3)
+    (r'\b(breakup|break up|broke up|breaking up|broken up)\b', 0.3),
+    (r'\b(separated|divorced|split|parted|ended)\b', 0.3),
+
+    # Emotional pain (weight: 0.2)
+    (r'\b(hurt|pain|ache|suffer|cry|tears|weep)\b', 0.2),
+    (r'\b(miss|longing|yearning|empty|void|alone)\b', 0.2),
+
+    # Rejection (weight: 0.3)
+    (r'\b(rejected|dumped|left|abandoned|betrayed)\b', 0.3),
+    (r'\b(unwanted|unloved|unappreciated|taken for granted)\b', 0.3),
+
+    # Healing (weight: 0.2)
+    (r'\b(moving on|getting over|healing|recovering|letting go)\b', 0.2),
+    (r'\b(accept|forgive|forget|move forward|start over)\b', 0.2)
+]
+
+CALM_PATTERNS = [
+    # Direct calm words (weight: 0.4)
+    (r'\b(calm|relaxed|peaceful|serene|tranquil|zen)\b', 0.4),
+    (r'\b(peace|quiet|still|gentle|soft|mellow)\b', 0.4),
+
+    # Relaxation activities (weight: 0.3)
+    (r'\b(meditate|meditation|yoga|breathing|breath|mindful)\b', 0.3),
+    (r'\b(rest|resting|relax|relaxing|unwind|unwinding)\b', 0.3),
+
+    # Nature-related calm (weight: 0.3)
+    (r'\b(nature|forest|ocean|waves|breeze|wind)\b', 0.3),
+    (r'\b(sunset|sunrise|stars|moon|night|dawn)\b', 0.3),
+
+    # Physical relaxation (weight: 0.2)
+    (r'\b(sleep|sleeping|nap|napping|rest|resting)\b', 0.2),
+    (r'\b(comfort|comfortable|cozy|warm|soft|gentle)\b', 0.2),
+
+    # Mental state (weight: 0.3)
+    (r'\b(clear|clear mind|focused|centered|balanced)\b', 0.3),
+    (r'\b(relief|relieved|ease|eased|soothe|soothed)\b', 0.3),
+
+    # Time-related calm (weight: 0.2)
+    (r'\b(morning|evening|night|dawn|dusk|twilight)\b', 0.2),
+    (r'\b(weekend|holiday|vacation|break|pause|moment)\b', 0.2)
+]
+
+LOW_ENERGY_PATTERNS = [
+    # Direct low energy words (weight: 0.4)
+    (r'\b(tired|exhausted|fatigued|drained|weary|sleepy)\b', 0.4),
+    (r'\b(lethargic|sluggish|low energy|no energy|lack of energy)\b', 0.4),
+
+    # Feeling low expressions (weight: 0.4)
+    (r'\b(feeling low|feeling down|feeling drained|feeling exhausted)\b', 0.4),
+    (r'\b(feel low|feel down|feel drained|feel exhausted)\b', 0.4),
+    (r'\b(am low|am down|am drained|am exhausted)\b', 0.4),
+    (r'\b(is low|is down|is drained|is exhausted)\b', 0.4),
+
+    # Burnout related (weight: 0.3)
+    (r'\b(burned out|worn out|spent|depleted|drowsy|groggy)\b', 0.3),
+    (r'\b(listless|apathetic|unmotivated|uninspired|unenergetic)\b', 0.3),
+
+    # Energy depletion (weight: 0.3)
+    (r'\b(low battery|running on empty|out of steam|out of gas)\b', 0.3),
+    (r'\b(need rest|need sleep|need break|need recharge)\b', 0.3),
+
+    # Physical exhaustion (weight: 0.2)
+    (r'\b(heavy|weighed down|slow|slowing down|can\'t move)\b', 0.2),
+    (r'\b(weak|weakness|powerless|helpless|overwhelmed)\b', 0.2),
+
+    # Mental exhaustion (weight: 0.2)
+    (r'\b(mentally tired|brain fog|can\'t think|mind blank)\b', 0.2),
+    (r'\b(overworked|stressed out|pushed too hard|too much)\b', 0.2),
+
+    # Additional low energy expressions (weight: 0.3)
+    (r'\b(not feeling well|not feeling good|not feeling great)\b', 0.3),
+    (r'\b(not up to it|not up for it|not in the mood)\b', 0.3),
+    (r'\b(no motivation|no drive|no energy|no strength)\b', 0.3),
+    (r'\b(too tired|too exhausted|too drained|too weary)\b', 0.3)
+]
+
+# Additional boost for "feeling low" and similar phrases, applied after the
+# low energy multiplier. Unlike the tables it allows any run of whitespace.
+FEELING_LOW_PATTERN = re.compile(r'\b(feeling|feel|am|is)\s+low\b')
+FEELING_LOW_BOOST = 0.3
+
+# (name, patterns, multiplier applied when the score is non-zero)
+DETECTORS = [
+    ('motivation', MOTIVATION_PATTERNS, 1.5),
+    ('love', LOVE_PATTERNS, None),
+    ('heartbreak', HEARTBREAK_PATTERNS, 1.5),
+    ('calm', CALM_PATTERNS, 1.5),
+    ('low_energy', LOW_ENERGY_PATTERNS, 1.5),
+]
+
+LexiconScores = namedtuple('LexiconScores', [name for name, _, _ in DETECTORS])
+
+_ALTERNATION_RE = re.compile(r'^\\b\((.+)\)\\b$')
+
+
+def _is_word_char(ch):
+    # Same definition as \w for str patterns
+    return ch.isalnum() or ch == '_'
+
+
+def _parse_alternatives(pattern):
+    """Split a ``\\b(a|b|c)\\b`` table entry into its literal alternatives"""
+    match = _ALTERNATION_RE.match(pattern)
+    if not match:
+        raise ValueError(f'Unsupported lexicon pattern: {pattern}')
+    alternatives = [alt.replace("\\'", "'") for alt in match.group(1).split('|')]
+    for alt in alternatives:
+        if not re.fullmatch(r"[\w ']+", alt):
+            raise ValueError(f'Lexicon alternative is not a literal phrase: {alt!r}')
+        if not (_is_word_char(alt[0]) and _is_word_char(alt[-1])):
+            raise ValueError(f'Lexicon alternative must start and end with a word character: {alt!r}')
+    return alternatives
+
+
+class LexiconScanner:
+    """Scores every detector from one scan of the text.
+
+    A single combined regex finds the positions where any phrase from any
+    table starts on a word boundary and ends on one. At those positions a
+    character trie lists every phrase that matches there, and each pattern
+    then takes its first-listed alternative unless it is still inside its
+    previous match, which is exactly how ``re.findall`` counts.
+    """
+
+    def __init__(self, detectors=DETECTORS):
+        self.names = [name for name, _, _ in detectors]
+        self._weights = []
+        self._detector_slices = []
+        self._boosts = []
+        phrase_patterns = {}
+
+        pattern_index = 0
+        for name, patterns, boost in detectors:
+            start = pattern_index
+            for pattern, weight in patterns:
+                for rank, phrase in enumerate(_parse_alternatives(pattern)):
+                    entries = phrase_patterns.setdefault(phrase, [])
+                    if not any(index == pattern_index for index, _ in entries):
+                        entries.append((pattern_index, rank))
+                self._weights.append(weight)
+                pattern_index += 1
+            self._detector_slices.append((start, pattern_index))
+            self._boosts.append(boost)
+
+        self._pattern_count = pattern_index
+        self._phrase_patterns = {
+            phrase: tuple((index, rank, len(phrase)) for index, rank in entries)
+            for phrase, entries in phrase_patterns.items()
+        }
+
+        self._trie = {}
+        for phrase in self._phrase_patterns:
+            node = self._trie
+            for ch in phrase:
+                node = node.setdefault(ch, {})
+            node[None] = phrase
+
+        alternation = '|'.join(
+            re.escape(phrase) for phrase in sorted(self._phrase_patterns, key=len, reverse=True)
+        )
+        self._candidates = re.compile(r'\b(?=(?:' + alternation + r')\b)')
+
+    def _phrases_at(self, text, start):
+        node = self._trie
+        length = len(text)
+        position = start
+        found = []
+        while position < length:
+            node = node.get(text[position])
+            if node is None:
+                break
+            position += 1
+            phrase = node.get(None)
+            if phrase is not None and (position == length or not _is_word_char(text[position])):
+                found.append(phrase)
+        return found
+
+    def counts(self, text_lower):
+        """Count ``re.findall`` matches for every pattern in one scan"""
+        counts = [0] * self._pattern_count
+        next_free = [0] * self._pattern_count
+        phrase_patterns = self._phrase_patterns
+
+        for match in self._candidates.finditer(text_lower):
+            start = match.start()
+            best = {}
+            for phrase in self._phrases_at(text_lower, start):
+                for index, rank, length in phrase_patterns[phrase]:
+                    current = best.get(index)
+                    if current is None or rank < current[0]:
+                        best[index] = (rank, length)
+            for index, (_, length) in best.items():
+                if start >= next_free[index]:
+                    counts[index] += 1
+                    next_free[index] = start + length
+
+        return counts
+
+    def score(self, text):
+        """Return all detector scores for ``text`` as a ``LexiconScores``"""
+        text_lower = text.lower()
+        counts = self.counts(text_lower)
+        weights = self._weights
+
+        scores = []
+        for (start, end), boost in zip(self._detector_slices, self._boosts):
+            score = 0
+            for index in range(start, end):
+                if counts[index]:
+                    score += counts[index] * weights[index]
+            if boost is not None and score > 0:
+                score *= boost
+            scores.append(score)
+
+        scores = LexiconScores(*scores)
+        if FEELING_LOW_PATTERN.search(text_lower):
+            scores = scores._replace(low_energy=scores.low_energy + FEELING_LOW_BOOST)
+        return scores
+
+
+scanner = LexiconScanner()
+
+
+def score_text(text):
+    """Score text against every mood lexicon in a single pass"""
+    return scanner.score(text)
+
+
+def phrases(detectors=DETECTORS):
+    """Every literal phrase in the tables, in table order and without repeats"""
+    seen = {}
+    for _, patterns, _ in detectors:
+        for pattern, _ in patterns:
+            for phrase in _parse_alternatives(pattern):
+                seen.setdefault(phrase, None)
+    return list(seen)
+
+
+def detect_motivation(text):
+    """Directly detect motivation using pattern matching"""
+    return score_text(text).motivation
+
+
+def detect_love(text):
+    """Directly detect love and relationship-related emotions"""
+    return score_text(text).love
+
+
+def detect_heartbreak(text):
+    """Directly detect heartbreak and emotional pain related emotions"""
+    return score_text(text).heartbreak
+
+
+def detect_calm(text):
+    """Directly detect calm and relaxed states"""
+    return score_text(text).calm
+
+
+def detect_low_energy(text):
+    """Directly detect low energy and fatigue-related states"""
+    return score_text(text).low_energy
+
+
+def reference_scores(text):
+    """Score text the original way, one ``re.findall`` per pattern.
+
+    Kept only as the reference for ``check_parity``.
+    """
+    text_lower = text.lower()
+    scores = []
+    for _, patterns, boost in DETECTORS:
+        score = 0
+        for pattern, weight in patterns:
+            matches = re.findall(pattern, text_lower)
+            if matches:
+                score += len(matches) * weight
+        if boost is not None and score > 0:
+            score *= boost
+        scores.append(score)
+
+    scores = LexiconScores(*scores)
+    if re.search(r'\b(feeling|feel|am|is)\s+low\b', text_lower):
+        scores = scores._replace(low_energy=scores.low_energy + FEELING_LOW_BOOST)
+    return scores
+
+
+PARITY_CORPUS = [
+    "",
+    "I am so motivated to achieve my goals this year, never give up!",
+    "I'm feeling low and tired, can't think straight. Brain fog all day.",
+    "We broke up last night and my heart hurts. I miss you so much.",
+    "A calm morning, yoga by the ocean, clear mind, resting and relaxing.",
+    "I love you forever and always, forever my partner, my husband, my love.",
+    "Clear mind clear clear mind, rest resting rest, night dawn night.",
+    "Feeling   low\tagain; feel\nlow. Is low? am low!",
+    "Heartbreaking heartbreak: broken heart, heart ache, emotional pain.",
+    "Not in the mood, not up for it, too tired, too much, stressed out.",
+    "TIRED. EXHAUSTED. Can't Move. CAN'T THINK.",
+    "progress progress progressive_progress progress_ 'progress'",
+    "Ünïcödé lövé café loves lovely love-love love_you love you",
+    "I am going to plan to aim to work, working to improve, improving, improved.",
+    "Taken for granted, taken, left alone, left behind, unloved and unwanted.",
+]
+
+
+def check_parity(texts):
+    """Return ``(text, expected, actual)`` for every text where the scanner
+    disagrees with the original per-pattern ``re.findall`` scoring"""
+    mismatches = []
+    for text in texts:
+        expected = reference_scores(text)
+        actual = score_text(text)
+        if tuple(expected) != tuple(actual):
+            mismatches.append((text, expected, actual))
+    return mismatches
+
+
+if __name__ == '__main__':
+    corpus = list(PARITY_CORPUS)
+    # Long entries exercise overlap handling across many repeated phrases
+    corpus.append(' '.join(PARITY_CORPUS) * 20)
+    corpus.extend(open(path, encoding='utf-8').read() for path in sys.argv[1:])
+
+    mismatches = check_parity(corpus)
+    for text, expected, actual in mismatches:
+        print(f"Mismatch for {text[:60]!r}: expected {expected}, got {actual}")
+    print(f"Checked {len(corpus)} texts, {len(mismatches)} mismatches")
+    sys.exit(1 if mismatches else 0)
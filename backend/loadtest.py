@@ -0,0 +1,366 @@
+"""Load-test harness that runs offline.
+
+The harness boots ``app`` in a separate server process. By default that
+process uses in-memory MongoDB (mongomock, ``pip install mongomock``) and
+``FakeEmotionModel``, whose latency profile is configurable. It then drives
+the API from concurrent virtual users, each of which registers and logs in
+first. The scenarios are:
+
+- ``analyze``: analyze a text, then save it as a journal entry with its mood.
+- ``dashboard``: load the journal, mood history, analytics and feedback
+  pages. Repeat loads revalidate with ``If-None-Match``, as a browser would.
+- ``feedback``: post music feedback.
+- ``export``: download the journal PDF.
+- ``auth``: register and log in.
+- ``mixed``: a weighted blend of the above.
+
+The report lists throughput, latency percentiles and error rate per
+endpoint. It also gives the server process's CPU time per request, so
+``--model real`` (the configured emotion model) measures real capacity per
+core. ``--mongo config`` uses the MongoDB from the usual ``MONGODB_*``
+settings instead of the in-memory stand-in.
+
+    python loadtest.py --scenario mixed --users 16 --duration 30 --latency-ms 25 --per-text-ms 3
+    python loadtest.py --scenario analyze --model real --users 4
+"""
+import argparse
+import base64
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+SCENARIOS = {
+    'mixed': {'analyze': 5, 'dashboard': 4, 'feedback': 1, 'export': 0.2, 'auth': 0.3},
+    'analyze': {'analyze': 1},
+    'dashboard': {'dashboard': 1},
+    'feedback': {'feedback': 1},
+    'export': {'export': 1},
+    'auth': {'auth': 1},
+}
+
+
+def serve(conn, options):
+    """Server process: boot the app on an ephemeral port and answer commands"""
+    os.environ.update(options['env'])
+    try:
+        from werkzeug.serving import make_server
+
+        import app as app_module
+
+        if options['mongo'] == 'memory':
+            import mongoengine
+            mongoengine.disconnect_all()
+            mongoengine.connect(options['db'], host='mongomock://localhost')
+
+        if options['model'] == 'fake':
+            from fake_model import FakeEmotionModel
+            app_module.emotion_model = FakeEmotionModel(
+                options['latency_ms'], options['per_text_ms'], options['jitter']
+            )
+        else:
+            # Pay the model load before the clock starts
+            app_module.emotion_model.load()
+
+        # The app's own access records are enough; skip the dev server's lines
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    except Exception as e:
+        conn.send(f'{type(e).__name__}: {e}')
+        return
+    threading.Thread(target=server.serve_forever, name='loadtest-server', daemon=True).start()
+    conn.send(server.server_port)
+
+    while True:
+        command = conn.recv()
+        if command == 'cpu':
+            conn.send(time.process_time())
+        elif command == 'stop':
+            server.shutdown()
+            conn.send(None)
+            return
+
+
+class Stats:
+    """Latencies and errors per request name, shared by every virtual user"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, name, seconds, status):
+        with self._lock:
+            self.latencies[name].append(seconds)
+            self.statuses[name][status] += 1
+            if not isinstance(status, int) or status >= 400:
+                self.errors[name] += 1
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+class VirtualUser:
+    """One simulated client with its own account and keep-alive connection"""
+
+    def __init__(self, base_url, stats, texts, rng):
+        parts = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+        self.stats = stats
+        self.texts = texts
+        self.rng = rng
+        self.token = None
+        self.user_id = None
+        self.etags = {}
+
+    def request(self, method, path, name, body=None, headers=None, record=True):
+        headers = dict(headers or {})
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as e:
+            self.connection.close()
+            response, data, status = None, b'', type(e).__name__
+        if record:
+            self.stats.record(name, time.perf_counter() - started, status)
+        return response, data
+
+    def json(self, *args, **kwargs):
+        response, data = self.request(*args, **kwargs)
+        if response is None or not data or response.getheader('Content-Type', '').split(';')[0] != 'application/json':
+            return response, None
+        return response, json.loads(data)
+
+    # Actions
+
+    def auth(self, record=True):
+        username = f'load-{uuid.uuid4().hex[:12]}'
+        credentials = {'username': username, 'email': f'{username}@example.com', 'password': 'load-test-password'}
+        self.token = None
+        self.json('POST', '/api/auth/register', 'POST /api/auth/register', credentials, record=record)
+        _, body = self.json('POST', '/api/auth/login', 'POST /api/auth/login', {
+            'username': username, 'password': credentials['password']
+        }, record=record)
+        if body and body.get('token'):
+            self.token = body['token']
+            # The JWT subject is the user id; no need to verify our own token
+            claims = self.token.split('.')[1]
+            self.user_id = json.loads(base64.urlsafe_b64decode(claims + '=' * (-len(claims) % 4)))['sub']
+        self.etags.clear()
+
+    def seed(self, entries):
+        """Give the account some history before the clock starts"""
+        if entries:
+            rows = [{'content': self.rng.choice(self.texts)} for _ in range(entries)]
+            self.request('POST', '/api/journal/import', 'seed', {'entries': rows, 'analyze': True}, record=False)
+
+    def analyze(self):
+        # New entries are never in the analysis cache, so every text is unique
+        text = f'{self.rng.choice(self.texts)} ({uuid.uuid4().hex[:8]})'
+        _, mood = self.json('POST', '/api/analyze-mood?detail=minimal', 'POST /api/analyze-mood', {'text': text})
+        body = {'content': text}
+        if mood and 'primary_mood' in mood:
+            body['mood'] = {key: mood[key] for key in ('primary_mood', 'confidence', 'emotions')}
+        self.request('POST', '/api/journal', 'POST /api/journal', body)
+
+    def dashboard(self):
+        for path, name in (
+            ('/api/journal?limit=50', 'GET /api/journal'),
+            (f'/api/mood-history/{self.user_id}', 'GET /api/mood-history/<user_id>'),
+            ('/api/mood-analytics?days=30', 'GET /api/mood-analytics'),
+            ('/api/music-feedback?limit=50', 'GET /api/music-feedback'),
+        ):
+            headers = {'If-None-Match': self.etags[path]} if path in self.etags else None
+            response, _ = self.request('GET', path, name, headers=headers)
+            if response is not None and response.getheader('ETag'):
+                self.etags[path] = response.getheader('ETag')
+
+    def feedback(self):
+        self.request('POST', '/api/music-feedback', 'POST /api/music-feedback', {
+            'playlist_id': f'playlist-{self.rng.randrange(50)}',
+            'mood_score': self.rng.randint(1, 10),
+            'feedback_text': 'load test'
+        })
+
+    def export(self):
+        self.request('GET', '/api/journal/export', 'GET /api/journal/export')
+
+
+def run_users(base_url, scenario, users, duration, think_ms, seed_entries, texts, seed, on_start=None):
+    """Run the scenario; ``on_start`` is called as the measured window opens"""
+    stats = Stats()
+    actions, weights = zip(*SCENARIOS[scenario].items())
+    stop_at = [None]
+    ready = threading.Barrier(users + 1)
+
+    def work(index):
+        user = VirtualUser(base_url, stats, texts, random.Random(seed + index))
+        user.auth(record=False)
+        user.seed(seed_entries)
+        ready.wait()
+        while time.perf_counter() < stop_at[0]:
+            getattr(user, user.rng.choices(actions, weights)[0])()
+            if think_ms:
+                time.sleep(user.rng.expovariate(1000.0 / think_ms))
+
+    threads = [threading.Thread(target=work, args=(index,), daemon=True) for index in range(users)]
+    for thread in threads:
+        thread.start()
+    # Sign-up and seeding happen before the measured window
+    stop_at[0] = float('inf')
+    ready.wait()
+    if on_start is not None:
+        on_start()
+    started = time.perf_counter()
+    stop_at[0] = started + duration
+    for thread in threads:
+        thread.join()
+    return stats, time.perf_counter() - started
+
+
+def report(stats, elapsed, cpu_seconds=None):
+    print(f"{'request':<34} {'count':>7} {'err%':>6} {'req/s':>8} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)")
+    total = errors = 0
+    summary = {}
+    for name in sorted(stats.latencies):
+        values = sorted(stats.latencies[name])
+        count, failed = len(values), stats.errors[name]
+        total += count
+        errors += failed
+        row = {
+            'count': count,
+            'errors': failed,
+            'error_rate': failed / count,
+            'rps': count / elapsed,
+            'mean_ms': statistics.fmean(values) * 1000,
+            'p50_ms': percentile(values, 0.50) * 1000,
+            'p95_ms': percentile(values, 0.95) * 1000,
+            'p99_ms': percentile(values, 0.99) * 1000,
+            'max_ms': values[-1] * 1000,
+            'statuses': {str(status): n for status, n in stats.statuses[name].items()},
+        }
+        summary[name] = row
+        print(
+            f"{name:<34} {count:>7} {row['error_rate']:>6.1%} {row['rps']:>8.1f} {row['mean_ms']:>8.1f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}"
+        )
+    print(f"\n{total} requests in {elapsed:.1f}s: {total / elapsed:.1f} req/s, {errors} errors ({errors / max(total, 1):.1%})")
+
+    totals = {'requests': total, 'errors': errors, 'seconds': elapsed, 'rps': total / elapsed}
+    if cpu_seconds is not None and total:
+        totals['server_cpu_seconds'] = cpu_seconds
+        totals['server_cpu_ms_per_request'] = cpu_seconds / total * 1000
+        totals['requests_per_core_second'] = total / cpu_seconds if cpu_seconds else None
+        print(
+            f"Server CPU: {cpu_seconds:.1f}s ({cpu_seconds / elapsed:.2f} cores busy), "
+            f"{totals['server_cpu_ms_per_request']:.2f} ms per request, "
+            f"~{totals['requests_per_core_second'] or 0:.0f} req/s per core"
+        )
+    return {'requests': summary, 'totals': totals}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Drive concurrent API scenarios against a local server')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='mixed')
+    parser.add_argument('--users', type=int, default=8, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=20.0, help='Measured seconds')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='Mean pause between actions per user')
+    parser.add_argument('--seed-entries', type=int, default=20, help='Journal entries imported per user beforehand')
+    parser.add_argument('--model', choices=('fake', 'real'), default='fake')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Fake model: fixed cost per forward pass')
+    parser.add_argument('--per-text-ms', type=float, default=2.0, help='Fake model: extra cost per text in a batch')
+    parser.add_argument('--jitter', type=float, default=0.25, help='Fake model: log-normal sigma applied to each pass')
+    parser.add_argument('--mongo', choices=('memory', 'config'), default='memory')
+    parser.add_argument('--target', help='Drive an already running server at this URL instead')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', help='Also write the report to this file')
+    args = parser.parse_args(argv)
+
+    from benchmarks import make_corpus
+
+    texts = [text for variant in make_corpus(args.seed, 25).values() for text in variant]
+
+    server = conn = None
+    if args.target:
+        base_url = args.target
+    else:
+        workdir = tempfile.mkdtemp(prefix='moodtunes-loadtest-')
+        options = {
+            'env': {
+                'EMOTION_MODEL_WARMUP': 'false',
+                'ANALYSIS_CACHE_MONGO': 'false',
+                'EXPORT_CACHE_DIR': os.path.join(workdir, 'export_cache'),
+                'EXPORT_ARTIFACT_DIR': os.path.join(workdir, 'export_artifacts'),
+                'PROFILE_TOKEN': '',
+                'PROFILE_SAMPLE_RATE': '0',
+                'LOG_LEVEL': 'WARNING',
+            },
+            'mongo': args.mongo,
+            'db': f'loadtest_{uuid.uuid4().hex[:8]}',
+            'model': args.model,
+            'latency_ms': args.latency_ms,
+            'per_text_ms': args.per_text_ms,
+            'jitter': args.jitter,
+        }
+        context = multiprocessing.get_context('spawn')
+        conn, child_conn = context.Pipe()
+        server = context.Process(target=serve, args=(child_conn, options), daemon=True)
+        server.start()
+        port = conn.recv()
+        if not isinstance(port, int):
+            print(f"Server failed to start: {port}")
+            return 2
+        base_url = f'http://127.0.0.1:{port}'
+
+    print(f"Scenario {args.scenario}: {args.users} users for {args.duration:.0f}s against {base_url} "
+          f"({args.model} model, {args.mongo if not args.target else 'remote'} MongoDB)")
+    cpu_before = []
+
+    def server_cpu():
+        conn.send('cpu')
+        return conn.recv()
+
+    stats, elapsed = run_users(
+        base_url, args.scenario, args.users, args.duration, args.think_ms, args.seed_entries, texts, args.seed,
+        on_start=(lambda: cpu_before.append(server_cpu())) if conn is not None else None
+    )
+    cpu_seconds = None
+    if conn is not None:
+        cpu_seconds = server_cpu() - cpu_before[0]
+        conn.send('stop')
+        conn.recv()
+        server.join(timeout=10)
+
+    result = report(stats, elapsed, cpu_seconds)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return 1 if result['totals']['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
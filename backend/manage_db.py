@@ -0,0 +1,282 @@
+"""Index management and query-plan audit for the user-facing collections.
+
+Indexes are declared once, in the ``meta``/``unique`` definitions of the
+models in ``MANAGED_DOCUMENTS``. This command builds them and audits them:
+
+    python manage_db.py sync [--dry-run] [--keep-stale]
+    python manage_db.py audit [--max-examined-ratio 2]
+    python manage_db.py                 # sync, then audit
+    python manage_db.py utc-timestamps --timezone Europe/Berlin [--dry-run]
+
+``sync`` creates missing indexes with ``background=True`` and drops indexes
+that are no longer declared. ``audit`` runs ``explain()`` on every query
+shape ``app.py`` issues against those collections. It exits non-zero when a
+plan contains a COLLSCAN or an in-memory SORT, or examines more than
+``--max-examined-ratio`` documents per document returned.
+
+``utc-timestamps`` is the one-off cutover to UTC ``created_at`` values.
+Journal entries and music feedback used to default ``created_at`` to the
+host's local time. It converts the documents whose ``created_at`` is the
+local time, in ``--timezone``, at which their ``_id`` was generated, and
+then rebuilds the affected users' daily rollups. Documents already in UTC
+and imported entries with their own timestamps don't match, so running it
+again changes nothing.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from mongoengine import connect
+from pymongo import UpdateOne
+
+from config import Config
+from models import JournalEntry, MoodDailyRollup, MusicFeedback, User
+from journal_export import export_queryset
+from mood_analytics import parse_timezone
+from pagination import page_query
+from rollups import rebuild_user
+
+MANAGED_DOCUMENTS = (User, JournalEntry, MusicFeedback, MoodDailyRollup)
+
+# Plan stages that mean the query is not answered by an index
+REJECTED_STAGES = ('COLLSCAN', 'SORT')
+
+
+def _raw_collection(document):
+    # Documents' own _get_collection() auto-creates indexes, which would
+    # defeat --dry-run, so inspect the collection through the database
+    return document._get_db()[document._get_collection_name()]
+
+
+def declared_indexes(document):
+    """Return ``[(keys, options), ...]`` declared on a document class"""
+    declared = []
+    for spec in document._meta['index_specs']:
+        options = {key: value for key, value in spec.items() if key not in ('fields', 'cls')}
+        declared.append((list(spec['fields']), options))
+    return declared
+
+
+def sync_indexes(documents=MANAGED_DOCUMENTS, drop_stale=True, dry_run=False):
+    """Build missing indexes and drop undeclared ones; returns the actions taken"""
+    actions = []
+    for document in documents:
+        collection = _raw_collection(document)
+        existing = {
+            name: info for name, info in collection.index_information().items() if name != '_id_'
+        }
+        existing_keys = [list(info['key']) for info in existing.values()]
+        declared = declared_indexes(document)
+
+        for keys, options in declared:
+            if keys in existing_keys:
+                continue
+            actions.append(('create', collection.name, keys))
+            if not dry_run:
+                collection.create_index(keys, background=True, **options)
+
+        if drop_stale:
+            declared_keys = [keys for keys, _ in declared]
+            for name, info in existing.items():
+                if list(info['key']) in declared_keys:
+                    continue
+                actions.append(('drop', collection.name, name))
+                if not dry_run:
+                    collection.drop_index(name)
+    return actions
+
+
+def _sample_values():
+    """Real ids from the database so plans reflect actual data, with fallbacks"""
+    user = User.objects.only('id', 'username', 'email').first()
+    entry = JournalEntry.objects.only('id', 'user_id', 'created_at').order_by('-created_at').first()
+    feedback = MusicFeedback.objects.only('id', 'created_at').order_by('-created_at').first()
+
+    user_id = entry.user_id.id if entry else (user.id if user else ObjectId())
+    return {
+        'username': user.username if user else 'audit-user',
+        'email': user.email if user else 'audit@example.com',
+        'user_id': user_id,
+        'entry_id': entry.id if entry else ObjectId(),
+        'entry_position': (entry.created_at, entry.id) if entry else None,
+        'feedback_position': (feedback.created_at, feedback.id) if feedback else None,
+    }
+
+
+def query_shapes(sample, page_limit=Config.PAGE_DEFAULT_LIMIT):
+    """Every query ``app.py`` runs against the managed collections, by name"""
+    user_id = sample['user_id']
+    return [
+        ('user by username', User.objects(username=sample['username']).limit(1)),
+        ('user by email', User.objects(email=sample['email']).limit(1)),
+        ('user by id', User.objects(id=user_id).limit(1)),
+        ('journal entry by id and user',
+         JournalEntry.objects(id=sample['entry_id'], user_id=user_id).only('mood_data', 'mood_status').limit(1)),
+        ('journal history', JournalEntry.objects(user_id=user_id).order_by('-created_at')),
+        ('journal export range',
+         export_queryset(user_id, datetime(2000, 1, 1), datetime(2100, 1, 1)).order_by('-created_at')),
+        ('journal export version / validator', JournalEntry.objects(user_id=user_id).order_by('-updated_at').only('updated_at').limit(1)),
+        ('journal analytics window', JournalEntry.objects(user_id=user_id, created_at__gte=datetime(2000, 1, 1))),
+        ('journal list', JournalEntry.objects(user_id=user_id).order_by('-created_at', '-id')),
+        ('journal first page', page_query(JournalEntry.objects(user_id=user_id), None, page_limit)),
+        ('journal next page',
+         page_query(JournalEntry.objects(user_id=user_id), sample['entry_position'], page_limit)),
+        ('mood rollups window',
+         MoodDailyRollup.objects(user_id=user_id, day__gte='2000-01-01', day__lte='2100-01-01')),
+        ('music feedback analytics window',
+         MusicFeedback.objects(user_id=user_id, created_at__gte=datetime(2000, 1, 1))),
+        ('music feedback validator',
+         MusicFeedback.objects(user_id=user_id).order_by('-created_at').only('created_at').limit(1)),
+        ('music feedback list', MusicFeedback.objects(user_id=user_id).order_by('-created_at', '-id')),
+        ('music feedback first page', page_query(MusicFeedback.objects(user_id=user_id), None, page_limit)),
+        ('music feedback next page',
+         page_query(MusicFeedback.objects(user_id=user_id), sample['feedback_position'], page_limit)),
+    ]
+
+
+def plan_stages(plan):
+    """All stage names in an explain plan, including nested input stages"""
+    stages = []
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(plan_stages(value))
+    return stages
+
+
+def check_plan(explain, max_examined_ratio):
+    """Return a list of problems found in one ``explain()`` result"""
+    problems = []
+    stages = plan_stages(explain.get('queryPlanner', {}).get('winningPlan', {}))
+    for stage in REJECTED_STAGES:
+        if stage in stages:
+            problems.append(f'{stage} in winning plan')
+
+    stats = explain.get('executionStats', {})
+    examined = stats.get('totalDocsExamined', 0)
+    returned = stats.get('nReturned', 0)
+    if examined > max(returned, 1) * max_examined_ratio:
+        problems.append(f'examined {examined} documents to return {returned}')
+    return problems
+
+
+def audit_queries(max_examined_ratio=2.0):
+    """Explain every query shape; returns ``[(name, stages, problems), ...]``"""
+    results = []
+    for name, queryset in query_shapes(_sample_values()):
+        explain = queryset.explain()
+        stages = plan_stages(explain.get('queryPlanner', {}).get('winningPlan', {}))
+        results.append((name, stages, check_plan(explain, max_examined_ratio)))
+    return results
+
+
+def local_timestamp_updates(document, zone, tolerance):
+    """``(user ids, updates)`` converting local ``created_at`` values to UTC.
+
+    A document qualifies when its ``created_at`` is within ``tolerance`` of
+    its ``_id``'s generation time in ``zone`` but not of the UTC time.
+    """
+    user_ids = set()
+    updates = []
+    now = datetime.utcnow()
+    for raw in _raw_collection(document).find({}, {'created_at': 1, 'user_id': 1}):
+        created_at = raw.get('created_at')
+        if created_at is None:
+            continue
+        inserted = raw['_id'].generation_time
+        local = inserted.astimezone(zone).replace(tzinfo=None)
+        if abs(created_at - local) > tolerance or abs(created_at - inserted.replace(tzinfo=None)) <= tolerance:
+            continue
+        converted = created_at.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+        changes = {'created_at': converted}
+        if document is JournalEntry:
+            # Cached PDF exports are keyed by the latest updated_at
+            changes['updated_at'] = now
+        updates.append(UpdateOne({'_id': raw['_id'], 'created_at': created_at}, {'$set': changes}))
+        user_ids.add(raw.get('user_id'))
+    return user_ids, updates
+
+
+def convert_local_timestamps(zone, tolerance=timedelta(minutes=5), dry_run=False, batch_size=1000):
+    """Convert local ``created_at`` values of entries and feedback to UTC;
+    returns ``{collection: documents}`` and the users whose rollups were rebuilt"""
+    converted = {}
+    user_ids = set()
+    for document in (JournalEntry, MusicFeedback):
+        users, updates = local_timestamp_updates(document, zone, tolerance)
+        converted[document._get_collection_name()] = len(updates)
+        user_ids |= users
+        if dry_run:
+            continue
+        collection = _raw_collection(document)
+        for start in range(0, len(updates), batch_size):
+            collection.bulk_write(updates[start:start + batch_size], ordered=False)
+
+    user_ids.discard(None)
+    if not dry_run:
+        for user_id in user_ids:
+            rebuild_user(user_id)
+    return converted, sorted(user_ids)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manage MongoDB indexes, audit query plans and convert local timestamps to UTC')
+    parser.add_argument('command', nargs='?', choices=('sync', 'audit', 'all', 'utc-timestamps'), default='all')
+    parser.add_argument('--dry-run', action='store_true', help='Report changes without applying them')
+    parser.add_argument('--keep-stale', action='store_true', help='Do not drop undeclared indexes')
+    parser.add_argument('--max-examined-ratio', type=float, default=2.0,
+                        help='Maximum documents examined per document returned')
+    parser.add_argument('--timezone',
+                        help="utc-timestamps: the host's timezone when the documents were written, "
+                             "e.g. Europe/Berlin or +02:00")
+    args = parser.parse_args(argv)
+
+    if args.command == 'utc-timestamps' and not args.timezone:
+        parser.error('utc-timestamps needs --timezone')
+
+    connect(**Config.MONGODB_SETTINGS)
+
+    if args.command == 'utc-timestamps':
+        try:
+            zone = parse_timezone(args.timezone)
+        except ValueError as ve:
+            parser.error(str(ve))
+        converted, user_ids = convert_local_timestamps(zone, dry_run=args.dry_run)
+        prefix = 'Would convert' if args.dry_run else 'Converted'
+        for collection, count in converted.items():
+            print(f"{prefix} {count} {collection} documents to UTC")
+        if not args.dry_run:
+            print(f"Rebuilt the daily rollups of {len(user_ids)} users")
+        return 0
+
+    if args.command in ('sync', 'all'):
+        actions = sync_indexes(drop_stale=not args.keep_stale, dry_run=args.dry_run)
+        prefix = 'Would ' if args.dry_run else ''
+        for action, collection, index in actions:
+            print(f"{prefix}{action} {collection}: {index}")
+        if not actions:
+            print("Indexes are up to date")
+
+    if args.command in ('audit', 'all'):
+        if args.dry_run and args.command == 'all':
+            print("Skipping audit: indexes were not synced (--dry-run)")
+            return 0
+        failures = 0
+        for name, stages, problems in audit_queries(args.max_examined_ratio):
+            status = 'FAIL' if problems else 'ok'
+            print(f"{status:4} {name}: {' <- '.join(stages)}" + (f" ({'; '.join(problems)})" if problems else ''))
+            failures += bool(problems)
+        if failures:
+            print(f"{failures} queries are not served by an index")
+            return 1
+        print("All queries are served by an index")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
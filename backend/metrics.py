@@ -0,0 +1,231 @@
+"""In-process Prometheus metrics, served as text at ``/metrics``.
+
+Counters and histograms keep plain floats per label combination, updated
+under a per-metric lock. A histogram observation is one bisect over fixed
+bucket bounds and three additions, so the instrumentation is cheap enough
+to leave on in production. Values that other components already track are
+read at scrape time instead. These include cache hit counts, the inference
+queue depth and resident memory, and they are registered as callbacks.
+
+``span(pipeline, stage)`` times one stage of a request pipeline into
+``pipeline_stage_seconds``. If the stage raises, it also counts the error in
+``pipeline_errors_total``. ``init_request_metrics`` adds per-endpoint request
+counts and latency.
+
+Every process has its own registry. Under a multi-worker server, each
+scrape sees the worker that happened to answer it.
+"""
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request
+
+# Seconds; from sub-millisecond regex passes up to multi-second PDF renders
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labelvalues, value in sorted(values.items()):
+            yield self.name, _labels(self.labelnames, labelvalues), value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [count per bucket..., count above the last bound, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labelvalues)
+            if counts is None:
+                counts = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {labelvalues: list(counts) for labelvalues, counts in self._values.items()}
+        for labelvalues, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield f'{self.name}_bucket', _labels(self.labelnames, labelvalues, ('le', _number(float(bound)))), cumulative
+            yield f'{self.name}_sum', _labels(self.labelnames, labelvalues), counts[-1]
+            yield f'{self.name}_count', _labels(self.labelnames, labelvalues), cumulative
+
+
+class Collected:
+    """A counter or gauge whose values are read from ``collect()`` at scrape time.
+
+    ``collect`` returns a number, or ``{labelvalues: number}`` when the
+    metric has labels.
+    """
+
+    def __init__(self, name, documentation, collect, kind='gauge', labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        values = self.collect()
+        if not self.labelnames:
+            values = {(): values}
+        for labelvalues, value in values.items():
+            yield self.name, _labels(self.labelnames, labelvalues), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} is already registered')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def collected(self, name, documentation, collect, kind='gauge', labelnames=()):
+        return self.register(Collected(name, documentation, collect, kind, labelnames))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                # A failing collector must not take the other metrics down with it
+                continue
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(f'{name}{labels} {_number(value)}' for name, labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+stage_seconds = REGISTRY.histogram(
+    'pipeline_stage_seconds', 'Time spent in each stage of a request pipeline', ('pipeline', 'stage')
+)
+stage_errors = REGISTRY.counter(
+    'pipeline_errors_total', 'Exceptions raised by each pipeline stage', ('pipeline', 'stage')
+)
+request_seconds = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint', ('endpoint', 'method')
+)
+requests_total = REGISTRY.counter(
+    'http_requests_total', 'Requests by endpoint and status code', ('endpoint', 'method', 'status')
+)
+
+
+class span:
+    """``with span('analysis', 'model'):`` times the block into ``pipeline_stage_seconds``"""
+
+    __slots__ = ('pipeline', 'stage', 'started')
+
+    def __init__(self, pipeline, stage):
+        self.pipeline = pipeline
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stage_seconds.observe(time.perf_counter() - self.started, self.pipeline, self.stage)
+        if exc_type is not None:
+            stage_errors.inc(self.pipeline, self.stage)
+        return False
+
+
+def resident_memory_bytes():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # No procfs: report the peak instead (kilobytes on Linux, bytes on macOS)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+REGISTRY.collected('process_resident_memory_bytes', 'Resident memory of this process', resident_memory_bytes)
+
+
+def init_request_metrics(app):
+    """Count and time every request to ``app`` by endpoint"""
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.get('metrics_started')
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            request_seconds.observe(time.perf_counter() - started, endpoint, request.method)
+            requests_total.inc(endpoint, request.method, str(response.status_code))
+        return response
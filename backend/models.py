@@ -1,15 +1,30 @@
 from flask_mongoengine import MongoEngine
-from datetime import datetime
+from datetime import datetime, timezone
 from werkzeug.security import generate_password_hash, check_password_hash
 import json
 
 db = MongoEngine()
 
+# Timestamps are stored as naive UTC datetimes
+def as_utc(value):
+    """An aware UTC datetime for a stored (naive UTC) or aware timestamp"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def utc_isoformat(value):
+    """ISO 8601 with an explicit UTC offset, so clients convert to local time"""
+    return as_utc(value).isoformat()
+
 class User(db.Document):
     username = db.StringField(max_length=80, unique=True, required=True)
     email = db.StringField(max_length=120, unique=True, required=True)
     password_hash = db.StringField(max_length=256, required=True)
     created_at = db.DateTimeField(default=datetime.utcnow)
+    meta = {
+        # Indexes are built and audited by manage_db.py
+        'index_background': True
+    }
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -19,13 +34,21 @@ class User(db.Document):
 
 class JournalEntry(db.Document):
     content = db.StringField(required=True)
-    created_at = db.DateTimeField(default=datetime.now)
+    created_at = db.DateTimeField(default=datetime.utcnow)
     user_id = db.ReferenceField('User', required=True)
     mood_data = db.DictField()
+    # None for entries saved with (or without) mood synchronously; 'pending',
+    # 'done' or 'failed' while mood is filled in by the analysis job queue
+    mood_status = db.StringField(choices=('pending', 'done', 'failed'))
+    # Bumped on every write; keys cached exports of the user's journal
+    updated_at = db.DateTimeField(default=datetime.utcnow)
     meta = {
         'collection': 'journal_entries',
+        'index_background': True,
         'indexes': [
-            'user_id',
+            # Per-user newest-first listings and their (created_at, _id) cursors
+            ('user_id', '-created_at', '-id'),
+            ('user_id', '-updated_at'),
             'created_at'
         ]
     }
@@ -87,11 +110,91 @@ class MusicFeedback(db.Document):
     playlist_id = db.StringField(required=True)
     mood_score = db.IntField(required=True, min_value=1, max_value=10)
     feedback_text = db.StringField()
-    created_at = db.DateTimeField(default=datetime.now)
+    created_at = db.DateTimeField(default=datetime.utcnow)
     meta = {
         'collection': 'music_feedback',
+        'index_background': True,
         'indexes': [
-            'user_id',
+            # Per-user newest-first listings and their (created_at, _id) cursors
+            ('user_id', '-created_at', '-id'),
             'created_at'
         ]
-    }
\ No newline at end of file
+    }
+
+class AnalysisCacheEntry(db.Document):
+    key = db.StringField(primary_key=True)
+    response = db.DictField(required=True)
+    created_at = db.DateTimeField(default=datetime.utcnow)
+    expires_at = db.DateTimeField(required=True)
+    meta = {
+        'collection': 'analysis_cache',
+        'indexes': [
+            # Mongo removes each document once its own expires_at has passed
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0}
+        ]
+    }
+
+class AnalysisJob(db.Document):
+    entry = db.ReferenceField('JournalEntry', required=True)
+    status = db.StringField(required=True, default='queued', choices=('queued', 'running', 'done', 'failed'))
+    attempts = db.IntField(default=0)
+    max_attempts = db.IntField(default=3)
+    available_at = db.DateTimeField(default=datetime.utcnow)
+    locked_until = db.DateTimeField()
+    worker_id = db.StringField()
+    error = db.StringField()
+    created_at = db.DateTimeField(default=datetime.utcnow)
+    updated_at = db.DateTimeField(default=datetime.utcnow)
+    # Set once the job is done or failed
+    expires_at = db.DateTimeField()
+    meta = {
+        'collection': 'analysis_jobs',
+        'indexes': [
+            ('status', 'available_at'),
+            ('status', 'locked_until'),
+            'entry',
+            # Mongo removes each finished job once its own expires_at has passed
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0}
+        ]
+    }
+
+class ExportJob(db.Document):
+    user_id = db.ReferenceField('User', required=True)
+    status = db.StringField(required=True, default='queued', choices=('queued', 'running', 'done', 'failed'))
+    start = db.DateTimeField()
+    end = db.DateTimeField()
+    total_entries = db.IntField(default=0)
+    rendered_entries = db.IntField(default=0)
+    artifact_size = db.IntField()
+    error = db.StringField()
+    created_at = db.DateTimeField(default=datetime.utcnow)
+    updated_at = db.DateTimeField(default=datetime.utcnow)
+    finished_at = db.DateTimeField()
+    expires_at = db.DateTimeField(required=True)
+    meta = {
+        'collection': 'export_jobs',
+        'indexes': [
+            'user_id',
+            # Mongo removes each job once its own expires_at has passed
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0}
+        ]
+    }
+
+class MoodDailyRollup(db.Document):
+    """Per-user, per-day totals kept up to date with $inc as data is written"""
+    user_id = db.ReferenceField('User', required=True)
+    # Local date in Config.ROLLUP_TIMEZONE, YYYY-MM-DD
+    day = db.StringField(required=True)
+    entries = db.IntField(default=0)
+    # Entry count per primary mood ('.' and '$' escaped, see rollups.py)
+    moods = db.DictField()
+    confidence_total = db.FloatField(default=0.0)
+    confidence_count = db.IntField(default=0)
+    feedback_total = db.IntField(default=0)
+    feedback_count = db.IntField(default=0)
+    meta = {
+        'collection': 'mood_daily_rollups',
+        'indexes': [
+            {'fields': ['user_id', 'day'], 'unique': True}
+        ]
+    }
@@ -0,0 +1,226 @@
+"""Server-side mood analytics for the history dashboard.
+
+Two aggregation pipelines, one over ``journal_entries`` and one over
+``music_feedback``, group a user's recent history into local-time days,
+using the user's timezone. Everything else (weekly buckets, mood
+distribution, averages, trend) is folded from those per-day rows, so a
+response is a few small buckets however many entries the user has.
+
+Mood scores use the same scale as the frontend's ``MOOD_SCORES``. The trend
+uses the last-three-points rule of ``getMoodSummary``, but over per-day
+scores rather than the frontend's per-entry chart points, so the two can
+differ when a day has several entries.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from dateutil import tz
+
+from models import JournalEntry, MusicFeedback
+
+MOOD_SCORES = {
+    'Happy 😊': 10,
+    'Excited ⚡': 9,
+    'Loving 💝': 9,
+    'Motivated 💪': 8,
+    'Calm 😌': 9,
+    'Neutral 😐': 5,
+    'Nostalgic 🎭': 6,
+    'Surprised 😲': 8,
+    'Fearful 😰': 4,
+    'Sad 😢': 3,
+    'Angry 😠': 2,
+    'Disgusted 🤢': 2,
+    'Heartbroken 💔': 1
+}
+# Score of entries whose mood is missing or unknown
+DEFAULT_MOOD_SCORE = 5
+
+_OFFSET_RE = re.compile(r'^([+-])(\d{2}):?(\d{2})$')
+
+
+def parse_timezone(name):
+    """tzinfo for an IANA name (``Europe/Berlin``) or a UTC offset (``+05:30``)"""
+    match = _OFFSET_RE.match(name)
+    if match:
+        sign, hours, minutes = match.groups()
+        offset = timedelta(hours=int(hours), minutes=int(minutes))
+        if offset > timedelta(hours=14):
+            raise ValueError(f'Invalid UTC offset: {name}')
+        return timezone(-offset if sign == '-' else offset)
+    # Only zoneinfo database names; gettz also accepts POSIX TZ strings Mongo rejects
+    zone = tz.gettz(name) if name else None
+    if not isinstance(zone, tz.tzfile):
+        raise ValueError(f'Unknown timezone: {name}')
+    return zone
+
+
+def _mongo_timezone(name):
+    # Mongo accepts "+05:30" but not "+0530"
+    match = _OFFSET_RE.match(name)
+    return f'{match.group(1)}{match.group(2)}:{match.group(3)}' if match else name
+
+
+def analytics_window(days, zone, now=None):
+    """``(today, since)``: the user's local date and the UTC start of the window"""
+    now = now or datetime.now(timezone.utc)
+    today = now.astimezone(zone).date()
+    first_day = today - timedelta(days=days - 1)
+    local_start = datetime(first_day.year, first_day.month, first_day.day, tzinfo=zone)
+    since = local_start.astimezone(timezone.utc).replace(tzinfo=None)
+    return today, since
+
+
+def data_version(user_id):
+    """Changes whenever the user's entries or feedback are added or modified"""
+    entries = JournalEntry.objects(user_id=user_id)
+    feedback = MusicFeedback.objects(user_id=user_id)
+    latest_entry = entries.order_by('-updated_at').only('updated_at').first()
+    latest_feedback = feedback.order_by('-created_at', '-id').only('created_at').first()
+    return (
+        entries.count(),
+        latest_entry.updated_at.isoformat() if latest_entry and latest_entry.updated_at else None,
+        feedback.count(),
+        latest_feedback.created_at.isoformat() if latest_feedback else None,
+    )
+
+
+def _match(user_id, since):
+    match = {'user_id': user_id}
+    if since is not None:
+        match['created_at'] = {'$gte': since}
+    return {'$match': match}
+
+
+def journal_pipeline(user_id, since, timezone_name):
+    return [
+        _match(user_id, since),
+        {'$group': {
+            '_id': {
+                'day': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$created_at', 'timezone': timezone_name}},
+                'mood': '$mood_data.primary_mood'
+            },
+            'count': {'$sum': 1},
+            'confidence': {'$avg': '$mood_data.confidence'}
+        }}
+    ]
+
+
+def feedback_pipeline(user_id, since, timezone_name):
+    return [
+        _match(user_id, since),
+        {'$group': {
+            '_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$created_at', 'timezone': timezone_name}},
+            'count': {'$sum': 1},
+            'total': {'$sum': '$mood_score'}
+        }}
+    ]
+
+
+def empty_bucket():
+    return {
+        'entries': 0,
+        'score_total': 0,
+        'moods': {},
+        'confidence_total': 0.0,
+        'confidence_count': 0,
+        'feedback_count': 0,
+        'feedback_total': 0
+    }
+
+
+def _add(bucket, other):
+    for key in ('entries', 'score_total', 'confidence_total', 'confidence_count', 'feedback_count', 'feedback_total'):
+        bucket[key] += other[key]
+    for mood, count in other['moods'].items():
+        bucket['moods'][mood] = bucket['moods'].get(mood, 0) + count
+
+
+def _summary(bucket):
+    moods = bucket['moods']
+    return {
+        'entries': bucket['entries'],
+        'mood_score': round(bucket['score_total'] / bucket['entries'], 2) if bucket['entries'] else None,
+        'top_mood': max(moods, key=moods.get) if moods else None,
+        'feedback_count': bucket['feedback_count'],
+        'feedback_score': round(bucket['feedback_total'] / bucket['feedback_count'], 2) if bucket['feedback_count'] else None
+    }
+
+
+def mood_trend(scores):
+    """Direction of the last three (daily) mood scores, worded as the dashboard words it"""
+    if len(scores) < 3:
+        return {'direction': 'neutral', 'message': 'Not enough data to determine mood trend.'}
+    change = scores[-1] - scores[-3]
+    if abs(change) < 1:
+        return {'direction': 'stable', 'message': 'Your mood has remained stable over time.'}
+    if change > 0:
+        return {'direction': 'improving', 'message': 'Your mood is improving!'}
+    return {'direction': 'declining', 'message': 'Your mood has been declining recently.'}
+
+
+def aggregate_daily(user_id, since, timezone_name):
+    """Per-day buckets from the raw collections, keyed by local YYYY-MM-DD"""
+    daily = {}
+    mongo_timezone = _mongo_timezone(timezone_name)
+    for row in JournalEntry._get_collection().aggregate(journal_pipeline(user_id, since, mongo_timezone)):
+        bucket = daily.setdefault(row['_id']['day'], empty_bucket())
+        mood = row['_id'].get('mood')
+        count = row['count']
+        bucket['entries'] += count
+        bucket['score_total'] += MOOD_SCORES.get(mood, DEFAULT_MOOD_SCORE) * count
+        if mood:
+            bucket['moods'][mood] = bucket['moods'].get(mood, 0) + count
+        if row.get('confidence') is not None:
+            bucket['confidence_total'] += row['confidence'] * count
+            bucket['confidence_count'] += count
+
+    for row in MusicFeedback._get_collection().aggregate(feedback_pipeline(user_id, since, mongo_timezone)):
+        bucket = daily.setdefault(row['_id'], empty_bucket())
+        bucket['feedback_count'] += row['count']
+        bucket['feedback_total'] += row['total']
+    return daily
+
+
+def user_object_id(user_id):
+    try:
+        return ObjectId(user_id)
+    except (InvalidId, TypeError):
+        raise ValueError(f'Invalid user id: {user_id}')
+
+
+def mood_analytics(user_id, days, timezone_name, now=None):
+    """Daily and weekly buckets, mood distribution, averages and trend"""
+    zone = parse_timezone(timezone_name)
+    today, since = analytics_window(days, zone, now)
+    daily = aggregate_daily(user_object_id(user_id), since, timezone_name)
+    return summarize_days(daily, days, timezone_name, today)
+
+
+def summarize_days(daily, days, timezone_name, today):
+    """Fold per-day buckets into the analytics response"""
+    weekly = {}
+    overall = empty_bucket()
+    for day in sorted(daily):
+        date = datetime.strptime(day, '%Y-%m-%d').date()
+        week_start = (date - timedelta(days=date.weekday())).isoformat()
+        _add(weekly.setdefault(week_start, empty_bucket()), daily[day])
+        _add(overall, daily[day])
+
+    daily_rows = [dict(date=day, **_summary(daily[day])) for day in sorted(daily)]
+    return {
+        'timezone': timezone_name,
+        'days': days,
+        'from': (today - timedelta(days=days - 1)).isoformat(),
+        'to': today.isoformat(),
+        'daily': daily_rows,
+        'weekly': [dict(week_start=week, **_summary(weekly[week])) for week in sorted(weekly)],
+        'distribution': dict(sorted(overall['moods'].items(), key=lambda item: -item[1])),
+        'totals': _summary(overall),
+        'average_confidence': (
+            round(overall['confidence_total'] / overall['confidence_count'], 2) if overall['confidence_count'] else None
+        ),
+        'trend': mood_trend([row['mood_score'] for row in daily_rows if row['mood_score'] is not None])
+    }
@@ -0,0 +1,699 @@
+import functools
+import logging
+import threading
+import time
+from array import array
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Updated Emotion categories mapping with emojis
+EMOTION_CATEGORIES = {
+    'Happy 😊': ['joy', 'happiness', 'delight', 'pleasure', 'cheerfulness'],
+    'Sad 😢': ['sadness', 'grief', 'sorrow', 'disappointment', 'loneliness'],
+    'Angry 😠': ['anger', 'annoyance', 'irritation', 'frustration', 'rage'],
+    'Fearful 😰': ['fear', 'anxiety', 'worry', 'nervousness', 'stress'],
+    'Surprised 😲': ['surprise', 'amazement', 'awe', 'wonder', 'shock'],
+    'Disgusted 🤢': ['disgust', 'revulsion', 'aversion', 'contempt'],
+    'Calm 😌': ['calm', 'relaxed', 'peaceful', 'serene', 'tranquil'],
+    'Excited ⚡': ['excitement', 'enthusiasm', 'eager', 'thrill', 'anticipation'],
+    'Loving 💝': ['love', 'affection', 'caring', 'tenderness', 'fondness', 'adoration'],
+    'Heartbroken 💔': ['heartbreak', 'heartbroken', 'broken heart', 'heart ache', 'emotional pain'],
+    'Motivated 💪': [
+        'determination', 'motivation', 'drive', 'ambition', 'passion', 'inspiration',
+        'purpose', 'focus', 'dedication', 'commitment', 'perseverance', 'resilience',
+        'achievement', 'success', 'progress', 'growth', 'improvement', 'development',
+        'goals', 'aspirations', 'dreams', 'vision', 'mission', 'purpose',
+        'empowerment', 'strength', 'courage', 'confidence', 'belief', 'hope',
+        'optimism', 'positivity', 'enthusiasm', 'energy', 'vitality', 'vigor',
+        'determined', 'motivated', 'driven', 'ambitious', 'passionate', 'inspired',
+        'focused', 'dedicated', 'committed', 'persevering', 'resilient',
+        'achieving', 'succeeding', 'progressing', 'growing', 'improving', 'developing',
+        'empowered', 'strong', 'courageous', 'confident', 'hopeful',
+        'optimistic', 'positive', 'energetic', 'vital', 'vigorous'
+    ],
+    'Neutral 😐': ['neutral', 'indifferent', 'unemotional'],
+    'Nostalgic 🎭': [
+        'nostalgia', 'reminiscence', 'memories', 'recollection', 'remembrance',
+        'sentimental', 'yearning', 'longing', 'homesick', 'melancholy',
+        'wistful', 'reflective', 'contemplative', 'reminiscent', 'retrospective',
+        'old times', 'good old days', 'childhood memories', 'past times',
+        'throwback', 'blast from the past', 'memory lane', 'flashback',
+        'vintage', 'classic', 'traditional', 'old school', 'retro'
+    ],
+    'Low Energy 😴': [
+        'tired', 'exhausted', 'fatigued', 'drained', 'weary', 'sleepy',
+        'lethargic', 'sluggish', 'low energy', 'no energy', 'lack of energy',
+        'burned out', 'worn out', 'spent', 'depleted', 'drowsy', 'groggy',
+        'listless', 'apathetic', 'unmotivated', 'uninspired', 'unenergetic',
+        'low battery', 'running on empty', 'out of steam', 'out of gas',
+        'need rest', 'need sleep', 'need break', 'need recharge'
+    ]
+}
+
+# Emotion emoji mapping for individual emotions
+EMOTION_EMOJIS = {
+    'joy': '😊',
+    'happiness': '😄',
+    'delight': '🥰',
+    'pleasure': '😋',
+    'cheerfulness': '😃',
+    'amusement': '😂',
+    'approval': '👍',
+    'gratitude': '🙏',
+    'sadness': '😢',
+    'grief': '😭',
+    'sorrow': '💔',
+    'disappointment': '😔',
+    'loneliness': '😞',
+    'remorse': '😣',
+    'anger': '😠',
+    'annoyance': '😤',
+    'irritation': '😒',
+    'frustration': '😫',
+    'rage': '😡',
+    'fear': '😰',
+    'anxiety': '😨',
+    'worry': '😟',
+    'nervousness': '😬',
+    'stress': '😓',
+    'embarrassment': '😳',
+    'surprise': '😲',
+    'amazement': '😮',
+    'awe': '🤩',
+    'wonder': '✨',
+    'shock': '😱',
+    'realization': '💡',
+    'confusion': '😕',
+    'curiosity': '🤔',
+    'disgust': '🤢',
+    'revulsion': '🤮',
+    'aversion': '😖',
+    'contempt': '😏',
+    'disapproval': '👎',
+    'calm': '😌',
+    'relaxed': '😌',
+    'peaceful': '🕊️',
+    'serene': '🌊',
+    'tranquil': '🌿',
+    'relief': '😮‍💨',
+    'excitement': '⚡',
+    'enthusiasm': '🎉',
+    'eager': '✨',
+    'thrill': '🎢',
+    'anticipation': '🎯',
+    'love': '💝',
+    'affection': '💖',
+    'caring': '💗',
+    'tenderness': '💓',
+    'fondness': '💕',
+    'adoration': '💘',
+    'admiration': '🤩',
+    'desire': '😍',
+    'determination': '💪',
+    'motivation': '🔥',
+    'drive': '🚀',
+    'ambition': '⭐',
+    'passion': '❤️',
+    'inspiration': '💫',
+    'purpose': '🎯',
+    'focus': '🎯',
+    'dedication': '🎯',
+    'commitment': '🎯',
+    'pride': '🦚',
+    'perseverance': '💪',
+    'resilience': '💪',
+    'achievement': '🏆',
+    'success': '🏆',
+    'progress': '📈',
+    'growth': '🌱',
+    'improvement': '📈',
+    'development': '🌱',
+    'goals': '🎯',
+    'aspirations': '✨',
+    'dreams': '✨',
+    'vision': '👁️',
+    'mission': '🎯',
+    'empowerment': '💪',
+    'strength': '🦁',
+    'courage': '🦁',
+    'confidence': '💪',
+    'belief': '🙏',
+    'hope': '✨',
+    'optimism': '😊',
+    'positivity': '😊',
+    'energy': '⚡',
+    'vitality': '💫',
+    'vigor': '💪',
+    'neutral': '😐',
+    'indifferent': '😶',
+    'unemotional': '😑',
+    'heartbreak': '💔',
+    'heartbroken': '💔',
+    'broken heart': '💔',
+    'heart ache': '💔',
+    'emotional pain': '💔',
+    'nostalgia': '🎭',
+    'reminiscence': '🎭',
+    'memories': '🎭',
+    'recollection': '🎭',
+    'remembrance': '🎭',
+    'sentimental': '🎭',
+    'yearning': '🎭',
+    'longing': '🎭',
+    'homesick': '🎭',
+    'melancholy': '🎭',
+    'wistful': '🎭',
+    'reflective': '🎭',
+    'contemplative': '🎭',
+    'reminiscent': '🎭',
+    'retrospective': '🎭',
+    'old times': '🎭',
+    'good old days': '🎭',
+    'childhood memories': '🎭',
+    'past times': '🎭',
+    'throwback': '🎭',
+    'blast from the past': '🎭',
+    'memory lane': '🎭',
+    'flashback': '🎭',
+    'vintage': '🎭',
+    'classic': '🎭',
+    'traditional': '🎭',
+    'old school': '🎭',
+    'retro': '🎭'
+}
+
+# Model labels to our categories. Every label of the configured model must be
+# listed: CategoryMatrix refuses a label set with unmapped labels
+EMOTION_TO_CATEGORY = {
+    'joy': 'Happy 😊',
+    'happiness': 'Happy 😊',
+    'delight': 'Happy 😊',
+    'pleasure': 'Happy 😊',
+    'cheerfulness': 'Happy 😊',
+    'amusement': 'Happy 😊',
+    'approval': 'Happy 😊',
+    'gratitude': 'Happy 😊',
+    'sadness': 'Sad 😢',
+    'grief': 'Sad 😢',
+    'sorrow': 'Sad 😢',
+    'disappointment': 'Sad 😢',
+    'loneliness': 'Sad 😢',
+    'remorse': 'Sad 😢',
+    'heartbreak': 'Heartbroken 💔',
+    'heartbroken': 'Heartbroken 💔',
+    'broken heart': 'Heartbroken 💔',
+    'heart ache': 'Heartbroken 💔',
+    'emotional pain': 'Heartbroken 💔',
+    'anger': 'Angry 😠',
+    'annoyance': 'Angry 😠',
+    'irritation': 'Angry 😠',
+    'frustration': 'Angry 😠',
+    'rage': 'Angry 😠',
+    'fear': 'Fearful 😰',
+    'anxiety': 'Fearful 😰',
+    'worry': 'Fearful 😰',
+    'nervousness': 'Fearful 😰',
+    'stress': 'Fearful 😰',
+    'embarrassment': 'Fearful 😰',
+    'surprise': 'Surprised 😲',
+    'amazement': 'Surprised 😲',
+    'awe': 'Surprised 😲',
+    'wonder': 'Surprised 😲',
+    'shock': 'Surprised 😲',
+    'realization': 'Surprised 😲',
+    'confusion': 'Surprised 😲',
+    'curiosity': 'Surprised 😲',
+    'disgust': 'Disgusted 🤢',
+    'revulsion': 'Disgusted 🤢',
+    'aversion': 'Disgusted 🤢',
+    'contempt': 'Disgusted 🤢',
+    'disapproval': 'Disgusted 🤢',
+    'calm': 'Calm 😌',
+    'relaxed': 'Calm 😌',
+    'peaceful': 'Calm 😌',
+    'serene': 'Calm 😌',
+    'tranquil': 'Calm 😌',
+    'relief': 'Calm 😌',
+    'excitement': 'Excited ⚡',
+    'enthusiasm': 'Excited ⚡',
+    'eager': 'Excited ⚡',
+    'thrill': 'Excited ⚡',
+    'anticipation': 'Excited ⚡',
+    'love': 'Loving 💝',
+    'affection': 'Loving 💝',
+    'caring': 'Loving 💝',
+    'tenderness': 'Loving 💝',
+    'fondness': 'Loving 💝',
+    'adoration': 'Loving 💝',
+    'admiration': 'Loving 💝',
+    'desire': 'Loving 💝',
+    'determination': 'Motivated 💪',
+    'motivation': 'Motivated 💪',
+    'drive': 'Motivated 💪',
+    'ambition': 'Motivated 💪',
+    'passion': 'Motivated 💪',
+    'inspiration': 'Motivated 💪',
+    'purpose': 'Motivated 💪',
+    'focus': 'Motivated 💪',
+    'dedication': 'Motivated 💪',
+    'commitment': 'Motivated 💪',
+    'pride': 'Motivated 💪',
+    'perseverance': 'Motivated 💪',
+    'resilience': 'Motivated 💪',
+    'achievement': 'Motivated 💪',
+    'success': 'Motivated 💪',
+    'progress': 'Motivated 💪',
+    'growth': 'Motivated 💪',
+    'improvement': 'Motivated 💪',
+    'development': 'Motivated 💪',
+    'goals': 'Motivated 💪',
+    'aspirations': 'Motivated 💪',
+    'dreams': 'Motivated 💪',
+    'vision': 'Motivated 💪',
+    'mission': 'Motivated 💪',
+    'empowerment': 'Motivated 💪',
+    'strength': 'Motivated 💪',
+    'courage': 'Motivated 💪',
+    'confidence': 'Motivated 💪',
+    'belief': 'Motivated 💪',
+    'hope': 'Motivated 💪',
+    'optimism': 'Motivated 💪',
+    'positivity': 'Motivated 💪',
+    'energy': 'Motivated 💪',
+    'vitality': 'Motivated 💪',
+    'vigor': 'Motivated 💪',
+    'neutral': 'Neutral 😐',
+    'indifferent': 'Neutral 😐',
+    'unemotional': 'Neutral 😐',
+    'nostalgia': 'Nostalgic 🎭',
+    'reminiscence': 'Nostalgic 🎭',
+    'memories': 'Nostalgic 🎭',
+    'recollection': 'Nostalgic 🎭',
+    'remembrance': 'Nostalgic 🎭',
+    'sentimental': 'Nostalgic 🎭',
+    'yearning': 'Nostalgic 🎭',
+    'longing': 'Nostalgic 🎭',
+    'homesick': 'Nostalgic 🎭',
+    'melancholy': 'Nostalgic 🎭',
+    'wistful': 'Nostalgic 🎭',
+    'reflective': 'Nostalgic 🎭',
+    'contemplative': 'Nostalgic 🎭',
+    'reminiscent': 'Nostalgic 🎭',
+    'retrospective': 'Nostalgic 🎭'
+}
+
+DEFAULT_CATEGORY = 'Neutral 😐'
+
+def map_emotion_to_category(emotion):
+    """Map the model's output emotions to our desired categories"""
+    return EMOTION_TO_CATEGORY.get(emotion, DEFAULT_CATEGORY)
+
+def preprocess_text(text):
+    """Preprocess text to better detect motivation-related phrases"""
+    motivation_phrases = {
+        'determined to': 'determination',
+        'motivated to': 'motivation',
+        'driven to': 'drive',
+        'committed to': 'commitment',
+        'focused on': 'focus',
+        'passionate about': 'passion',
+        'dedicated to': 'dedication',
+        'inspired to': 'inspiration',
+        'eager to': 'eagerness',
+        'excited to': 'excitement',
+        'looking forward to': 'anticipation',
+        'can\'t wait to': 'anticipation',
+        'ready to': 'determination',
+        'willing to': 'determination',
+        'going to': 'determination',
+        'plan to': 'determination',
+        'aim to': 'determination',
+        'striving to': 'determination',
+        'working to': 'determination',
+        'trying to': 'determination'
+    }
+    
+    # Convert to lowercase for matching
+    text_lower = text.lower()
+    
+    # Check for motivation phrases
+    for phrase, emotion in motivation_phrases.items():
+        if phrase in text_lower:
+            # Add the emotion explicitly to the text
+            text = f"{text} {emotion}"
+    
+    return text
+
+MOTIVATED_CATEGORY = 'Motivated 💪'
+MOTIVATION_BOOST = 1.5  # Increase the weight of motivation-related emotions
+MIN_CATEGORY_SCORE = 0.1  # Minimum confidence threshold
+MIN_EMOTION_SCORE = 0.1  # Labels below this are left out of a response's emotions
+
+# Lexicon detectors that override the model's primary category, as
+# (score field, threshold, category, emotion, emoji). They are applied in
+# this order, so the last one over its threshold wins.
+LEXICON_OVERRIDES = (
+    ('low_energy', 0.2, 'Low Energy 😴', 'low energy', '😴'),
+    ('calm', 0.2, 'Calm 😌', 'calm', '😌'),
+    ('motivation', 0.2, 'Motivated 💪', 'motivation', '💪'),
+    ('heartbreak', 0.2, 'Heartbroken 💔', 'heartbreak', '💔'),
+    ('love', 0.3, 'Loving 💝', 'love', '💝'),
+)
+# Detected overrides are listed in a response's emotions in this order
+LEXICON_EMOTION_ORDER = ('low_energy', 'calm', 'motivation', 'love', 'heartbreak')
+_OVERRIDES_BY_FIELD = {override[0]: override for override in LEXICON_OVERRIDES}
+
+# minimal: primary_mood, confidence and emotions
+# standard: adds emotion_groups with each category's name and score
+# full: adds each category's emotions with their emojis and scores
+DETAIL_LEVELS = ('minimal', 'standard', 'full')
+
+class CategoryMatrix:
+    """Label-index x category weights for one model's label order.
+
+    Row ``i`` is one-hot on the category of label ``i``, weighted by
+    ``MOTIVATION_BOOST`` for Motivated labels, so ``scores @ weights`` turns a
+    ``(texts, labels)`` score tensor into summed category scores for the whole
+    batch. Every label must be in ``EMOTION_TO_CATEGORY``; a label set with
+    unmapped labels is refused rather than silently counted as Neutral.
+    """
+
+    def __init__(self, labels):
+        labels = tuple(labels)
+        if not labels:
+            raise ValueError("The model has no labels")
+        if len(set(labels)) != len(labels):
+            raise ValueError(f"The model's labels are not unique: {labels}")
+
+        unmapped = [label for label in labels if label not in EMOTION_TO_CATEGORY]
+        if unmapped:
+            raise ValueError(
+                f"{len(unmapped)} of {len(labels)} model labels have no mood category in "
+                f"EMOTION_TO_CATEGORY: {', '.join(unmapped)}"
+            )
+
+        self.labels = labels
+        self.categories = tuple(EMOTION_CATEGORIES)
+        columns = {category: index for index, category in enumerate(self.categories)}
+
+        self.weights = np.zeros((len(labels), len(self.categories)))
+        label_categories = []
+        for row, label in enumerate(labels):
+            category = EMOTION_TO_CATEGORY[label]
+            if category not in columns:
+                raise ValueError(f"Label {label!r} maps to unknown category {category!r}")
+            self.weights[row, columns[category]] = MOTIVATION_BOOST if category == MOTIVATED_CATEGORY else 1.0
+            label_categories.append(category)
+
+        self.label_weights = self.weights.sum(axis=1).tolist()
+        # Category scores are averaged over the labels in the category
+        self.label_counts = np.maximum(np.count_nonzero(self.weights, axis=0), 1).tolist()
+        self.category_labels = [np.flatnonzero(column).tolist() for column in self.weights.T]
+        self.emojis = [EMOTION_EMOJIS.get(label, '') for label in labels]
+        self.mood_tags = [
+            f"{category.split(' ')[0]} {emoji}" for category, emoji in zip(label_categories, self.emojis)
+        ]
+
+    def score_tensor(self, results):
+        """``(texts, labels)`` scores from per-text ``[{'label', 'score'}, ...]`` lists"""
+        return np.array([[item['score'] for item in result] for result in results], dtype=np.float64)
+
+    def category_totals(self, scores):
+        """``(texts, categories)`` summed, weighted category scores"""
+        return scores @ self.weights
+
+    def ranked(self, totals):
+        """``[(category index, average score), ...]`` of one text's categories
+        over ``MIN_CATEGORY_SCORE``, best first"""
+        counts = self.label_counts
+        ranked = [
+            (index, total / counts[index])
+            for index, total in enumerate(totals)
+            if total > MIN_CATEGORY_SCORE
+        ]
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked
+
+    def tree(self, scores, totals, with_emotions=True):
+        """``group_emotions`` output for one text's label scores and category totals"""
+        ranked = self.ranked(totals)
+        categories = []
+        for index, average in ranked:
+            category = {'name': self.categories[index], 'score': round(average * 100, 2)}
+            if with_emotions:
+                category['emotions'] = sorted(
+                    (
+                        {
+                            'emotion': self.labels[label],
+                            'emoji': self.emojis[label],
+                            'score': round(scores[label] * self.label_weights[label] * 100, 2)
+                        }
+                        for label in self.category_labels[index]
+                    ),
+                    key=lambda x: x['score'],
+                    reverse=True
+                )
+            categories.append(category)
+        return {
+            'primary_category': self.categories[ranked[0][0]] if ranked else DEFAULT_CATEGORY,
+            'categories': categories
+        }
+
+@functools.lru_cache(maxsize=8)
+def category_matrix(labels):
+    """The ``CategoryMatrix`` for a label order, built once per label set"""
+    return CategoryMatrix(labels)
+
+def _matrix_for(results, matrix=None):
+    # Every text in a batch is scored by the same model, in the same label order
+    labels = tuple(item['label'] for item in results[0])
+    if matrix is None:
+        return category_matrix(labels)
+    if labels != matrix.labels:
+        raise ValueError("Model scores are not in the label order the category matrix was built for")
+    return matrix
+
+class MoodResult:
+    """Compact mood analysis of one text.
+
+    Keeps the model's label scores and the category totals as ``array('d')``
+    rows next to the lexicon scores. ``primary_mood``, ``confidence`` and
+    ``emotions`` are worked out up front; the nested category tree is only
+    built when ``render`` is asked for the ``standard`` or ``full`` detail.
+    """
+
+    __slots__ = ('matrix', 'scores', 'totals', 'lexicon_scores', 'primary_mood', 'confidence', 'emotions')
+
+    def __init__(self, matrix, scores, totals, lexicon_scores):
+        self.matrix = matrix
+        self.scores = array('d', scores)
+        self.totals = array('d', totals)
+        self.lexicon_scores = lexicon_scores
+
+        ranked = matrix.ranked(self.totals)
+        primary_mood = matrix.categories[ranked[0][0]] if ranked else DEFAULT_CATEGORY
+        for field, threshold, category, _, _ in LEXICON_OVERRIDES:
+            if getattr(lexicon_scores, field) > threshold:
+                primary_mood = category
+        self.primary_mood = primary_mood
+
+        # Confidence is the highest label score
+        self.confidence = round(max(self.scores) * 100, 2)
+
+        emotions = [tag for tag, score in zip(matrix.mood_tags, self.scores) if score > MIN_EMOTION_SCORE]
+        for field in LEXICON_EMOTION_ORDER:
+            _, threshold, _, emotion, emoji = _OVERRIDES_BY_FIELD[field]
+            if getattr(lexicon_scores, field) > threshold:
+                emotions.append(f"{emotion} {emoji}")
+        self.emotions = tuple(emotions)
+
+    def emotion_groups(self, with_emotions=True):
+        """The category tree, with the detected lexicon categories added"""
+        grouped = self.matrix.tree(self.scores, self.totals, with_emotions)
+        names = {category['name'] for category in grouped['categories']}
+        for field, threshold, category, emotion, emoji in LEXICON_OVERRIDES:
+            score = getattr(self.lexicon_scores, field)
+            if score > threshold and category not in names:
+                added = {'name': category, 'score': round(score * 100, 2)}
+                if with_emotions:
+                    added['emotions'] = [{'emotion': emotion, 'emoji': emoji, 'score': round(score * 100, 2)}]
+                grouped['categories'].append(added)
+        grouped['primary_category'] = self.primary_mood
+        return grouped
+
+    def render(self, detail='full'):
+        """The /api/analyze-mood response at one of ``DETAIL_LEVELS``"""
+        response = {
+            'primary_mood': self.primary_mood,
+            'confidence': self.confidence,
+            'emotions': list(self.emotions)
+        }
+        if detail != 'minimal':
+            response['emotion_groups'] = self.emotion_groups(with_emotions=detail == 'full')
+        return response
+
+    def to_document(self):
+        """A plain dict for the shared analysis cache"""
+        return {
+            'labels': list(self.matrix.labels),
+            'scores': self.scores.tolist(),
+            'lexicon': self.lexicon_scores._asdict()
+        }
+
+    @classmethod
+    def from_document(cls, document):
+        from lexicon import LexiconScores
+
+        matrix = category_matrix(tuple(document['labels']))
+        scores = document['scores']
+        totals = matrix.category_totals(np.array([scores], dtype=np.float64))[0].tolist()
+        return cls(matrix, scores, totals, LexiconScores(**document['lexicon']))
+
+def group_emotions(emotions_with_scores):
+    """Group emotions into categories and calculate category scores"""
+    return group_emotions_many([emotions_with_scores])[0]
+
+def group_emotions_many(results, matrix=None):
+    """``group_emotions`` for several texts, with one matrix product for the batch.
+
+    ``matrix`` is the model's ``CategoryMatrix``; without it one is looked up
+    from the label order of the results.
+    """
+    if not results:
+        return []
+    matrix = _matrix_for(results, matrix)
+    scores = matrix.score_tensor(results)
+    return [
+        matrix.tree(row, row_totals)
+        for row, row_totals in zip(scores.tolist(), matrix.category_totals(scores).tolist())
+    ]
+
+def build_mood_results(results, lexicon_scores, matrix=None):
+    """A ``MoodResult`` per text from the model's per-label scores and the
+    lexicon detector scores, with one matrix product for the batch"""
+    if not results:
+        return []
+    matrix = _matrix_for(results, matrix)
+    scores = matrix.score_tensor(results)
+    return [
+        MoodResult(matrix, row, row_totals, text_scores)
+        for row, row_totals, text_scores in zip(scores.tolist(), matrix.category_totals(scores).tolist(), lexicon_scores)
+    ]
+
+def build_mood_responses(results, lexicon_scores, detail='full'):
+    """``build_mood_response`` for several texts"""
+    return [result.render(detail) for result in build_mood_results(results, lexicon_scores)]
+
+def build_mood_response(results, lexicon_scores, detail='full'):
+    """Build the /api/analyze-mood response from the model's per-label scores
+    and the lexicon detector scores"""
+    return build_mood_responses([results], [lexicon_scores], detail)[0]
+
+class EmotionModel:
+    """Lazily built emotion classifier running on a selectable inference backend.
+
+    Nothing heavy happens at import time: the backend (and with it ``torch``
+    and ``transformers``) is loaded on the first ``load()``, either from a
+    background warm-up thread or from the first prediction that needs it.
+    See ``inference_backends.py`` for the available backends.
+    """
+
+    def __init__(self, model_name, backend='eager', num_threads=None):
+        self.model_name = model_name
+        self.backend_name = backend
+        self.num_threads = num_threads
+        self._backend = None
+        # CategoryMatrix for the backend's id2label, validated by load()
+        self.matrix = None
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+        self.state = 'cold'
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.ready_at = None
+
+    @property
+    def is_ready(self):
+        return self._backend is not None
+
+    def load(self):
+        """Build the backend (once) and run a warm-up pass"""
+        if self._backend is not None:
+            return self._backend
+
+        with self._lock:
+            if self._backend is not None:
+                return self._backend
+
+            self.state = 'loading'
+            self.error = None
+            logger.info(f"Initializing emotion analyzer ({self.model_name}, {self.backend_name} backend)...")
+            started = time.perf_counter()
+            try:
+                from inference_backends import create_backend
+
+                backend = create_backend(self.backend_name, self.model_name, num_threads=self.num_threads)
+                backend.load()
+                loaded = time.perf_counter()
+
+                # Fail on a label set the category matrix can't be built for
+                matrix = category_matrix(tuple(backend.labels))
+
+                # The first forward pass is much slower than the rest; pay it here
+                backend.warm_up()
+                warmed = time.perf_counter()
+            except Exception as e:
+                self.state = 'failed'
+                self.error = str(e)
+                logger.error(f"Error initializing emotion analyzer: {str(e)}")
+                raise
+
+            self.load_seconds = round(loaded - started, 3)
+            self.warmup_seconds = round(warmed - started, 3)
+            self.ready_at = time.time()
+            self.state = 'ready'
+            self.matrix = matrix
+            self._backend = backend
+            logger.info(f"Emotion analyzer initialized successfully in {self.warmup_seconds}s")
+            return self._backend
+
+    def start_warmup(self):
+        """Load the model in a background thread; safe to call repeatedly"""
+        if self._backend is not None:
+            return
+        if self._warmup_thread is not None and self._warmup_thread.is_alive():
+            return
+
+        def warm():
+            try:
+                self.load()
+            except Exception:
+                # Already logged and recorded in self.error; predictions retry the load
+                pass
+
+        self._warmup_thread = threading.Thread(target=warm, name='emotion-model-warmup', daemon=True)
+        self._warmup_thread.start()
+
+    def predict(self, texts):
+        """Run one padded forward pass over a batch of texts"""
+        return self.load().predict(texts)
+
+    def token_offsets(self, text):
+        """Character offsets of the tokens in ``text``, without special tokens"""
+        encoded = self.load().tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        return encoded['offset_mapping']
+
+    def status(self):
+        return {
+            'model': self.model_name,
+            'backend': self.backend_name,
+            'state': self.state,
+            'ready': self.is_ready,
+            'load_seconds': self.load_seconds,
+            'warmup_seconds': self.warmup_seconds,
+            'ready_at': self.ready_at,
+            'error': self.error,
+        }
@@ -0,0 +1,61 @@
+"""Keyset pagination over ``(created_at, _id)`` for per-user listings.
+
+Pages are read newest first with ``created_at < t OR (created_at == t AND
+_id < id)``, which the ``(user_id, -created_at, -_id)`` indexes answer with
+an index range scan, so every page costs the same however deep it is.
+"""
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from mongoengine.queryset.visitor import Q
+
+
+def encode_cursor(document):
+    """Opaque cursor pointing just past ``document``"""
+    payload = json.dumps({
+        't': document.created_at.isoformat(),
+        'id': str(document.id)
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(created_at, ObjectId)`` or raise ValueError for a bad cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(payload['t']), ObjectId(payload['id'])
+    except (ValueError, KeyError, TypeError, InvalidId, UnicodeError) as e:
+        raise ValueError(f'Invalid cursor: {str(e)}')
+
+
+def parse_page_args(args, default_limit, max_limit):
+    """Read ``limit`` and ``cursor`` query parameters; raises ValueError"""
+    try:
+        limit = int(args.get('limit', default_limit))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+    cursor = args.get('cursor')
+    return min(limit, max_limit), decode_cursor(cursor) if cursor else None
+
+
+def page_query(queryset, position, limit):
+    """Queryset for one page plus a lookahead document telling if more follow"""
+    if position is not None:
+        created_at, last_id = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=last_id)
+        )
+    return queryset.order_by('-created_at', '-id').limit(limit + 1)
+
+
+def paginate(queryset, position, limit):
+    """Return ``(documents, next_cursor)`` for one newest-first page"""
+    documents = list(page_query(queryset, position, limit))
+    next_cursor = encode_cursor(documents[limit - 1]) if len(documents) > limit else None
+    return documents[:limit], next_cursor
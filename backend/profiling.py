@@ -0,0 +1,153 @@
+"""On-demand request profiling.
+
+A request is profiled with cProfile in two cases:
+
+- it carries ``X-Profile-Token`` matching ``PROFILE_TOKEN``;
+- it is picked by ``PROFILE_SAMPLE_RATE``, optionally limited to
+  ``PROFILE_ENDPOINTS``.
+
+The profile covers the request's own thread from the first ``before_request``
+hook to the response. For a streamed response (the NDJSON batch endpoint,
+PDF exports) it runs on until the server closes the stream, so it includes
+generating the body; such a profile gets no ``X-Profile-Id`` header, since
+its name holds the duration, and is found by request id instead. Model
+forward passes run on the batcher thread, so they show up only as time
+waiting on a future. Each profile is written to
+``PROFILE_DIR`` as a pstats file named after its time, endpoint, request id
+and duration. Only the newest ``PROFILE_MAX_FILES`` files are kept. Inspect
+a downloaded profile with ``python -m pstats <file>`` or snakeviz.
+"""
+import cProfile
+import hmac
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = '.prof'
+
+_NAME_RE = re.compile(r'^[\w.-]+\.prof$')
+
+
+def is_profile_name(name):
+    return bool(_NAME_RE.match(name))
+
+
+def has_profile_token(req, token):
+    """Whether ``req`` carries the admin profiling token"""
+    supplied = req.headers.get('X-Profile-Token', '')
+    return bool(token) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+
+def profile_name(endpoint, request_id, duration_ms, now=None):
+    now = now or datetime.now(timezone.utc)
+    endpoint = re.sub(r'[^\w-]', '-', endpoint or 'unmatched')
+    # '_' separates the name's fields, so it may only appear inside the endpoint
+    request_id = re.sub(r'[^A-Za-z0-9-]', '-', request_id)
+    return f"{now.strftime('%Y%m%dT%H%M%S%fZ')}_{endpoint}_{request_id}_{int(duration_ms)}ms{PROFILE_SUFFIX}"
+
+
+def save_profile(profiler, directory, name, max_files):
+    """Write a profile atomically and drop the oldest beyond ``max_files``"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    profiler.dump_stats(path + '.tmp')
+    os.replace(path + '.tmp', path)
+    prune_profiles(directory, max_files)
+    return path
+
+
+def prune_profiles(directory, max_files):
+    names = sorted(name for name in os.listdir(directory) if name.endswith(PROFILE_SUFFIX))
+    # Names start with a UTC timestamp, so they sort oldest first
+    for name in names[:max(0, len(names) - max_files)]:
+        try:
+            os.unlink(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def list_profiles(directory):
+    """Stored profiles, newest first"""
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith(PROFILE_SUFFIX):
+            continue
+        parts = name[:-len(PROFILE_SUFFIX)].split('_')
+        try:
+            created_at = datetime.strptime(parts[0], '%Y%m%dT%H%M%S%fZ').replace(tzinfo=timezone.utc)
+            profiles.append({
+                'name': name,
+                'created_at': created_at.isoformat(),
+                'endpoint': '_'.join(parts[1:-2]),
+                'request_id': parts[-2],
+                'duration_ms': int(parts[-1][:-2]),
+                'size': os.path.getsize(os.path.join(directory, name))
+            })
+        except (ValueError, IndexError, OSError):
+            continue
+    return profiles
+
+
+def init_profiling(app, directory, token=None, sample_rate=0.0, endpoints=(), max_files=100,
+                   exclude=('list_request_profiles', 'download_request_profile')):
+    """Profile requests to ``app`` that carry the token or are sampled"""
+    endpoints = set(endpoints)
+
+    def wanted():
+        if request.endpoint in exclude:
+            return False
+        if has_profile_token(request, token):
+            return True
+        if sample_rate <= 0 or (endpoints and request.endpoint not in endpoints):
+            return False
+        return random.random() < sample_rate
+
+    @app.before_request
+    def start_profile():
+        if wanted():
+            g.profiler = cProfile.Profile()
+            g.profile_started = time.perf_counter()
+            g.profiler.enable()
+
+    def finish_profile(profiler, started, endpoint, request_id):
+        profiler.disable()
+        duration_ms = (time.perf_counter() - started) * 1000
+        name = profile_name(endpoint, request_id, duration_ms)
+        try:
+            save_profile(profiler, directory, name, max_files)
+        except OSError as e:
+            logger.error(f"Failed to save request profile: {str(e)}")
+            return None
+        return name
+
+    @app.after_request
+    def save_request_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        args = (profiler, g.profile_started, request.endpoint, g.get('request_id') or uuid.uuid4().hex)
+        if response.is_streamed:
+            # The body is generated after this hook, as the server iterates it
+            response.call_on_close(lambda: finish_profile(*args))
+            return response
+        name = finish_profile(*args)
+        if name is not None:
+            response.headers['X-Profile-Id'] = name
+        return response
+
+    @app.teardown_request
+    def stop_profile(exc):
+        # after_request is skipped when the response could not be built
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
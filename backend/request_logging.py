@@ -0,0 +1,176 @@
+"""Structured, non-blocking logging for the API.
+
+``configure_logging`` sends every record through a bounded in-memory queue.
+The request thread only resolves the message and enqueues it. A background
+listener formats it as one JSON object per line (or plain text) and writes
+it to stderr. If the queue is full, records are dropped and counted rather
+than blocking the request.
+
+``init_request_logging`` gives each request an id. That is the incoming
+``X-Request-ID`` or a fresh one, and it is attached to every record logged
+while the request is handled and echoed in the response. It also writes one
+access record per request with the endpoint, status and duration. Access
+records are sampled per endpoint; server errors are always kept.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+access_logger = logging.getLogger('access')
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id'}
+
+_REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,128}$')
+
+_handler = None
+_listener = None
+
+
+def _extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with ``extra`` fields at the top level"""
+
+    def format(self, record):
+        fields = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            fields['request_id'] = record.request_id
+        fields.update(_extra_fields(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            fields['exc'] = record.exc_text
+        return json.dumps(fields, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with ``extra`` fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s')
+
+    def format(self, record):
+        record.request_id = getattr(record, 'request_id', None) or '-'
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return line
+
+
+class RequestIdFilter(logging.Filter):
+    """Tags records with the id of the request being handled, if any"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: records are dropped when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Resolve the message (and any traceback) now; formatting is left to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level='INFO', fmt='json', queue_size=10000):
+    """Route the root logger through a background queue listener (once per process)"""
+    global _handler, _listener
+    if _listener is not None:
+        return _handler
+
+    output = logging.StreamHandler()
+    output.setFormatter(TextFormatter() if fmt == 'text' else JsonFormatter())
+
+    _handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    _handler.addFilter(RequestIdFilter())
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    root.setLevel(level)
+    return _handler
+
+
+def logging_stats():
+    if _handler is None:
+        return {'queued': 0, 'dropped': 0}
+    return {'queued': _handler.queue.qsize(), 'dropped': _handler.dropped}
+
+
+def parse_sample_rates(value):
+    """``"analyze_mood=0.1,get_journal_entries=0.5"`` as ``{endpoint: rate}``"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        endpoint, _, rate = item.partition('=')
+        rate = float(rate)
+        if not endpoint or not 0.0 <= rate <= 1.0:
+            raise ValueError(f'Invalid log sample rate: {item}')
+        rates[endpoint.strip()] = rate
+    return rates
+
+
+def init_request_logging(app, default_rate=1.0, sample_rates=None):
+    """Request ids and sampled access records for every request to ``app``"""
+    sample_rates = sample_rates or {}
+
+    @app.before_request
+    def start_request_log():
+        incoming = request.headers.get('X-Request-ID', '')
+        g.request_id = incoming if _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def write_access_log(response):
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+        started = g.get('request_started')
+        rate = sample_rates.get(request.endpoint, default_rate)
+        if started is not None and (response.status_code >= 500 or random.random() < rate):
+            access_logger.info('request', extra={
+                'method': request.method,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+                'sample_rate': rate
+            })
+        return response
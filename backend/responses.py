@@ -0,0 +1,111 @@
+"""Response encoding: JSON/MessagePack negotiation and body compression.
+
+``api_response`` replaces ``jsonify`` on the endpoints with large bodies.
+It returns MessagePack when the client prefers ``application/msgpack`` in its
+``Accept`` header, and JSON otherwise. JSON is encoded with orjson when
+installed, falling back to Flask's encoder. Both encodings carry the same
+structure ``jsonify`` produced.
+
+``compress_response`` runs after every request. It brotli- or
+gzip-compresses buffered bodies above a size threshold, depending on
+``Accept-Encoding``. Streamed and file responses are left alone.
+
+orjson, msgpack and brotli are optional: ``pip install orjson msgpack brotli``.
+"""
+import gzip
+
+from flask import Response, current_app, json, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+COMPRESSIBLE_MIMETYPES = {
+    JSON_MIMETYPE,
+    MSGPACK_MIMETYPE,
+    'application/x-msgpack',
+    'text/html',
+    'text/plain',
+}
+
+
+def _default(value):
+    # Whatever Flask's encoder would make of it (dates as HTTP dates, etc.)
+    return current_app.json_encoder().default(value)
+
+
+def negotiated_mimetype():
+    """The mimetype ``api_response`` will use for this request's ``Accept``"""
+    if msgpack is None:
+        return JSON_MIMETYPE
+    best = request.accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE, 'application/x-msgpack'])
+    return MSGPACK_MIMETYPE if best in (MSGPACK_MIMETYPE, 'application/x-msgpack') else JSON_MIMETYPE
+
+
+def encode_json(payload):
+    if orjson is None:
+        return json.dumps(payload).encode('utf-8')
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if current_app.config.get('JSON_SORT_KEYS', True):
+        option |= orjson.OPT_SORT_KEYS
+    if current_app.debug or current_app.config.get('JSONIFY_PRETTYPRINT_REGULAR'):
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(payload, default=_default, option=option)
+
+
+def api_response(payload, status=200):
+    """Like ``jsonify(payload), status`` with MessagePack negotiation"""
+    if negotiated_mimetype() == MSGPACK_MIMETYPE:
+        response = Response(
+            msgpack.packb(payload, use_bin_type=True, default=_default),
+            status=status,
+            mimetype=MSGPACK_MIMETYPE
+        )
+    else:
+        response = Response(encode_json(payload), status=status, mimetype=JSON_MIMETYPE)
+    response.vary.add('Accept')
+    return response
+
+
+def compress_response(response, min_bytes, gzip_level=6, brotli_quality=4):
+    """Compress a buffered response body for clients that accept it"""
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or not 200 <= response.status_code < 300
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+    encoding = request.accept_encodings.best_match(encodings)
+    if encoding == 'br':
+        data = brotli.compress(data, quality=brotli_quality)
+    elif encoding == 'gzip':
+        data = gzip.compress(data, compresslevel=gzip_level)
+    else:
+        return response
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,235 @@
+"""Per-user daily mood rollups, maintained as entries and feedback are written.
+
+``mood_daily_rollups`` holds one document per user per local day in
+``ROLLUP_TIMEZONE``. Each document has entry counts per primary mood,
+confidence and feedback sums, and counts. Writers apply atomic ``$inc``
+upserts, so concurrent workers never lose updates. Analytics for that
+timezone then read O(days) small documents instead of aggregating every
+entry.
+
+Timestamps are stored as naive UTC. The live increments and ``rebuild`` bucket
+the same instant into the same local day: ``rebuild`` reads the stored BSON
+date through ``$dateToString``, and ``rollup_day`` reads a naive value as UTC.
+
+The rollups are derived data. A failed increment is logged, not raised. To
+recompute from the raw collections and check the result, run:
+
+    python rollups.py rebuild [--user USER_ID]
+    python rollups.py verify [--user USER_ID]
+"""
+import argparse
+import logging
+import sys
+from collections import defaultdict
+from datetime import timedelta
+
+from bson import DBRef, ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from config import Config
+from models import MoodDailyRollup, User, as_utc
+from mood_analytics import (
+    DEFAULT_MOOD_SCORE, MOOD_SCORES, aggregate_daily, analytics_window, empty_bucket,
+    parse_timezone, summarize_days, user_object_id
+)
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TIMEZONE = Config.ROLLUP_TIMEZONE
+
+# Counter fields compared by verify; moods are compared separately
+_COUNTERS = ('entries', 'confidence_count', 'feedback_total', 'feedback_count')
+
+
+def encode_mood(mood):
+    # Mood names become field names, which may not contain '.' or start with '$'
+    return mood.replace('.', '．').replace('$', '＄')
+
+
+def decode_mood(key):
+    return key.replace('．', '.').replace('＄', '$')
+
+
+def uses_rollups(timezone_name):
+    """Whether analytics in this timezone can be served from the rollups"""
+    return timezone_name == ROLLUP_TIMEZONE
+
+
+def rollup_day(created_at):
+    """Local YYYY-MM-DD of a timestamp, bucketed as ``rebuild`` buckets the stored value"""
+    return as_utc(created_at).astimezone(parse_timezone(ROLLUP_TIMEZONE)).date().isoformat()
+
+
+def _user_oid(value):
+    if isinstance(value, ObjectId):
+        return value
+    if isinstance(value, DBRef) or hasattr(value, 'pk'):
+        return value.id
+    return ObjectId(str(value))
+
+
+def entry_increments(entry, count_entry=True):
+    inc = {'entries': 1} if count_entry else {}
+    mood_data = entry.mood_data or {}
+    if mood_data.get('primary_mood'):
+        inc[f"moods.{encode_mood(mood_data['primary_mood'])}"] = 1
+        if mood_data.get('confidence') is not None:
+            inc['confidence_total'] = float(mood_data['confidence'])
+            inc['confidence_count'] = 1
+    return inc
+
+
+def _apply(increments):
+    """Upsert summed ``$inc`` documents for ``{(user_id, day): {field: delta}}``"""
+    operations = [
+        UpdateOne({'user_id': user_id, 'day': day}, {'$inc': inc}, upsert=True)
+        for (user_id, day), inc in increments.items() if inc
+    ]
+    if not operations:
+        return
+    try:
+        MoodDailyRollup._get_collection().bulk_write(operations, ordered=False)
+    except PyMongoError as e:
+        logger.error(f"Failed to update mood rollups (run `python rollups.py rebuild`): {str(e)}")
+
+
+def record_entries(entries, count_entries=True):
+    """Add saved entries to their days; ``count_entries=False`` adds only their mood"""
+    increments = defaultdict(lambda: defaultdict(int))
+    for entry in entries:
+        key = (_user_oid(entry.user_id), rollup_day(entry.created_at))
+        for field, delta in entry_increments(entry, count_entries).items():
+            increments[key][field] += delta
+    _apply(increments)
+
+
+def record_entry(entry):
+    record_entries([entry])
+
+
+def record_entry_mood(entry):
+    """Count the mood of an entry whose mood was filled in after it was recorded"""
+    record_entries([entry], count_entries=False)
+
+
+def record_feedback(feedback):
+    key = (_user_oid(feedback.user_id), rollup_day(feedback.created_at))
+    _apply({key: {'feedback_total': int(feedback.mood_score), 'feedback_count': 1}})
+
+
+def _bucket(document):
+    """A rollup document as a mood_analytics day bucket"""
+    bucket = empty_bucket()
+    for field in _COUNTERS + ('confidence_total',):
+        bucket[field] = document.get(field, 0)
+    bucket['moods'] = {decode_mood(key): count for key, count in (document.get('moods') or {}).items() if count}
+    with_mood = sum(bucket['moods'].values())
+    bucket['score_total'] = (
+        sum(MOOD_SCORES.get(mood, DEFAULT_MOOD_SCORE) * count for mood, count in bucket['moods'].items()) +
+        (bucket['entries'] - with_mood) * DEFAULT_MOOD_SCORE
+    )
+    return bucket
+
+
+def read_daily(user_id, first_day, last_day):
+    """Per-day buckets for ``[first_day, last_day]`` read from the rollups"""
+    cursor = MoodDailyRollup._get_collection().find(
+        {'user_id': user_id, 'day': {'$gte': first_day, '$lte': last_day}},
+        {'_id': 0, 'user_id': 0}
+    )
+    return {document['day']: _bucket(document) for document in cursor}
+
+
+def rollup_analytics(user_id, days, now=None):
+    """Same response as ``mood_analytics`` for ``ROLLUP_TIMEZONE``, from the rollups"""
+    today, _ = analytics_window(days, parse_timezone(ROLLUP_TIMEZONE), now)
+    first_day = today - timedelta(days=days - 1)
+    daily = read_daily(user_object_id(user_id), first_day.isoformat(), today.isoformat())
+    return summarize_days(daily, days, ROLLUP_TIMEZONE, today)
+
+
+def compute_rollups(user_id):
+    """Rollup documents for one user recomputed from the raw collections"""
+    documents = {}
+    for day, bucket in aggregate_daily(user_id, None, ROLLUP_TIMEZONE).items():
+        document = {field: bucket[field] for field in _COUNTERS}
+        document.update(
+            user_id=user_id,
+            day=day,
+            confidence_total=float(bucket['confidence_total']),
+            moods={encode_mood(mood): count for mood, count in bucket['moods'].items()}
+        )
+        documents[day] = document
+    return documents
+
+
+def rebuild_user(user_id):
+    """Replace one user's rollups with freshly computed ones; returns the day count"""
+    documents = compute_rollups(user_id)
+    collection = MoodDailyRollup._get_collection()
+    collection.delete_many({'user_id': user_id})
+    if documents:
+        collection.insert_many(list(documents.values()), ordered=False)
+    return len(documents)
+
+
+def verify_user(user_id, tolerance=1e-6):
+    """Days whose stored rollup differs from the raw data, as ``[(day, reason), ...]``"""
+    expected = compute_rollups(user_id)
+    stored = {
+        document['day']: document
+        for document in MoodDailyRollup._get_collection().find({'user_id': user_id})
+    }
+    problems = []
+    for day in sorted(set(expected) | set(stored)):
+        want, have = expected.get(day), stored.get(day)
+        if want is None:
+            # Increments can leave empty days behind; only non-empty ones are wrong
+            if any(have.get(field) for field in _COUNTERS):
+                problems.append((day, 'rollup has no matching raw data'))
+            continue
+        if have is None:
+            problems.append((day, 'missing rollup'))
+            continue
+        for field in _COUNTERS:
+            if want[field] != have.get(field, 0):
+                problems.append((day, f"{field}: expected {want[field]}, stored {have.get(field, 0)}"))
+        # Relative, since the raw side is rebuilt from per-group averages
+        if abs(want['confidence_total'] - have.get('confidence_total', 0)) > tolerance * max(1.0, want['confidence_total']):
+            problems.append((day, f"confidence_total: expected {want['confidence_total']}, stored {have.get('confidence_total')}"))
+        have_moods = {mood: count for mood, count in (have.get('moods') or {}).items() if count}
+        if want['moods'] != have_moods:
+            problems.append((day, f"moods: expected {want['moods']}, stored {have_moods}"))
+    return problems
+
+
+def main(argv=None):
+    from mongoengine import connect
+
+    parser = argparse.ArgumentParser(description='Rebuild or verify the daily mood rollups')
+    parser.add_argument('command', choices=('rebuild', 'verify'))
+    parser.add_argument('--user', help='Only this user id (default: every user)')
+    args = parser.parse_args(argv)
+
+    connect(**Config.MONGODB_SETTINGS)
+    user_ids = [ObjectId(args.user)] if args.user else [user.id for user in User.objects.only('id')]
+
+    failures = 0
+    for user_id in user_ids:
+        if args.command == 'rebuild':
+            print(f"{user_id}: rebuilt {rebuild_user(user_id)} days")
+        problems = verify_user(user_id)
+        for day, reason in problems:
+            print(f"{user_id} {day}: {reason}")
+        failures += bool(problems)
+
+    if failures:
+        print(f"Rollups differ from the raw data for {failures} users")
+        return 1
+    print(f"Rollups match the raw data for {len(user_ids)} users")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -203,6 +203,8 @@ function Journal() {
         `${BACKEND_URL}/api/analyze-mood`,
         { text: entry },
         {
+          // Only primary_mood, confidence and emotions are used here
+          params: { detail: 'minimal' },
           headers: {
             'Content-Type': 'application/json',
             'Authorization': `Bearer ${token}`